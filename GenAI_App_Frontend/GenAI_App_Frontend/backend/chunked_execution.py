@@ -0,0 +1,174 @@
+import ast
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .feature_dag import module_functions
+from .memoized_execution import NON_ELEMENTWISE_METHODS
+
+
+# Rows per batch in out-of-core mode, peak memory grows with this instead of the table size
+OUT_OF_CORE_BATCH_ROWS = int(os.environ.get("OUT_OF_CORE_BATCH_ROWS", "100000"))
+
+# Rows kept in memory as the base and final dataset previews in out-of-core mode
+OUT_OF_CORE_PREVIEW_ROWS = int(os.environ.get("OUT_OF_CORE_PREVIEW_ROWS", "10000"))
+
+# Methods whose result depends on rows outside the batch. Positional iloc[:, k] is row-local.
+BATCH_DEPENDENT_METHODS = NON_ELEMENTWISE_METHODS - {"iloc"}
+
+# Functions that compute statistics over whatever rows they are given
+BATCH_DEPENDENT_CALLS = frozenset({
+    "len", "qcut", "get_dummies", "factorize", "percentile", "nanpercentile", "nanmean", "nanmedian",
+    "nanstd", "average", "argsort", "argmax", "argmin", "cumsum", "histogram", "digitize",
+})
+
+
+def global_statistic_reasons(source: str, function_name: str) -> list:
+    """
+    Statically checks whether a generated function needs statistics over the whole table.
+
+    Module-level functions the dataframe is passed to are checked as well.
+
+    Parameters:
+        source (str): The generated module source.
+        function_name (str): The feature function in it.
+
+    Returns:
+        list: Why the function isn't row-local, e.g. ["uses .mean"]. Empty for row-local functions.
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return ["does not parse"]
+
+    functions = module_functions(tree)
+    if function_name not in functions:
+        return ["is not defined"]
+
+    reasons = set()
+    pending, seen = [function_name], set()
+    while pending:
+        name = pending.pop()
+        if name in seen or name not in functions:
+            continue
+        seen.add(name)
+        for node in ast.walk(functions[name]):
+            if isinstance(node, ast.Attribute) and node.attr in BATCH_DEPENDENT_METHODS:
+                reasons.add(f"uses .{node.attr}")
+            elif isinstance(node, ast.Call):
+                if isinstance(node.func, ast.Name):
+                    if node.func.id in BATCH_DEPENDENT_CALLS:
+                        reasons.add(f"calls {node.func.id}()")
+                    pending.append(node.func.id)
+                elif isinstance(node.func, ast.Attribute) and node.func.attr in BATCH_DEPENDENT_CALLS:
+                    reasons.add(f"calls {node.func.attr}()")
+    return sorted(reasons)
+
+
+def csv_batches(path: str, batch_rows: int = OUT_OF_CORE_BATCH_ROWS):
+    """Reads a CSV file batch_rows rows at a time."""
+    with pd.read_csv(path, chunksize=batch_rows) as reader:
+        for batch in reader:
+            yield batch
+
+
+class ParquetPartsWriter:
+    """
+    Appends dataframe batches to Parquet files in a directory.
+
+    Batches are written to the current part while their schema matches, a batch whose columns
+    changed type, like an integer column that gets nulls in a later CSV chunk, starts a new part.
+    """
+
+    def __init__(self, directory: str, preview_rows: int = 0):
+        self.directory = directory
+        self.preview_rows = preview_rows
+        self.parts = []
+        self.rows = 0
+        self.preview = []
+        self.writer = None
+        self.schema = None
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+
+    def write(self, df: pd.DataFrame):
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self.schema is not None and not table.schema.equals(self.schema, check_metadata=False):
+            try:
+                table = table.cast(self.schema)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                self.close()
+
+        if self.writer is None:
+            path = os.path.join(self.directory, f"part-{len(self.parts):05d}.parquet")
+            self.schema = table.schema
+            self.writer = pq.ParquetWriter(path, self.schema)
+            self.parts.append(path)
+        self.writer.write_table(table)
+
+        if self.rows < self.preview_rows:
+            self.preview.append(df.iloc[:self.preview_rows - self.rows])
+        self.rows += len(df)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    def preview_frame(self) -> pd.DataFrame:
+        return pd.concat(self.preview, ignore_index=True) if self.preview else pd.DataFrame()
+
+    def read_columns(self, columns: list) -> pd.DataFrame:
+        """The given columns of every row written so far, loaded whole."""
+        self.close()
+        frames = [pq.read_table(path, columns=columns).to_pandas() for path in self.parts]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+
+    def iter_batches(self, batch_rows: int = OUT_OF_CORE_BATCH_ROWS):
+        """Reads the written rows back batch_rows at a time, each batch indexed by its row positions."""
+        self.close()
+        offset = 0
+        for path in self.parts:
+            for record_batch in pq.ParquetFile(path).iter_batches(batch_size=batch_rows):
+                batch = record_batch.to_pandas()
+                batch.index = pd.RangeIndex(offset, offset + len(batch))
+                offset += len(batch)
+                yield batch
+
+
+def spill_batches(batches) -> ParquetPartsWriter:
+    """
+    Streams source batches into a local Parquet spill, so later passes read a fixed row order
+    and load single columns without re-querying the source.
+    """
+    spill = ParquetPartsWriter(tempfile.mkdtemp(prefix="feature_spill_"))
+    for batch in batches:
+        spill.write(batch)
+    spill.close()
+    return spill
+
+
+def run_features_in_batches(spill: ParquetPartsWriter, run_batch, output_dir: str,
+                            batch_rows: int = OUT_OF_CORE_BATCH_ROWS,
+                            preview_rows: int = OUT_OF_CORE_PREVIEW_ROWS) -> ParquetPartsWriter:
+    """
+    Runs the row-local features batch by batch and appends every output batch to output_dir.
+
+    Parameters:
+        spill (ParquetPartsWriter): The source rows.
+        run_batch: Callable (batch) -> output dataframe for the batch, batch is indexed by row position.
+        output_dir (str): Directory of the Parquet output.
+
+    Returns:
+        ParquetPartsWriter: The closed output, with its row count and preview.
+    """
+    output = ParquetPartsWriter(output_dir, preview_rows=preview_rows)
+    for number, batch in enumerate(spill.iter_batches(batch_rows)):
+        print(f"Running feature functions on batch {number + 1} ({len(batch)} rows)...")
+        output.write(run_batch(batch))
+    output.close()
+    return output
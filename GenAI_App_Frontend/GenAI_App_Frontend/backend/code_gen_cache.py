@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+# Directory the cached LLM responses are written to
+CODE_GEN_CACHE_DIR = os.environ.get("CODE_GEN_CACHE_DIR", ".code_gen_cache")
+
+# Maximum number of cached responses kept on disk before the least recently used are evicted
+CODE_GEN_CACHE_MAX_ENTRIES = int(os.environ.get("CODE_GEN_CACHE_MAX_ENTRIES", "500"))
+
+
+def code_gen_cache_key(prompt: str, model: str) -> str:
+    """
+    Builds the content-addressed cache key for a rendered prompt.
+
+    Parameters:
+        prompt (str): The fully rendered code generation prompt.
+        model (str): The model the prompt is sent to.
+
+    Returns:
+        str: A sha256 hex digest of the model name and prompt.
+    """
+    return hashlib.sha256(f"{model}\n{prompt}".encode("utf-8")).hexdigest()
+
+
+class CodeGenCache:
+    """On-disk cache of LLM code generation responses with size-bounded LRU eviction."""
+
+    def __init__(self, cache_dir: str = CODE_GEN_CACHE_DIR, max_entries: int = CODE_GEN_CACHE_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+
+    def entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, prompt: str, model: str):
+        """Returns the cached response content for the prompt and model, or None on a miss."""
+        path = self.entry_path(code_gen_cache_key(prompt, model))
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        # Touch the entry so eviction is least-recently-used rather than oldest-written
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        print(f"Code gen cache hit for model {model}")
+        return entry.get("content")
+
+    def put(self, prompt: str, model: str, content: str):
+        """Stores the response content for the prompt and model, evicting old entries if needed."""
+        if not content:
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.entry_path(code_gen_cache_key(prompt, model))
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+
+        with open(tmp_path, "w") as f:
+            json.dump({"model": model, "content": content, "created_at": time.time()}, f)
+        os.replace(tmp_path, path)
+
+        self.evict()
+
+    def invalidate(self, prompt: str, model: str):
+        """Removes the cached response for the prompt and model, if there is one."""
+        try:
+            os.remove(self.entry_path(code_gen_cache_key(prompt, model)))
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        """Removes every cached response."""
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".json"):
+                os.remove(os.path.join(self.cache_dir, name))
+
+    def evict(self):
+        """Deletes the least recently used entries until at most max_entries remain."""
+        with self.lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    entries.append((os.path.getmtime(path), path))
+                except FileNotFoundError:
+                    continue
+
+            if len(entries) <= self.max_entries:
+                return
+
+            entries.sort()
+            for _, path in entries[:len(entries) - self.max_entries]:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+
+# Shared cache used by both code generation chains
+CODE_GEN_CACHE = CodeGenCache()
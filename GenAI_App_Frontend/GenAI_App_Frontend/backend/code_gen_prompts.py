@@ -0,0 +1,68 @@
+from langchain.prompts import PromptTemplate
+
+
+# Prompts shared by the V2 (OpenAI) and V3 (Databricks) code generation chains
+
+CODE_GEN_BATCH_TEMPLATE = """
+You will be creating several python functions, each one generating a new feature based on existing columns in a pandas dataframe.
+
+To help you create these functions, you will also be provided with the following: 
+- The first 10 rows of the dataframe, to give you context on what each column contains. 
+- The documentation of all the columns in the dataframe. This will provide you with the data type and description for each column. 
+
+Based on the user requests below describing the new features, generate one function per feature. 
+
+Feature Requests: 
+{feature_requests}
+
+Each function should strictly follow these format specifications:
+1. The function should be named after the feature name of its request.
+2. The function should have 1 input parameter called DF. DF is a Pandas Dataframe. This is the dataframe you will use to create the new feature. 
+3. The function should return a dataframe with one column per new feature, containing its value for each row in the source data dataframe. This is a 1 column dataframe unless the request asks for several output columns. 
+4. Each function must be in its own ```python code block, and the first line of the block must be the comment `# feature: <feature name>`.
+5. Each code block must be self contained, including its own imports. Do not output any other leading or trailing text. 
+
+Your code should follow these guidelines:
+1. Be Performant
+2. Handle Edge Cases Gracefully
+3. Be robust 
+
+Here are the first 10 rows of the dataframe: 
+{table_sample}
+
+Here is the documentation for the columns in the dataframe: 
+{documentation}
+"""
+
+# Prompt used to generate several features in a single LLM call
+CODE_GEN_BATCH_PROMPT = PromptTemplate(
+    template=CODE_GEN_BATCH_TEMPLATE,
+    input_variables=["feature_requests", "documentation", "table_sample"],
+)
+
+
+CODE_REPAIR_TEMPLATE = """
+The python function below was generated to create a new feature from a pandas dataframe, but it failed validation. Fix it.
+
+User Request: {request}
+
+The function should strictly follow these format specifications:
+1. The function should be named {feature_name}.
+2. The function should have 1 input parameter called DF. DF is a Pandas Dataframe. 
+3. The function should return a dataframe with one column per new feature, containing its value for each row in the source data dataframe. This is a 1 column dataframe unless the request asks for several output columns. 
+4. Only output the corrected, raw, executable python code in a single ```python code block. Do not output any other leading or trailing text. 
+
+Previous code: 
+```python
+{previous_code}
+```
+
+What went wrong: 
+{failure_report}
+"""
+
+# Prompt used to repair a function from its validation failure
+CODE_REPAIR_PROMPT = PromptTemplate(
+    template=CODE_REPAIR_TEMPLATE,
+    input_variables=["feature_name", "request", "previous_code", "failure_report"],
+)
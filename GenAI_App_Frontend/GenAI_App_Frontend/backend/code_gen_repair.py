@@ -0,0 +1,198 @@
+import json
+import os
+import re
+import threading
+import time
+import traceback
+from collections import defaultdict, deque
+
+import pandas as pd
+
+
+# Failure classes reported by the code generation validation step
+FAILURE_NO_CODE = "no_code"
+FAILURE_LOAD_ERROR = "load_error"
+FAILURE_MISSING_FUNCTION = "missing_function"
+FAILURE_EXCEPTION = "exception"
+FAILURE_NULL_RATIO = "null_ratio"
+FAILURE_TIMEOUT = "timeout"
+FAILURE_RESOURCE_LIMIT = "resource_limit"
+
+# Where repair attempts are appended, one JSON object per line
+CODE_GEN_REPAIR_LOG_PATH = os.environ.get("CODE_GEN_REPAIR_LOG_PATH", "logs/codegen_repairs.jsonl")
+
+# Attempts kept in memory for summary(), the log file keeps all of them
+CODE_GEN_REPAIR_LOG_MAX_ENTRIES = 1000
+
+MAX_TRACEBACK_CHARS = 1500
+MAX_SAMPLE_ROWS = 3
+
+# What the sample rows of a failure record are
+SAMPLE_FIRST_ROWS = "first_rows"
+SAMPLE_NULL_ROWS = "null_rows"
+
+
+def trim_traceback(exc: BaseException, max_chars: int = MAX_TRACEBACK_CHARS) -> str:
+    """
+    Formats an exception's traceback, keeping only the frames from generated code.
+
+    Parameters:
+        exc (BaseException): The exception raised while loading or running the generated function.
+        max_chars (int): Maximum length of the returned traceback.
+
+    Returns:
+        str: The trimmed traceback.
+    """
+    frames = traceback.extract_tb(exc.__traceback__)
+    generated_frames = [frame for frame in frames if "generated" in frame.filename or frame.filename == "<string>"]
+
+    lines = traceback.format_list(generated_frames or frames[-2:])
+    lines += traceback.format_exception_only(type(exc), exc)
+    text = "".join(lines)
+
+    return text if len(text) <= max_chars else "..." + text[-max_chars:]
+
+
+def referenced_columns(code: str, columns) -> list:
+    """Returns the dataframe columns the code reads through DF['col'] or DF.col."""
+    names = set(re.findall(r"""\[\s*['"]([^'"]+)['"]\s*\]""", code))
+    names |= set(re.findall(r"\bDF\.([A-Za-z_][A-Za-z0-9_]*)", code))
+    return [column for column in columns if column in names]
+
+
+def failure_from_exception(exc: BaseException, failure_class: str = FAILURE_EXCEPTION, df: pd.DataFrame = None) -> dict:
+    """
+    Builds the failure record for an exception raised by the generated code.
+
+    The rows that raised are unknown, so the sample is the first rows of df.
+    """
+    failure = {
+        "failure_class": failure_class,
+        "exception_type": type(exc).__name__,
+        "message": str(exc),
+        "traceback": trim_traceback(exc),
+    }
+    if df is not None:
+        failure["sample_index"] = list(df.index[:MAX_SAMPLE_ROWS])
+        failure["sample_kind"] = SAMPLE_FIRST_ROWS
+    return failure
+
+
+def failure_from_nulls(result: pd.DataFrame, null_ratio: float, column: str = None) -> dict:
+    """Builds the failure record for a result with too many null values, in column if given or the first one."""
+    values = result[column] if column is not None else result.iloc[:, 0]
+    if isinstance(values, pd.DataFrame):
+        values = values.iloc[:, 0]  # Duplicate column names
+    null_rows = result.index[values.isnull()]
+    failure = {
+        "failure_class": FAILURE_NULL_RATIO,
+        "null_ratio": null_ratio,
+        "sample_index": list(null_rows[:MAX_SAMPLE_ROWS]),
+        "sample_kind": SAMPLE_NULL_ROWS,
+    }
+    if column is not None:
+        failure["column"] = str(column)
+    return failure
+
+
+def build_failure_report(failure: dict, code: str, df: pd.DataFrame) -> str:
+    """
+    Formats a failure record into a compact report for the repair prompt.
+
+    Parameters:
+        failure (dict): The failure record from the validation step.
+        code (str): The code that failed.
+        df (pd.DataFrame): The dataframe the function was run on.
+
+    Returns:
+        str: The failure report.
+    """
+    failure_class = failure["failure_class"]
+    lines = [f"Failure type: {failure_class}"]
+
+    if failure_class == FAILURE_NULL_RATIO:
+        returned = f"column `{failure['column']}`" if "column" in failure else "function"
+        lines.append(f"The {returned} returned {failure['null_ratio'] * 100:.1f}% null values. At most 80% are allowed.")
+    elif failure_class == FAILURE_MISSING_FUNCTION:
+        lines.append("The code ran, but it does not define a function with the required name.")
+    elif failure_class == FAILURE_TIMEOUT:
+        lines.append(f"The function did not finish within {failure['timeout']:.0f} seconds. Avoid row-by-row loops and "
+                     "backtracking regular expressions, use vectorized pandas operations.")
+    elif failure_class == FAILURE_RESOURCE_LIMIT and "exception_type" not in failure:
+        lines.append("The function exceeded its memory or CPU limit. Avoid building large intermediate objects.")
+    elif "exception_type" in failure:
+        # The trimmed traceback ends with the exception type and message
+        lines.append("Traceback:")
+        lines.append(failure["traceback"].rstrip())
+
+    sample_index = [index for index in failure.get("sample_index", []) if index in df.index]
+    if sample_index:
+        columns = referenced_columns(code, df.columns) or list(df.columns[:5])
+        rows = df.loc[sample_index, columns]
+        if failure.get("sample_kind") == SAMPLE_NULL_ROWS:
+            lines.append("Sample input rows for which the function returned null:")
+        else:
+            lines.append("First input rows of the dataframe (not necessarily the rows that failed):")
+        for _, row in rows.iterrows():
+            lines.append("{ " + ", ".join(f"{col}: {repr(val)}" for col, val in row.items()) + " }")
+
+    return "\n".join(lines)
+
+
+class CodeGenRepairLog:
+    """Records every code generation attempt so repair convergence rates can be measured."""
+
+    def __init__(self, path: str = CODE_GEN_REPAIR_LOG_PATH, max_entries: int = CODE_GEN_REPAIR_LOG_MAX_ENTRIES):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = deque(maxlen=max_entries)
+
+    def record(self, feature_name: str, attempt: int, mode: str, trigger: str = None, outcome: str = "success"):
+        """
+        Records one attempt.
+
+        Parameters:
+            feature_name (str): The feature being generated.
+            attempt (int): Zero based attempt number.
+            mode (str): 'generate' for a fresh generation, 'repair' for an error-feedback repair.
+            trigger (str): Failure class of the previous attempt that triggered this one.
+            outcome (str): 'success' or the failure class of this attempt.
+        """
+        entry = {
+            "timestamp": time.time(),
+            "feature_name": feature_name,
+            "attempt": attempt,
+            "mode": mode,
+            "trigger": trigger,
+            "outcome": outcome,
+        }
+
+        with self.lock:
+            self.entries.append(entry)
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(self.path, "a") as f:
+                    f.write(json.dumps(entry) + "\n")
+            except OSError as e:
+                print(f"Could not write code gen repair log: {e}")
+
+    def summary(self) -> dict:
+        """
+        Summarizes the most recent attempts recorded in this process.
+
+        Returns:
+            dict: Per trigger failure class, the number of repairs and how many of them succeeded.
+        """
+        summary = defaultdict(lambda: {"attempts": 0, "successes": 0})
+        with self.lock:
+            for entry in self.entries:
+                key = f"{entry['mode']}:{entry['trigger'] or 'initial'}"
+                summary[key]["attempts"] += 1
+                summary[key]["successes"] += entry["outcome"] == "success"
+
+        for stats in summary.values():
+            stats["success_rate"] = stats["successes"] / stats["attempts"]
+        return dict(summary)
+
+
+CODE_GEN_REPAIR_LOG = CodeGenRepairLog()
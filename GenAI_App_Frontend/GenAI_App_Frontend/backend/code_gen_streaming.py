@@ -0,0 +1,81 @@
+import os
+import re
+
+
+# Stream code generation responses instead of waiting for the full completion
+CODE_GEN_STREAMING = os.environ.get("CODE_GEN_STREAMING", "1") == "1"
+
+# How many times a response cut off inside a code block is continued before giving up
+MAX_CONTINUATIONS = 2
+
+CONTINUATION_PROMPT = (
+    "Your previous response was cut off in the middle of the code block. "
+    "Continue exactly where it stopped. Do not repeat anything and do not open a new code block."
+)
+
+CODE_FENCE = re.compile(r"^[ \t]*```", re.MULTILINE)
+
+
+def code_fence_state(text: str):
+    """
+    Counts the markdown code fences in a (possibly partial) response.
+
+    Parameters:
+        text (str): The response text received so far.
+
+    Returns:
+        tuple: (closed_blocks, is_open) where closed_blocks is the number of complete code
+               blocks and is_open is True if the last code block has not been closed yet.
+    """
+    fences = len(CODE_FENCE.findall(text))
+    return fences // 2, fences % 2 == 1
+
+
+def consume_code_stream(tokens, prefix: str = "", stop_after_blocks: int = 1, cancel_event=None):
+    """
+    Reads streamed tokens until enough code blocks have been closed or the stream ends.
+
+    Parameters:
+        tokens (iterable of str): The streamed response tokens.
+        prefix (str): Text already received from earlier (continued) requests.
+        stop_after_blocks (int): Stop reading once this many code blocks are closed, None reads everything.
+        cancel_event (threading.Event): Stop reading as soon as this is set, e.g. when a hedged request lost.
+
+    Returns:
+        tuple: (text, truncated) where text is the newly received text and truncated is True
+               if the stream ended inside an open code block.
+    """
+    text = ""
+    for token in tokens:
+        if cancel_event is not None and cancel_event.is_set():
+            print("Request cancelled, closing stream.")
+            return text, False
+        if not token:
+            continue
+        text += token
+
+        # Only re-scan for fences when this token could have completed one
+        if "`" not in token:
+            continue
+
+        closed_blocks, is_open = code_fence_state(join_continuation(prefix, text))
+        if stop_after_blocks and closed_blocks >= stop_after_blocks and not is_open:
+            print("Closing code fence received, stopping stream early.")
+            return text, False
+
+    _, is_open = code_fence_state(join_continuation(prefix, text))
+    return text, is_open
+
+
+def join_continuation(text: str, continuation: str) -> str:
+    """Appends a continuation to a truncated response, dropping a re-opened code fence."""
+    if not text:
+        return continuation
+
+    stripped = continuation.lstrip()
+    if stripped.startswith("```"):
+        # The model opened a new block instead of continuing the current one
+        newline = stripped.find("\n")
+        continuation = stripped[newline + 1:] if newline != -1 else ""
+
+    return text + continuation
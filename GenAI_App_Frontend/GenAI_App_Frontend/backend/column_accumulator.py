@@ -0,0 +1,88 @@
+import pandas as pd
+
+
+class ColumnAccumulator:
+    """
+    Collects feature output columns and builds the final dataframe with a single allocation.
+
+    Growing a frame with pd.concat per feature copies every earlier column again on each call, so
+    the cost grows with the square of the feature count. Here each result is only referenced when
+    added, and build() copies every column once into the final frame.
+
+    Columns that collide with a base column or with an earlier feature's column are dropped, the
+    first one wins. Results are aligned to the base index: a result with the same labels in a
+    different order is reordered, one with other labels is rejected instead of adding rows.
+    """
+
+    def __init__(self, df: pd.DataFrame, target_column: pd.Series = None):
+        """
+        Parameters:
+            df (pd.DataFrame): The base columns every feature was computed from.
+            target_column (pd.Series): Appended as the last column of the final frame, if given.
+        """
+        self.df = df
+        self.target_column = target_column
+        self.base_names = set(df.columns)
+        self.names = []
+        self.added_names = set()
+        self.frames = []
+        self.feature_names = []
+
+    def add(self, feature_name: str, result) -> bool:
+        """
+        Adds the columns of a feature result.
+
+        Returns:
+            bool: True if at least one column was added.
+        """
+        if result is None:
+            return False
+        if isinstance(result, pd.Series):
+            result = result.to_frame()
+
+        if not result.index.equals(self.df.index):
+            if len(result) != len(self.df) or not result.index.is_unique or not result.index.isin(self.df.index).all():
+                print(f"Discarding result of {feature_name}: its index doesn't match the dataset rows.")
+                return False
+            print(f"Reordering result of {feature_name} to the dataset row order.")
+            result = result.reindex(self.df.index)
+
+        kept = []
+        for position in range(result.shape[1]):
+            name = result.columns[position]
+            if name in self.base_names:
+                print(f"Removing duplicate column {name} of {feature_name}, the dataset already has it.")
+                continue
+            if name in self.added_names:
+                print(f"Removing duplicate column {name} of {feature_name}, an earlier feature already returned it.")
+                continue
+            self.names.append(name)
+            self.added_names.add(name)
+            kept.append(position)
+
+        if not kept:
+            return False
+        self.frames.append(result if len(kept) == result.shape[1] else result.iloc[:, kept])
+        self.feature_names.append(feature_name)
+        return True
+
+    def build(self):
+        """
+        Builds the final frame: base columns, feature columns, then the target column.
+
+        Returns:
+            tuple: (final_df, combined_results) where combined_results holds only the feature columns.
+        """
+        frames = [self.df] + self.frames
+        names = list(self.df.columns) + self.names
+        if self.target_column is not None:
+            frames.append(self.target_column.to_frame())
+            names.append(self.target_column.name)
+
+        # One concat of frames that already share the base index copies each block once
+        final_df = pd.concat(frames, axis=1, copy=True)
+        final_df.columns = pd.Index(names)
+
+        start = self.df.shape[1]
+        combined_results = final_df.iloc[:, start:start + len(self.names)]
+        return final_df, combined_results
@@ -0,0 +1,190 @@
+import difflib
+import math
+import os
+import re
+from collections import Counter
+
+import pandas as pd
+
+
+# Default number of columns sent to the LLM for a feature
+CONTEXT_TOP_K = 8
+
+# Default approximate token budget for the column documentation plus table sample
+CONTEXT_TOKEN_BUDGET = 2000
+
+# Column documentation in the all_docs.csv format (table_name, column_name, description)
+ALL_DOCS_PATH = "csvs/all_docs.csv"
+
+# Score added for a column that is named explicitly in the request
+COLUMN_MENTION_SCORE = 10.0
+
+# Similarity above which a request word counts as a (misspelled) mention of a column name
+FUZZY_MENTION_RATIO = 0.85
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "column", "columns", "create", "dataframe", "each",
+    "field", "for", "from", "function", "give", "if", "in", "is", "it", "me", "my", "new", "of", "on",
+    "or", "output", "outputs", "that", "the", "this", "to", "use", "value", "values", "when", "with",
+}
+
+
+def tokenize(text: str) -> list:
+    """Splits text into lowercase word tokens, breaking snake_case and camelCase identifiers apart."""
+    text = re.sub(r"([a-z])([A-Z])", r"\1 \2", str(text))
+    return [stem(token) for token in re.findall(r"[a-z0-9]+", text.lower()) if token not in STOPWORDS]
+
+
+def stem(token: str) -> str:
+    """Very light stemming so plurals match their singular form (miles -> mile)."""
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count used for budgeting, about 4 characters per token."""
+    return len(text) // 4 + 1
+
+
+def load_column_docs(path: str = ALL_DOCS_PATH, table: str = None) -> dict:
+    """
+    Loads column descriptions from an all_docs.csv style file.
+
+    Parameters:
+        path (str): Path to a csv with column_name and description columns.
+        table (str): Only keep rows for this table_name, if the file has that column.
+
+    Returns:
+        dict: Column name to description, empty if the file does not exist.
+    """
+    if not os.path.exists(path):
+        return {}
+
+    docs = pd.read_csv(path)
+    if table and "table_name" in docs.columns and (docs["table_name"] == table).any():
+        docs = docs[docs["table_name"] == table]
+
+    return dict(zip(docs["column_name"], docs["description"].fillna("")))
+
+
+class ColumnContextSelector:
+    """Scores columns against feature requests and picks the ones worth sending to the LLM."""
+
+    def __init__(self, df: pd.DataFrame, column_metadata: list, column_docs: dict = None,
+                 top_k: int = CONTEXT_TOP_K, token_budget: int = CONTEXT_TOKEN_BUDGET):
+        """
+        Parameters:
+            df (pd.DataFrame): The base dataframe (without the target column).
+            column_metadata (list of tuples): (column_name, data_type, comment) for each column.
+            column_docs (dict): Extra column descriptions, e.g. from load_column_docs.
+            top_k (int): Maximum number of columns selected.
+            token_budget (int): Approximate token budget for the selected columns' docs and samples.
+        """
+        self.df = df
+        self.column_metadata = [meta for meta in column_metadata if meta[0] in df.columns]
+        self.top_k = top_k
+        self.token_budget = token_budget
+
+        column_docs = column_docs or {}
+
+        # Lexical index: one document per column built from its name, type and descriptions
+        self.documents = {}
+        for column_name, data_type, comment in self.column_metadata:
+            text = f"{column_name} {data_type} {comment or ''} {column_docs.get(column_name, '')}"
+            self.documents[column_name] = Counter(tokenize(text))
+
+        self.document_frequency = Counter()
+        for terms in self.documents.values():
+            self.document_frequency.update(terms.keys())
+
+        lengths = [sum(terms.values()) for terms in self.documents.values()]
+        self.average_length = (sum(lengths) / len(lengths)) if lengths else 1.0
+
+        self.column_costs = {column_name: self.estimate_column_cost(column_name) for column_name, _, _ in self.column_metadata}
+
+    def estimate_column_cost(self, column_name: str) -> int:
+        """Approximate prompt tokens for one column's documentation and its values in the sample."""
+        sample = " ".join(f"{column_name}: {repr(val)}," for val in self.df[column_name].head(10))
+        return estimate_tokens(sample) + 30  # Documentation entry and separator
+
+    def bm25(self, query_terms: list, column_name: str, k1: float = 1.5, b: float = 0.75) -> float:
+        terms = self.documents[column_name]
+        length = sum(terms.values())
+        n = len(self.documents)
+
+        score = 0.0
+        for term in set(query_terms):
+            frequency = terms.get(term, 0)
+            if not frequency:
+                continue
+            idf = math.log(1 + (n - self.document_frequency[term] + 0.5) / (self.document_frequency[term] + 0.5))
+            score += idf * frequency * (k1 + 1) / (frequency + k1 * (1 - b + b * length / self.average_length))
+        return score
+
+    def score_columns(self, request: str) -> list:
+        """
+        Scores every column against a feature request.
+
+        Parameters:
+            request (str): The feature name and request text.
+
+        Returns:
+            list of tuples: (column_name, score) sorted from most to least relevant.
+        """
+        request_lower = request.lower()
+        query_terms = tokenize(request)
+        request_words = set(re.findall(r"[a-z0-9_]{4,}", request_lower))
+
+        scores = []
+        for column_name, _, _ in self.column_metadata:
+            score = self.bm25(query_terms, column_name)
+            name = column_name.lower()
+            if re.search(rf"(?<![a-z0-9_]){re.escape(name)}(?![a-z0-9_])", request_lower):
+                score += COLUMN_MENTION_SCORE
+            elif any(difflib.SequenceMatcher(None, word, name).ratio() >= FUZZY_MENTION_RATIO for word in request_words):
+                score += COLUMN_MENTION_SCORE / 2
+            scores.append((column_name, score))
+
+        return sorted(scores, key=lambda item: item[1], reverse=True)
+
+    def select_columns(self, requests: list) -> list:
+        """
+        Picks the most relevant columns for one or more feature requests within top_k and the token budget.
+
+        Falls back to every column when nothing in the requests matches, so the LLM is never left
+        without context.
+
+        Parameters:
+            requests (list of str): Feature requests sharing the same prompt.
+
+        Returns:
+            list of str: Selected column names, in dataframe order.
+        """
+        best = {}
+        for request in requests:
+            for column_name, score in self.score_columns(request):
+                best[column_name] = max(best.get(column_name, 0.0), score)
+
+        ranked = [column_name for column_name, score in sorted(best.items(), key=lambda item: item[1], reverse=True) if score > 0]
+        if not ranked:
+            return [column_name for column_name, _, _ in self.column_metadata]
+
+        selected = []
+        used = 0
+        for column_name in ranked:
+            if len(selected) >= self.top_k:
+                break
+            cost = self.column_costs[column_name]
+            if selected and used + cost > self.token_budget:
+                continue
+            selected.append(column_name)
+            used += cost
+
+        print(f"Selected {len(selected)} of {len(self.column_metadata)} columns for prompt context: {selected}")
+        return [column_name for column_name in self.df.columns if column_name in selected]
+
+    def select_metadata(self, requests: list) -> list:
+        """Same as select_columns, but returns the (column_name, data_type, comment) tuples."""
+        selected = set(self.select_columns(requests))
+        return [meta for meta in self.column_metadata if meta[0] in selected]
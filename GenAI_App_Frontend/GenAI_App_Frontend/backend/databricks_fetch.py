@@ -0,0 +1,89 @@
+import os
+
+import pandas as pd
+import pyarrow as pa
+
+
+# Rows requested per fetchmany_arrow call when loading a table from Databricks
+ARROW_FETCH_BATCH_ROWS = int(os.environ.get("ARROW_FETCH_BATCH_ROWS", "100000"))
+
+# Store string columns as Arrow-backed string[pyarrow] instead of boxed Python str objects
+ARROW_BACKED_STRINGS = os.environ.get("ARROW_BACKED_STRINGS", "1") == "1"
+
+
+def arrow_batches(cursor, batch_rows: int = ARROW_FETCH_BATCH_ROWS):
+    """
+    Yields the result of an executed query as Arrow tables of up to batch_rows rows.
+
+    Cursors without fetchmany_arrow fall back to fetchmany, converted to Arrow per batch.
+
+    Parameters:
+        cursor: A cursor after execute().
+        batch_rows (int): Rows per fetch.
+    """
+    columns = [desc[0] for desc in cursor.description]
+    if not hasattr(cursor, "fetchmany_arrow"):
+        while True:
+            rows = cursor.fetchmany(batch_rows)
+            if not rows:
+                return
+            yield pa.Table.from_pandas(pd.DataFrame(rows, columns=columns), preserve_index=False)
+
+    while True:
+        table = cursor.fetchmany_arrow(batch_rows)
+        if table.num_rows == 0:
+            return
+        yield table
+
+
+def arrow_to_pandas(table: pa.Table, string_dtype: bool = ARROW_BACKED_STRINGS) -> pd.DataFrame:
+    """
+    Converts an Arrow table to pandas without keeping both copies alive.
+
+    Every column becomes its own block so nothing is consolidated afterwards, and the Arrow
+    buffers of a column are released as soon as it is converted. Peak memory is the Arrow table
+    plus one column instead of both copies of the table.
+
+    Parameters:
+        table (pa.Table): The fetched rows. It can't be used after the call.
+        string_dtype (bool): Convert string columns to string[pyarrow] instead of object.
+
+    Returns:
+        pd.DataFrame: The rows with a RangeIndex.
+    """
+    types_mapper = None
+    if string_dtype:
+        arrow_string = pd.StringDtype("pyarrow")
+        types_mapper = {pa.string(): arrow_string, pa.large_string(): arrow_string}.get
+    return table.to_pandas(split_blocks=True, self_destruct=True, types_mapper=types_mapper)
+
+
+def fetch_arrow_table(cursor, batch_rows: int = ARROW_FETCH_BATCH_ROWS):
+    """
+    Fetches the whole result of an executed query as one Arrow table, the batches are not copied.
+
+    Returns:
+        pa.Table: The rows, or None if the query returned none.
+    """
+    tables = list(arrow_batches(cursor, batch_rows))
+    return pa.concat_tables(tables) if tables else None
+
+
+def fetch_dataframe(cursor, batch_rows: int = ARROW_FETCH_BATCH_ROWS) -> pd.DataFrame:
+    """
+    Fetches the whole result of an executed query into a dataframe through Arrow.
+
+    Returns:
+        pd.DataFrame: The rows, with the cursor's column names.
+    """
+    columns = [desc[0] for desc in cursor.description]
+    table = fetch_arrow_table(cursor, batch_rows)
+    if table is None:
+        return pd.DataFrame(columns=columns)
+    return arrow_to_pandas(table)
+
+
+def fetch_dataframe_batches(cursor, batch_rows: int = ARROW_FETCH_BATCH_ROWS):
+    """Yields the result of an executed query as dataframes of up to batch_rows rows, converted through Arrow."""
+    for table in arrow_batches(cursor, batch_rows):
+        yield arrow_to_pandas(table)
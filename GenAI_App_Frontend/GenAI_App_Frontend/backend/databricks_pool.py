@@ -0,0 +1,186 @@
+import atexit
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from databricks import sql
+
+
+# Idle connections kept per warehouse and token
+DATABRICKS_POOL_MAX_IDLE = int(os.environ.get("DATABRICKS_POOL_MAX_IDLE", "4"))
+
+# Seconds an idle connection is kept before it is closed
+DATABRICKS_POOL_IDLE_SECONDS = float(os.environ.get("DATABRICKS_POOL_IDLE_SECONDS", "600"))
+
+# Connections idle longer than this are checked with a query before they are reused
+DATABRICKS_POOL_HEALTH_CHECK_SECONDS = float(os.environ.get("DATABRICKS_POOL_HEALTH_CHECK_SECONDS", "30"))
+
+# Threads running blocking Databricks queries off the event loop
+DATABRICKS_IO_WORKERS = int(os.environ.get("DATABRICKS_IO_WORKERS", "8"))
+
+
+def pool_key(server_hostname: str, http_path: str, access_token: str) -> tuple:
+    """The pool key of a warehouse and token. The token is hashed so it isn't kept in the key."""
+    token_hash = hashlib.sha256((access_token or "").encode("utf-8")).hexdigest()
+    return server_hostname, http_path, token_hash
+
+
+def is_healthy(connection) -> bool:
+    """True if the connection is open and answers a trivial query."""
+    if not getattr(connection, "open", True):
+        return False
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+        return True
+    except Exception as e:
+        print(f"Dropping pooled Databricks connection that failed its health check: {e}")
+        return False
+
+
+class DatabricksConnectionPool:
+    """
+    Process-wide pool of Databricks SQL connections, keyed by (hostname, http_path, token).
+
+    Opening a session costs a round trip to the warehouse, so connections are returned to the pool
+    instead of closed. A checked out connection belongs to one caller until it is returned.
+    Connections idle for more than idle_seconds are closed, ones idle for more than
+    health_check_seconds are probed before reuse, and ones that raised are closed, not returned.
+    """
+
+    def __init__(self, connect=None, max_idle: int = DATABRICKS_POOL_MAX_IDLE,
+                 idle_seconds: float = DATABRICKS_POOL_IDLE_SECONDS,
+                 health_check_seconds: float = DATABRICKS_POOL_HEALTH_CHECK_SECONDS):
+        """
+        Parameters:
+            connect: Opens a connection, called with server_hostname, http_path and access_token.
+                     Defaults to databricks.sql.connect.
+            max_idle (int): Idle connections kept per key.
+            idle_seconds (float): Idle time after which a connection is closed.
+            health_check_seconds (float): Idle time after which a connection is probed before reuse.
+        """
+        self.connect = connect or sql.connect
+        self.max_idle = max_idle
+        self.idle_seconds = idle_seconds
+        self.health_check_seconds = health_check_seconds
+        self.lock = threading.Lock()
+        self.idle = {}  # key -> list of (returned_at, connection), most recently returned last
+        self.opened = 0
+        self.reused = 0
+        self.closed = 0
+
+    @contextmanager
+    def checkout(self, server_hostname: str, http_path: str, access_token: str):
+        """
+        Lends a connection to the warehouse for the duration of the with block.
+
+            with DATABRICKS_POOL.checkout(hostname, http_path, token) as connection:
+                with connection.cursor() as cursor:
+                    ...
+        """
+        key = pool_key(server_hostname, http_path, access_token)
+        connection = self.acquire(key)
+        if connection is None:
+            connection = self.connect(server_hostname=server_hostname, http_path=http_path, access_token=access_token)
+            with self.lock:
+                self.opened += 1
+
+        failed = False
+        try:
+            yield connection
+        except Exception:
+            failed = True
+            raise
+        finally:
+            # Also runs when a generator holding the connection is closed early
+            if failed:
+                self.close_connection(connection)
+            else:
+                self.release(key, connection)
+
+    def query(self, server_hostname: str, http_path: str, access_token: str, query: str, fetch=None):
+        """
+        Runs a query on a pooled connection and returns its result.
+
+        Parameters:
+            query (str): The SQL query.
+            fetch: Callable (cursor) -> result after execute, defaults to cursor.fetchall().
+        """
+        with self.checkout(server_hostname, http_path, access_token) as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(query)
+                return fetch(cursor) if fetch is not None else cursor.fetchall()
+
+    def acquire(self, key: tuple):
+        """Takes the most recently returned healthy connection for key, or None."""
+        self.evict_idle()
+        while True:
+            with self.lock:
+                entries = self.idle.get(key)
+                if not entries:
+                    return None
+                returned_at, connection = entries.pop()
+
+            idle_for = time.monotonic() - returned_at
+            if idle_for > self.health_check_seconds and not is_healthy(connection):
+                self.close_connection(connection)
+                continue
+            with self.lock:
+                self.reused += 1
+            return connection
+
+    def release(self, key: tuple, connection):
+        with self.lock:
+            entries = self.idle.setdefault(key, [])
+            if len(entries) < self.max_idle and getattr(connection, "open", True):
+                entries.append((time.monotonic(), connection))
+                return
+        self.close_connection(connection)
+
+    def evict_idle(self):
+        """Closes the connections that have been idle for longer than idle_seconds."""
+        cutoff = time.monotonic() - self.idle_seconds
+        expired = []
+        with self.lock:
+            for key, entries in self.idle.items():
+                expired.extend(connection for returned_at, connection in entries if returned_at < cutoff)
+                entries[:] = [entry for entry in entries if entry[0] >= cutoff]
+        for connection in expired:
+            self.close_connection(connection)
+
+    def close_connection(self, connection):
+        try:
+            connection.close()
+        except Exception as e:
+            print(f"Error closing Databricks connection: {e}")
+        with self.lock:
+            self.closed += 1
+
+    def close_all(self):
+        """Closes every idle connection."""
+        with self.lock:
+            connections = [connection for entries in self.idle.values() for _, connection in entries]
+            self.idle = {}
+        for connection in connections:
+            self.close_connection(connection)
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                "opened": self.opened,
+                "reused": self.reused,
+                "closed": self.closed,
+                "idle": sum(len(entries) for entries in self.idle.values()),
+            }
+
+
+# Databricks connections shared by every session of this process
+DATABRICKS_POOL = DatabricksConnectionPool()
+atexit.register(DATABRICKS_POOL.close_all)
+
+# Async handlers hand their Databricks queries to these threads with loop.run_in_executor
+DATABRICKS_IO_EXECUTOR = ThreadPoolExecutor(max_workers=DATABRICKS_IO_WORKERS, thread_name_prefix="databricks-io")
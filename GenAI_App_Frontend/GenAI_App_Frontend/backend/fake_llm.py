@@ -0,0 +1,240 @@
+"""
+Offline stand-in for the LLM providers.
+
+FakeLLMProvider has the same complete/stream interface as LLMProvider and can:
+- replay responses from a cassette file recorded earlier against the real providers,
+- record real responses into a cassette while passing the calls through,
+- synthesize a deterministic, vectorized function for every requested feature,
+with configurable latency and failure injection. install_llm_provider points every V2/V3 code
+generation chain at it.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+
+
+FAKE_LLM_MODE_SYNTHETIC = "synthetic"
+FAKE_LLM_MODE_REPLAY = "replay"
+FAKE_LLM_MODE_RECORD = "record"
+
+CASSETTE_VERSION = 1
+
+FUNCTION_NAME_PATTERN = re.compile(r"function should be named\s+`?([A-Za-z_][A-Za-z0-9_]*)")
+FEATURE_NAME_PATTERN = re.compile(r"Feature Name:\s*([A-Za-z_][A-Za-z0-9_]*)")
+QUOTED_COLUMN_PATTERN = re.compile(r"`([A-Za-z_][A-Za-z0-9_]*)`")
+OUTPUT_COLUMNS_PATTERN = re.compile(r"named exactly:\s*([A-Za-z0-9_, ]+)")
+
+
+class FakeLLMError(Exception):
+    """Injected provider failure."""
+
+
+def cassette_key(messages: list, model: str) -> str:
+    """Content-addressed key of a request, independent of sampling parameters."""
+    payload = json.dumps({"model": model, "messages": messages}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def requested_feature_names(prompt: str) -> list:
+    """Feature names asked for in a single, batched or repair prompt, in order."""
+    names = FUNCTION_NAME_PATTERN.findall(prompt) + FEATURE_NAME_PATTERN.findall(prompt)
+    return list(dict.fromkeys(names)) or ["generated_feature"]
+
+
+def synthetic_code_response(prompt: str) -> str:
+    """
+    Builds a deterministic response with one valid function per requested feature.
+
+    Each function derives its value from the first backticked column in the request that is not
+    the feature name itself, or from the first column of the dataframe, using vectorized pandas
+    so execution cost scales like a typical generated function. A request for several named output
+    columns gets one function returning all of them.
+    """
+    blocks = []
+    outputs = OUTPUT_COLUMNS_PATTERN.search(prompt)
+    for name in requested_feature_names(prompt):
+        output_names = [output.strip() for output in outputs.group(1).split(",")] if outputs else [name]
+        columns = [column for column in QUOTED_COLUMN_PATTERN.findall(prompt) if column not in [name] + output_names]
+        source = f"DF[{columns[0]!r}] if {columns[0]!r} in DF.columns else DF.iloc[:, 0]" if columns else "DF.iloc[:, 0]"
+        values = ", ".join(f"'{output}': lengths + {offset}" for offset, output in enumerate(output_names))
+        blocks.append(
+            "```python\n"
+            f"# feature: {name}\n"
+            "import pandas as pd\n\n"
+            f"def {name}(DF):\n"
+            f"    source = {source}\n"
+            "    lengths = source.astype(str).str.len()\n"
+            f"    return pd.DataFrame({{{values}}}, index=DF.index)\n"
+            "```\n"
+        )
+    return "\n".join(blocks)
+
+
+class FakeLLMProvider:
+    """In-process provider with record/replay cassettes and latency/failure injection."""
+
+    def __init__(self, mode: str = FAKE_LLM_MODE_SYNTHETIC, cassette_path: str = None, upstream=None,
+                 latency: float = 0.0, token_delay: float = 0.0, failure_rate: float = 0.0,
+                 fallback_to_synthetic: bool = True):
+        """
+        Parameters:
+            mode (str): FAKE_LLM_MODE_SYNTHETIC, FAKE_LLM_MODE_REPLAY or FAKE_LLM_MODE_RECORD.
+            cassette_path (str): JSON cassette read in replay mode and written in record mode.
+            upstream (LLMProvider or dict): Real provider the calls are passed to in record mode, or a
+                                            dict of model name to provider with "*" as the default.
+            latency (float): Seconds before the response (or first token) is returned.
+            token_delay (float): Extra seconds between streamed tokens.
+            failure_rate (float): Fraction of calls that raise FakeLLMError, spread evenly.
+            fallback_to_synthetic (bool): In replay mode, synthesize a response for requests that
+                                          are not in the cassette instead of raising.
+        """
+        if mode == FAKE_LLM_MODE_RECORD and upstream is None:
+            raise ValueError("Record mode needs an upstream provider.")
+
+        self.mode = mode
+        self.cassette_path = cassette_path
+        self.upstream = upstream
+        self.latency = latency
+        self.token_delay = token_delay
+        self.failure_rate = failure_rate
+        self.fallback_to_synthetic = fallback_to_synthetic
+
+        self.interactions = {}
+        self.calls = Counter()
+        self.replay_misses = 0
+        self.failures = 0
+        self.lock = threading.Lock()
+
+        if cassette_path and mode == FAKE_LLM_MODE_REPLAY:
+            self.load_cassette(cassette_path)
+
+    def load_cassette(self, path: str):
+        with open(path, "r") as f:
+            cassette = json.load(f)
+        self.interactions = {interaction["key"]: interaction for interaction in cassette.get("interactions", [])}
+        print(f"Loaded {len(self.interactions)} recorded LLM responses from {path}")
+
+    def save_cassette(self, path: str = None):
+        """Writes every recorded interaction to the cassette file."""
+        path = path or self.cassette_path
+        if not path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self.lock:
+            interactions = list(self.interactions.values())
+        with open(path, "w") as f:
+            json.dump({"version": CASSETTE_VERSION, "interactions": interactions}, f, indent=2)
+        print(f"Saved {len(interactions)} LLM responses to {path}")
+
+    def upstream_for(self, model: str):
+        if isinstance(self.upstream, dict):
+            return self.upstream.get(model, self.upstream.get("*"))
+        return self.upstream
+
+    def next_call_fails(self) -> bool:
+        total = sum(self.calls.values())
+        if self.failure_rate <= 0:
+            return False
+        return int(total * self.failure_rate) > int((total - 1) * self.failure_rate)
+
+    def respond(self, messages: list, model: str, cancel_event=None, **params) -> str:
+        """The response content, empty if cancel_event is set during the injected latency."""
+        with self.lock:
+            self.calls[model] += 1
+            fails = self.next_call_fails()
+            if fails:
+                self.failures += 1
+
+        if cancel_event is not None:
+            if cancel_event.wait(self.latency):
+                return ""  # Like LLMProvider.complete, a cancelled request returns nothing
+        else:
+            time.sleep(self.latency)
+        if fails:
+            raise FakeLLMError(f"Injected failure for model {model}")
+
+        key = cassette_key(messages, model)
+        if self.mode == FAKE_LLM_MODE_RECORD:
+            content = self.upstream_for(model).complete(messages, model=model, cancel_event=cancel_event, **params)
+            with self.lock:
+                self.interactions[key] = {"key": key, "model": model, "messages": messages, "content": content}
+            return content
+
+        if self.mode == FAKE_LLM_MODE_REPLAY:
+            interaction = self.interactions.get(key)
+            if interaction is not None:
+                return interaction["content"]
+            with self.lock:
+                self.replay_misses += 1
+            if not self.fallback_to_synthetic:
+                raise FakeLLMError(f"No recorded response for this {model} request")
+
+        prompt = "\n".join(str(message.get("content", "")) for message in messages)
+        return synthetic_code_response(prompt)
+
+    def complete(self, messages: list, model: str, cancel_event=None, **params) -> str:
+        return self.respond(messages, model, cancel_event, **params)
+
+    def stream(self, messages: list, model: str, cancel_event=None, **params):
+        content = self.respond(messages, model, cancel_event, **params)
+        for token in re.findall(r"\S*\s*", content):
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            if not token:
+                continue
+            if self.token_delay:
+                if cancel_event is not None:
+                    if cancel_event.wait(self.token_delay):
+                        return
+                else:
+                    time.sleep(self.token_delay)
+            yield token
+
+    def call_count(self) -> int:
+        return sum(self.calls.values())
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                "mode": self.mode,
+                "calls": dict(self.calls),
+                "failures": self.failures,
+                "replay_misses": self.replay_misses,
+            }
+
+
+def code_gen_chains() -> list:
+    """Every V2 and V3 chain that sends requests through a provider."""
+    from . import feature_code_gen_v2, feature_code_gen_v3
+
+    return [
+        feature_code_gen_v2.CODE_GEN_CHAIN_V2,
+        feature_code_gen_v2.CODE_GEN_BATCH_CHAIN_V2,
+        feature_code_gen_v2.CODE_REPAIR_CHAIN_V2,
+        feature_code_gen_v3.CODE_GEN_CHAIN_V3,
+        feature_code_gen_v3.CODE_GEN_BATCH_CHAIN_V3,
+        feature_code_gen_v3.CODE_REPAIR_CHAIN_V3,
+    ]
+
+
+def install_llm_provider(provider) -> list:
+    """
+    Points every code generation chain at provider.
+
+    Returns:
+        list: The previous providers, pass them to restore_llm_providers to undo.
+    """
+    chains = code_gen_chains()
+    previous = [chain.provider for chain in chains]
+    for chain in chains:
+        chain.provider = provider
+    return previous
+
+
+def restore_llm_providers(previous: list):
+    for chain, provider in zip(code_gen_chains(), previous):
+        chain.provider = provider
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import threading
+import weakref
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+# Directory the computed feature columns are written to
+FEATURE_CACHE_DIR = os.environ.get("FEATURE_CACHE_DIR", ".feature_cache")
+
+# Total size of the cached feature columns on disk before the least recently used are evicted
+FEATURE_CACHE_MAX_BYTES = int(os.environ.get("FEATURE_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+
+
+def dataset_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Hashes a dataframe's contents: columns, dtypes, index and every value.
+
+    Returns:
+        str: A sha256 hex digest, equal for dataframes with equal data.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps([str(column) for column in df.columns]).encode("utf-8"))
+    digest.update(json.dumps([str(dtype) for dtype in df.dtypes]).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df.index, index=False).to_numpy().tobytes())
+    for position in range(df.shape[1]):
+        column = df.iloc[:, position]
+        try:
+            hashed = pd.util.hash_pandas_object(column, index=False)
+        except TypeError:  # Unhashable values such as lists
+            hashed = pd.util.hash_pandas_object(column.astype(str), index=False)
+        digest.update(hashed.to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def feature_cache_key(fingerprint: str, imputation_plan: dict, source_hash: str, function_name: str,
+                      upstream_keys=()) -> str:
+    """
+    Builds the cache key of a feature column.
+
+    Parameters:
+        fingerprint (str): The dataset fingerprint, see FeatureColumnCache.fingerprint.
+        imputation_plan (dict): The null imputation choices applied to the dataset.
+        source_hash (str): The hash of the feature's generated code.
+        function_name (str): The feature function, fused features share their code.
+        upstream_keys: Keys of the features whose columns are part of the feature's input.
+
+    Returns:
+        str: A sha256 hex digest.
+    """
+    plan = json.dumps(imputation_plan or {}, sort_keys=True, default=str)
+    parts = [fingerprint, plan, source_hash, function_name] + sorted(upstream_keys)
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+class FeatureColumnCache:
+    """
+    On-disk cache of computed feature columns, one Parquet file per feature result.
+
+    A feature is only recomputed when the dataset, the imputation plan or its code changed since
+    its column was cached. Eviction is least-recently-used, bounded by the total size on disk.
+    """
+
+    def __init__(self, cache_dir: str = FEATURE_CACHE_DIR, max_bytes: int = FEATURE_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.fingerprints = {}  # id(df) -> (weakref to df, extra, fingerprint)
+        self.hits = 0
+        self.misses = 0
+
+    def entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.parquet")
+
+    def fingerprint(self, df: pd.DataFrame, extra: str = "") -> str:
+        """
+        dataset_fingerprint of df combined with extra, computed once per dataframe object.
+
+        The dataframe is assumed not to change in place between calls, except through the
+        imputation plan, which is part of every key.
+        """
+        with self.lock:
+            entry = self.fingerprints.get(id(df))
+            if entry is not None and entry[0]() is df and entry[1] == extra:
+                return entry[2]
+
+        fingerprint = hashlib.sha256(f"{dataset_fingerprint(df)}\n{extra}".encode("utf-8")).hexdigest()
+        with self.lock:
+            self.fingerprints = {i: e for i, e in self.fingerprints.items() if e[0]() is not None}
+            self.fingerprints[id(df)] = (weakref.ref(df), extra, fingerprint)
+        return fingerprint
+
+    def get(self, key: str):
+        """Returns the cached feature result for key, or None on a miss."""
+        path = self.entry_path(key)
+        try:
+            result = pq.read_table(path).to_pandas()
+        except (FileNotFoundError, OSError, pa.ArrowException):
+            with self.lock:
+                self.misses += 1
+            return None
+
+        # Touch the entry so eviction is least-recently-used rather than oldest-written
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        with self.lock:
+            self.hits += 1
+        return result
+
+    def put(self, key: str, result: pd.DataFrame):
+        """Stores a feature result, evicting old entries if needed. Results Arrow can't store are skipped."""
+        if result is None:
+            return
+        try:
+            table = pa.Table.from_pandas(result)
+        except (pa.ArrowException, TypeError, ValueError) as e:
+            print(f"Feature columns {result.columns.tolist()} can't be cached: {e}")
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.entry_path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+
+        self.evict()
+
+    def clear(self):
+        """Removes every cached feature column."""
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".parquet"):
+                os.remove(os.path.join(self.cache_dir, name))
+
+    def evict(self):
+        """Deletes the least recently used entries until the cache fits in max_bytes."""
+        with self.lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith(".parquet"):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+# Feature columns shared by every run of this process
+FEATURE_COLUMN_CACHE = FeatureColumnCache()
@@ -1,15 +1,22 @@
 from operator import itemgetter
 import pandas as pd
 from langchain.pydantic_v1 import BaseModel, Field
-from langchain.chat_models import ChatOpenAI  # Changed from ChatOllama to ChatOpenAI
 from langchain.prompts import PromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from langchain.callbacks.manager import CallbackManager
 from langchain_core.runnables import RunnableLambda
 from langchain.callbacks.streaming_stdout_final_only import FinalStreamingStdOutCallbackHandler
+from langchain_core.messages import AIMessage, HumanMessage
 import os
 from dotenv import load_dotenv
-from openai import OpenAI
+
+from .code_gen_cache import CODE_GEN_CACHE
+from .code_gen_prompts import CODE_GEN_BATCH_PROMPT, CODE_REPAIR_PROMPT
+from .llm_providers import OPENAI_PROVIDER
+from .model_router import recorded_llm_call
+from .code_gen_streaming import (
+    CODE_GEN_STREAMING, MAX_CONTINUATIONS, CONTINUATION_PROMPT, consume_code_stream, join_continuation,
+)
 
 load_dotenv()
 
@@ -31,7 +38,7 @@ User Request: {request}
 The function should strictly follow these format specifications:
 1. The function should be named {feature_name}.
 2. The function should have 1 input parameter called DF. DF is a Pandas Dataframe. This is the dataframe you will use to create the new feature. 
-3. The function should return a 1 column dataframe, containing the value of the new feature for each row in the source data dataframe. 
+3. The function should return a dataframe with one column per new feature, containing its value for each row in the source data dataframe. This is a 1 column dataframe unless the request asks for several output columns. 
 4. Only output raw, executable python code. Do not output any other leading or trailing text. 
 
 Your code should follow these guidelines:
@@ -54,30 +61,100 @@ CODE_GEN_PROMPT = PromptTemplate(
     input_variables=["feature_name", "request", "documentation", "table_sample"],
 )
 
-# Set up the coding expert model using OpenAI API
-CODE_GEN_MODEL = ChatOpenAI(
-    model="gpt-4o-mini",  # Specify the OpenAI model, e.g., "gpt-4" or "gpt-3.5-turbo"
-    callback_manager=CallbackManager([FinalStreamingStdOutCallbackHandler()]),
-    temperature=0,
+
+CODE_GEN_MODEL_NAME = "gpt-4o-mini"
+
+# Sampling settings for every V2 request
+CODE_GEN_TEMPERATURE = 0
+
+
+class CachedCodeGenChain:
+    """Sends a code generation prompt through the shared OpenAI provider, with the on-disk response cache."""
+
+    def __init__(self, prompt_template, model, provider=OPENAI_PROVIDER, stream=CODE_GEN_STREAMING, stop_after_blocks=1):
+        self.prompt_template = prompt_template
+        self.model = model
+        self.provider = provider
+        self.stream = stream
+        self.stop_after_blocks = stop_after_blocks
+
+    def invoke(self, inputs, bypass_cache=False, cancel_event=None):
+        prompt = self.prompt_template.format(**inputs)
+
+        if not bypass_cache:
+            content = CODE_GEN_CACHE.get(prompt, self.model)
+            if content is not None:
+                return AIMessage(content=content)
+
+        if self.stream:
+            output = self.stream_response(prompt, cancel_event=cancel_event)
+        else:
+            with recorded_llm_call(self.model, cancel_event):
+                content = self.provider.complete(
+                    [{"role": "user", "content": prompt}], model=self.model, temperature=CODE_GEN_TEMPERATURE,
+                    cancel_event=cancel_event,
+                )
+            output = AIMessage(content=content)
+
+        # A cancelled response is incomplete, and a retry or repair must not replace the cached first attempt
+        if not bypass_cache and (cancel_event is None or not cancel_event.is_set()):
+            CODE_GEN_CACHE.put(prompt, self.model, output.content)
+        return output
+
+    def stream_response(self, prompt, cancel_event=None):
+        """
+        Streams the response, stopping at the closing code fence and continuing truncated code blocks.
+        """
+        messages = [{"role": "user", "content": prompt}]
+        text = ""
+
+        for attempt in range(MAX_CONTINUATIONS + 1):
+            with recorded_llm_call(self.model, cancel_event):
+                tokens = self.provider.stream(
+                    messages, model=self.model, temperature=CODE_GEN_TEMPERATURE, cancel_event=cancel_event
+                )
+                try:
+                    piece, truncated = consume_code_stream(
+                        tokens, prefix=text, stop_after_blocks=self.stop_after_blocks, cancel_event=cancel_event
+                    )
+                finally:
+                    tokens.close()  # Closes the underlying request if we stopped early
+
+            text = join_continuation(text, piece)
+            if not truncated or (cancel_event is not None and cancel_event.is_set()):
+                break
+
+            print(f"Response truncated inside a code block, requesting continuation {attempt + 1}...")
+            messages = [
+                {"role": "user", "content": prompt},
+                {"role": "assistant", "content": text},
+                {"role": "user", "content": CONTINUATION_PROMPT},
+            ]
+
+        return AIMessage(content=text)
+
+    def invalidate(self, inputs):
+        """Drops the cached response for these inputs, e.g. after it failed validation."""
+        CODE_GEN_CACHE.invalidate(self.prompt_template.format(**inputs), self.model)
+
+
+CODE_GEN_CHAIN_V2 = CachedCodeGenChain(
+    prompt_template=CODE_GEN_PROMPT,
+    model=CODE_GEN_MODEL_NAME,
 )
 
 
+CODE_GEN_BATCH_CHAIN_V2 = CachedCodeGenChain(
+    prompt_template=CODE_GEN_BATCH_PROMPT,
+    model=CODE_GEN_MODEL_NAME,
+    stop_after_blocks=None,
+)
 
 
-CODE_GEN_CHAIN_V2 = (
-    {
-        "feature_name": itemgetter("feature_name"),
-        "request": itemgetter("request"), 
-        "documentation": itemgetter("documentation"),
-        "table_sample": itemgetter("table_sample"),
-    }
-    | CODE_GEN_PROMPT
-    | CODE_GEN_MODEL
+CODE_REPAIR_CHAIN_V2 = CachedCodeGenChain(
+    prompt_template=CODE_REPAIR_PROMPT,
+    model=CODE_GEN_MODEL_NAME,
 )
 
 
 # print("FINSIHED")
-
-
-
-
@@ -95,19 +95,21 @@ from langchain.callbacks.manager import CallbackManager
 from langchain.callbacks.streaming_stdout_final_only import FinalStreamingStdOutCallbackHandler
 import os
 from dotenv import load_dotenv
-from openai import OpenAI  # Databricks API client setup
 
-load_dotenv()
+from .code_gen_cache import CODE_GEN_CACHE
+from .code_gen_prompts import CODE_GEN_BATCH_PROMPT, CODE_REPAIR_PROMPT
+from .code_gen_streaming import (
+    CODE_GEN_STREAMING, MAX_CONTINUATIONS, CONTINUATION_PROMPT, consume_code_stream, join_continuation,
+)
 
-# Databricks token and endpoint
-DATABRICKS_TOKEN = os.environ.get("DATABRICKS_TOKEN")
-DATABRICKS_ENDPOINT = "https://dbc-bfc39191-ad8d.cloud.databricks.com/serving-endpoints"
+from .llm_providers import DATABRICKS_PROVIDER, DATABRICKS_TOKEN, DATABRICKS_ENDPOINT
+from .model_router import recorded_llm_call
 
-# Initialize the Databricks OpenAI client
-databricks_client = OpenAI(
-    api_key=DATABRICKS_TOKEN,
-    base_url=DATABRICKS_ENDPOINT
-)
+load_dotenv()
+
+# Output token limit for a single feature function. Streaming stops at the closing code
+# fence, so a generous limit costs nothing when the function is short.
+CODE_GEN_MAX_TOKENS = 1024
 
 # Code generation template
 CODE_GEN_TEMPLATE = """
@@ -124,7 +126,7 @@ User Request: {request}
 The function should strictly follow these format specifications:
 1. The function should be named {feature_name}.
 2. The function should have 1 input parameter called DF. DF is a Pandas Dataframe. This is the dataframe you will use to create the new feature. 
-3. The function should return a 1 column dataframe, containing the value of the new feature for each row in the source data dataframe. 
+3. The function should return a dataframe with one column per new feature, containing its value for each row in the source data dataframe. This is a 1 column dataframe unless the request asks for several output columns. 
 4. Only output raw, executable python code. Do not output any other leading or trailing text. 
 
 Your code should follow these guidelines:
@@ -146,28 +148,108 @@ CODE_GEN_PROMPT = PromptTemplate(
 )
 
 # Define a function to make requests to Databricks' model endpoint
-def call_databricks_model(prompt: str, model: str):
-    response = databricks_client.chat.completions.create(
-        messages=[
-            {"role": "system", "content": "You are an AI assistant"},
-            {"role": "user", "content": prompt}
-        ],
-        model=model,
-        max_tokens=256
-    )
-    return response.choices[0].message.content
+def call_databricks_model(prompt: str, model: str, max_tokens: int = CODE_GEN_MAX_TOKENS, provider=DATABRICKS_PROVIDER,
+                          cancel_event=None):
+    with recorded_llm_call(model, cancel_event):
+        return provider.complete(
+            messages=[
+                {"role": "system", "content": "You are an AI assistant"},
+                {"role": "user", "content": prompt}
+            ],
+            model=model,
+            max_tokens=max_tokens,
+            cancel_event=cancel_event
+        )
+
+
+def stream_databricks_model(prompt: str, model: str, max_tokens: int = CODE_GEN_MAX_TOKENS, stop_after_blocks: int = 1,
+                            cancel_event=None, provider=DATABRICKS_PROVIDER):
+    """
+    Streams a response from Databricks' model endpoint, stopping once the code is complete.
+
+    The request is closed as soon as stop_after_blocks code blocks have been received. If the
+    stream ends inside an open code block (the response was truncated), a continuation is
+    requested instead of starting the whole generation again.
+
+    Parameters:
+        prompt (str): The rendered prompt.
+        model (str): The Databricks serving endpoint.
+        max_tokens (int): Output token limit for each request.
+        stop_after_blocks (int): Number of code blocks to wait for, None reads the full response.
+        cancel_event (threading.Event): Closes the request as soon as it is set.
+        provider (LLMProvider): Provider the request is sent through.
+
+    Returns:
+        str: The response text.
+    """
+    messages = [
+        {"role": "system", "content": "You are an AI assistant"},
+        {"role": "user", "content": prompt}
+    ]
+    text = ""
+
+    for attempt in range(MAX_CONTINUATIONS + 1):
+        with recorded_llm_call(model, cancel_event):
+            tokens = provider.stream(messages=messages, model=model, max_tokens=max_tokens, cancel_event=cancel_event)
+            try:
+                piece, truncated = consume_code_stream(
+                    tokens, prefix=text, stop_after_blocks=stop_after_blocks, cancel_event=cancel_event
+                )
+            finally:
+                tokens.close()  # Cancels the request if we stopped early
+
+        text = join_continuation(text, piece)
+        if not truncated or (cancel_event is not None and cancel_event.is_set()):
+            break
+
+        print(f"Response truncated inside a code block, requesting continuation {attempt + 1}...")
+        messages = messages[:2] + [
+            {"role": "assistant", "content": text},
+            {"role": "user", "content": CONTINUATION_PROMPT}
+        ]
+
+    return text
 
 # Define the chain with the Databricks call
 class DatabricksCodeGenChain:
-    def __init__(self, prompt_template, model="databricks-meta-llama-3-1-70b-instruct"):
+    def __init__(self, prompt_template, model="databricks-meta-llama-3-1-70b-instruct", max_tokens=CODE_GEN_MAX_TOKENS,
+                 stream=CODE_GEN_STREAMING, stop_after_blocks=1, provider=DATABRICKS_PROVIDER):
         self.prompt_template = prompt_template
         self.default_model = model
+        self.max_tokens = max_tokens
+        self.stream = stream
+        self.stop_after_blocks = stop_after_blocks
+        self.provider = provider
 
-    def invoke(self, inputs, model=None):
+    def invoke(self, inputs, model=None, bypass_cache=False, cancel_event=None):
         # Use the provided model or fall back to the default model
         model_to_use = model if model else self.default_model
         prompt = self.prompt_template.format(**inputs)
-        return call_databricks_model(prompt, model_to_use)
+
+        if not bypass_cache:
+            content = CODE_GEN_CACHE.get(prompt, model_to_use)
+            if content is not None:
+                return content
+
+        if self.stream:
+            content = stream_databricks_model(
+                prompt, model_to_use, max_tokens=self.max_tokens, stop_after_blocks=self.stop_after_blocks,
+                cancel_event=cancel_event, provider=self.provider
+            )
+        else:
+            content = call_databricks_model(
+                prompt, model_to_use, max_tokens=self.max_tokens, provider=self.provider, cancel_event=cancel_event
+            )
+
+        # A cancelled response is incomplete, and a retry or repair must not replace the cached first attempt
+        if not bypass_cache and (cancel_event is None or not cancel_event.is_set()):
+            CODE_GEN_CACHE.put(prompt, model_to_use, content)
+        return content
+
+    def invalidate(self, inputs, model=None):
+        """Drops the cached response for these inputs, e.g. after it failed validation."""
+        model_to_use = model if model else self.default_model
+        CODE_GEN_CACHE.invalidate(self.prompt_template.format(**inputs), model_to_use)
 
 # Initialize the Databricks chain with the default model
 CODE_GEN_CHAIN_V3 = DatabricksCodeGenChain(
@@ -175,5 +257,16 @@ CODE_GEN_CHAIN_V3 = DatabricksCodeGenChain(
     model="databricks-meta-llama-3-1-70b-instruct"
 )
 
+# Batched chain, the token limit leaves room for several functions in one response
+CODE_GEN_BATCH_CHAIN_V3 = DatabricksCodeGenChain(
+    prompt_template=CODE_GEN_BATCH_PROMPT,
+    model="databricks-meta-llama-3-1-70b-instruct",
+    max_tokens=2048,
+    stop_after_blocks=None
+)
 
-
+# Repair chain, fixes a function from its validation failure
+CODE_REPAIR_CHAIN_V3 = DatabricksCodeGenChain(
+    prompt_template=CODE_REPAIR_PROMPT,
+    model="databricks-meta-llama-3-1-70b-instruct"
+)
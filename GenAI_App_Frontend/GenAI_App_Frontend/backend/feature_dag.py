@@ -0,0 +1,274 @@
+import ast
+import concurrent.futures
+import os
+
+import pandas as pd
+
+from .memoized_execution import column_names, frame_parameter
+
+
+# Feature functions executed at the same time when their inputs are ready
+FEATURE_DAG_MAX_WORKERS = int(os.environ.get("FEATURE_DAG_MAX_WORKERS", "4"))
+
+
+class FeatureDependencyCycle(ValueError):
+    """Raised when features read each other's outputs in a loop."""
+
+    def __init__(self, cycle: list):
+        self.cycle = cycle
+        super().__init__("Feature dependency cycle: " + " -> ".join(cycle + cycle[:1]))
+
+
+def module_functions(tree: ast.Module) -> dict:
+    return {node.name: node for node in tree.body if isinstance(node, ast.FunctionDef)}
+
+
+def function_columns(function: ast.FunctionDef):
+    """
+    Columns one function reads from and writes to its dataframe parameter, and the module-level
+    functions it passes the dataframe to.
+
+    Statements are scanned in order, columns a function writes before reading them are
+    intermediate values, not inputs.
+    """
+    frame = frame_parameter(function)
+    reads, writes, calls = [], set(), set()
+    if frame is None:
+        return reads, writes, calls
+
+    for statement in function.body:
+        statement_writes = set()
+        for node in ast.walk(statement):
+            if isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name) and node.value.id == frame:
+                names = column_names(node.slice) or []
+                if isinstance(node.ctx, ast.Store):
+                    statement_writes.update(names)
+                else:
+                    reads.extend(name for name in names if name not in writes)
+            elif isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == frame:
+                if isinstance(node.ctx, ast.Load) and not hasattr(pd.DataFrame, node.attr):
+                    reads.append(node.attr)  # DF.column attribute access
+            elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+                if any(isinstance(arg, ast.Name) and arg.id == frame for arg in node.args):
+                    calls.add(node.func.id)
+        writes |= statement_writes  # The right-hand side of an assignment is evaluated first
+
+    return reads, writes, calls
+
+
+def returned_columns(function: ast.FunctionDef) -> set:
+    """
+    Columns a function creates and returns: dict keys in return statements, as in
+    pd.DataFrame({'a': ...}), and columns assigned to any frame then selected in the return.
+    """
+    assigned = set()
+    for node in ast.walk(function):
+        if isinstance(node, ast.Subscript) and isinstance(node.ctx, ast.Store):
+            assigned.update(column_names(node.slice) or [])
+
+    columns = set()
+    for node in ast.walk(function):
+        if not isinstance(node, ast.Return) or node.value is None:
+            continue
+        for child in ast.walk(node.value):
+            if isinstance(child, ast.Dict):
+                columns.update(k.value for k in child.keys if isinstance(k, ast.Constant) and isinstance(k.value, str))
+            elif isinstance(child, ast.Subscript):
+                columns.update(name for name in column_names(child.slice) or [] if name in assigned)
+    return columns
+
+
+def feature_columns(source: str, function_name: str):
+    """
+    Statically extracts the columns a generated feature function reads and the columns it outputs.
+
+    Functions of the same module the dataframe is passed to, such as the fused function behind a
+    fused feature, are followed.
+
+    Parameters:
+        source (str): The generated module source.
+        function_name (str): The feature function in it.
+
+    Returns:
+        tuple: (reads, outputs), two sets of column names. Outputs always include function_name,
+               features are expected to return a column named after themselves.
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return set(), {function_name}
+
+    functions = module_functions(tree)
+    reads, outputs = set(), {function_name}
+    pending, seen = [function_name], set()
+
+    while pending:
+        name = pending.pop()
+        if name in seen or name not in functions:
+            continue
+        seen.add(name)
+        function_reads, _, calls = function_columns(functions[name])
+        reads.update(function_reads)
+        pending.extend(calls)
+        if name == function_name:
+            outputs.update(returned_columns(functions[name]))
+
+    return reads - outputs, outputs
+
+
+class FeatureDAG:
+    """
+    Dependency graph of features: a feature depends on another when it reads one of its output
+    columns that the base dataset doesn't already have.
+    """
+
+    def __init__(self, nodes: dict, base_columns):
+        """
+        Parameters:
+            nodes (dict): feature name -> (reads, outputs) as returned by feature_columns, in run order.
+            base_columns: The columns of the input dataframe, reading one of them never creates a dependency.
+        """
+        self.nodes = list(nodes)
+        base_columns = set(base_columns)
+
+        producers = {}
+        for name, (_, outputs) in nodes.items():
+            for column in outputs - base_columns:
+                producers.setdefault(column, name)  # The first feature producing a column wins, like the merge
+
+        self.upstream = {name: set() for name in self.nodes}
+        for name, (reads, _) in nodes.items():
+            self.upstream[name] = {producers[column] for column in reads if producers.get(column, name) != name}
+
+        self.downstream = {name: set() for name in self.nodes}
+        for name, dependencies in self.upstream.items():
+            for dependency in dependencies:
+                self.downstream[dependency].add(name)
+
+    def find_cycle(self):
+        """A list of features forming a dependency cycle, or None."""
+        state = {}  # name -> 1 while being visited, 2 once done
+
+        def visit(name, path):
+            state[name] = 1
+            path.append(name)
+            for dependency in sorted(self.upstream[name]):
+                if state.get(dependency) == 1:
+                    return path[path.index(dependency):]
+                if dependency not in state:
+                    cycle = visit(dependency, path)
+                    if cycle:
+                        return cycle
+            path.pop()
+            state[name] = 2
+            return None
+
+        for name in self.nodes:
+            if name not in state:
+                cycle = visit(name, [])
+                if cycle:
+                    return cycle
+        return None
+
+    def topological_order(self) -> list:
+        """Features ordered so each one comes after the features it reads from, ties kept in run order."""
+        cycle = self.find_cycle()
+        if cycle:
+            raise FeatureDependencyCycle(cycle)
+
+        order, done = [], set()
+        while len(order) < len(self.nodes):
+            for name in self.nodes:
+                if name not in done and self.upstream[name] <= done:
+                    order.append(name)
+                    done.add(name)
+                    break
+        return order
+
+    def blocked_by_cycles(self) -> set:
+        """Features on a cycle or downstream of one, which can never get their inputs."""
+        blocked = set()
+        while True:
+            cycle = self.subgraph(set(self.nodes) - blocked).find_cycle()
+            if not cycle:
+                break
+            pending = list(cycle)
+            while pending:
+                name = pending.pop()
+                if name not in blocked:
+                    blocked.add(name)
+                    pending.extend(self.downstream[name])
+        return blocked
+
+    def subgraph(self, names: set) -> "FeatureDAG":
+        dag = FeatureDAG.__new__(FeatureDAG)
+        dag.nodes = [name for name in self.nodes if name in names]
+        dag.upstream = {name: self.upstream[name] & names for name in dag.nodes}
+        dag.downstream = {name: self.downstream[name] & names for name in dag.nodes}
+        return dag
+
+
+def dependency_input(df: pd.DataFrame, upstream_results: list) -> pd.DataFrame:
+    """df with the columns of upstream results that it doesn't already have appended."""
+    new_columns = [
+        result.loc[:, ~result.columns.isin(df.columns)] for result in upstream_results if result is not None
+    ]
+    new_columns = [result for result in new_columns if result.shape[1]]
+    return pd.concat([df] + new_columns, axis=1) if new_columns else df
+
+
+def run_feature_dag(dag: FeatureDAG, df: pd.DataFrame, run, max_workers: int = FEATURE_DAG_MAX_WORKERS) -> dict:
+    """
+    Runs every feature of dag once all the features it depends on have finished, independent
+    features in parallel.
+
+    Parameters:
+        dag (FeatureDAG): The features and their dependencies, without cycles.
+        df (pd.DataFrame): The input dataframe, given as it is to features without dependencies.
+        run: Callable (feature_name, input_df) -> result dataframe or None. Features that depend on
+             others get df plus the columns of their upstream results.
+        max_workers (int): Features running at the same time.
+
+    Returns:
+        dict: feature name -> result, None for features that failed or whose upstream features failed.
+    """
+    results = {}
+    remaining = {name: set(upstream) for name, upstream in dag.upstream.items()}
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        running = {}
+
+        def submit_ready():
+            for name in dag.nodes:
+                if name in running or name in results or remaining[name]:
+                    continue
+                upstream_results = [results[dependency] for dependency in sorted(dag.upstream[name])]
+                if any(result is None for result in upstream_results):
+                    print(f"Skipping feature {name}, a feature it depends on failed.")
+                    results[name] = None
+                    for dependent in dag.downstream[name]:
+                        remaining[dependent].discard(name)
+                    return True  # Dependents may now be ready to skip as well
+                running[name] = executor.submit(run, name, dependency_input(df, upstream_results))
+            return False
+
+        while True:
+            while submit_ready():
+                pass
+            if not running:
+                break
+
+            done, _ = concurrent.futures.wait(running.values(), return_when=concurrent.futures.FIRST_COMPLETED)
+            for name, future in list(running.items()):
+                if future not in done:
+                    continue
+                del running[name]
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    print(f"Feature {name} failed: {e}")
+                    results[name] = None
+                for dependent in dag.downstream[name]:
+                    remaining[dependent].discard(name)
+
+    return results
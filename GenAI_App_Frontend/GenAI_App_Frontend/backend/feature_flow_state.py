@@ -18,14 +18,42 @@ import concurrent.futures
 import time
 import sys
 import re
+import asyncio
+import functools
+import shutil
+import threading
 from typing import Any
 # Backend imports 
 
 from .feature_code_gen import CODE_GEN_CHAIN
-from .feature_code_gen_v2 import CODE_GEN_CHAIN_V2
-from .feature_code_gen_v3 import CODE_GEN_CHAIN_V3
-
-from databricks import sql
+from .feature_code_gen_v2 import CODE_GEN_CHAIN_V2, CODE_GEN_BATCH_CHAIN_V2, CODE_REPAIR_CHAIN_V2, CODE_GEN_MODEL_NAME
+from .feature_code_gen_v3 import CODE_GEN_CHAIN_V3, CODE_GEN_BATCH_CHAIN_V3, CODE_REPAIR_CHAIN_V3
+from .code_gen_cache import CODE_GEN_CACHE
+from .context_selection import ColumnContextSelector, load_column_docs, CONTEXT_TOP_K, CONTEXT_TOKEN_BUDGET
+from .code_gen_repair import (
+    CODE_GEN_REPAIR_LOG, FAILURE_NO_CODE, FAILURE_LOAD_ERROR, FAILURE_MISSING_FUNCTION,
+    build_failure_report, failure_from_exception, failure_from_nulls,
+)
+from .model_router import MODEL_ROUTER, ModelRouter
+from .llm_scheduler import LLM_SCHEDULER
+from .sandbox_executor import SandboxExecutor, SandboxInputError, get_sandbox_executor
+from .function_registry import FUNCTION_REGISTRY, source_hash
+from .readonly_frames import (
+    EXECUTION_COPY_TRACKER, INPUT_FRAME_KEY, frame_nbytes, function_key, is_read_only_violation, read_only_view,
+)
+from .memoized_execution import MEMOIZED_EXECUTION
+from .column_accumulator import ColumnAccumulator
+from .chunked_execution import (
+    OUT_OF_CORE_BATCH_ROWS, OUT_OF_CORE_PREVIEW_ROWS, csv_batches, global_statistic_reasons, run_features_in_batches,
+    spill_batches,
+)
+from .feature_cache import FEATURE_COLUMN_CACHE, feature_cache_key
+from .feature_profiler import FEATURE_PROFILER, FEATURE_SLOW_ROWS_PER_SECOND, format_profile, is_slow, merge_records
+from .feature_dag import FEATURE_DAG_MAX_WORKERS, FeatureDAG, FeatureDependencyCycle, feature_columns, run_feature_dag
+from .databricks_fetch import fetch_dataframe, fetch_dataframe_batches
+from .databricks_pool import DATABRICKS_IO_EXECUTOR, DATABRICKS_POOL
+from .lazy_dataset import LAZY_SAMPLE_ROWS, PENDING_DATASETS, sample_query
+from .table_snapshots import TABLE_SNAPSHOTS, snapshot_key
 
 import re
 from dotenv import load_dotenv
@@ -35,6 +63,18 @@ DATABRICKS_TOKEN = os.environ.get("DATABRICKS_TOKEN")
 
 MAX_RETRIES = 3
 
+# Maximum number of features generated at the same time in concurrent mode
+CODE_GEN_MAX_CONCURRENCY = 4
+
+# Number of features packed into a single prompt in batched mode
+CODE_GEN_BATCH_SIZE = 5
+
+# Directory the Parquet output of out-of-core runs is written to
+FEATURE_OUTPUT_DIR = "features_generated.parquet"
+
+# Guards the fused results shared by features running in parallel
+FUSED_RESULTS_LOCK = threading.Lock()
+
 
 
 
@@ -216,6 +256,57 @@ def extract_code_from_content_v3(output: str) -> str:
         return ""
 
 
+def format_feature_requests_for_llm(feature_requests):
+    """
+    Formats several feature requests into a string suitable for a batched LLM prompt.
+
+    Parameters:
+        feature_requests (list of tuples): (feature_name, request) for each feature.
+
+    Returns:
+        str: A formatted string listing each feature name and its request.
+    """
+    description = ""
+    for i, (feature_name, request) in enumerate(feature_requests, start=1):
+        description += f"Feature {i}:\n"
+        description += f"Feature Name: {feature_name}\n"
+        description += f"Request: {request}\n"
+        description += "-" * 50 + "\n"  # Separator line for readability
+
+    return description
+
+
+def extract_code_blocks_by_feature(content: str, feature_names: list) -> dict:
+    """
+    Splits a batched response into one code block per feature.
+
+    Each block is matched to a feature by its `# feature: <name>` tag, or failing that
+    by the name of the function it defines.
+
+    Parameters:
+        content (str): The response containing several ```python code blocks.
+        feature_names (list of str): The features requested in the batch.
+
+    Returns:
+        dict: Feature name to extracted code, only for the features that were found.
+    """
+    blocks = re.findall(r"```(?:python)?\n(.*?)\n?```", content, re.DOTALL)
+
+    code_by_feature = {}
+    for block in blocks:
+        tag = re.match(r"\s*#\s*feature:\s*([A-Za-z_][A-Za-z0-9_]*)", block)
+        name = tag.group(1) if tag else None
+
+        if name not in feature_names:
+            defined = re.findall(r"^def\s+([A-Za-z_][A-Za-z0-9_]*)\s*\(", block, re.MULTILINE)
+            name = next((n for n in defined if n in feature_names), None)
+
+        if name and name not in code_by_feature:
+            code_by_feature[name] = block.strip()
+
+    return code_by_feature
+
+
 
 def read_file_to_string(file_path):
     """
@@ -256,6 +347,23 @@ def df_sampler(df):
     return "\n".join(rows)
 
 
+def build_feature_context(context_selector, requests):
+    """
+    Builds the prompt documentation and table sample from only the columns relevant to the requests.
+
+    Parameters:
+        context_selector (ColumnContextSelector): Selector built over the base dataframe.
+        requests (list of str): Feature requests sharing the same prompt.
+
+    Returns:
+        tuple: (documentation, df_sample) strings for the code generation prompt.
+    """
+    column_metadata = context_selector.select_metadata(requests)
+    columns = [column_name for column_name, _, _ in column_metadata]
+
+    return format_column_metadata_for_llm(column_metadata), df_sampler(context_selector.df[columns])
+
+
 def load_all_functions(file_path: str = "auto_generated_functions.py"):
     print("Starting load all functions...")
     """Dynamically load all functions from the saved Python file."""
@@ -497,22 +605,130 @@ def clean_json_output(output: str) -> str:
 
 def execute_single_function(func, df: pd.DataFrame):
     """Attempt to execute a single function on the DataFrame."""
+    result, _ = execute_single_function_with_diagnostics(func, df)
+    return result
+
+
+def execute_single_function_with_diagnostics(func, df: pd.DataFrame):
+    """
+    Same as execute_single_function, but also describes why the function failed.
+
+    Returns:
+        tuple: (result, failure) where failure is None on success, otherwise a dict with the
+               failure class, exception details or null ratio, and a sample of the input rows.
+    """
     try:
         print(f"Executing function: {func.__name__}")
         result = func(df)  # Expected to return a single-column dataframe
-        
-        # Check for null percentage in the result
-        null_percentage = result.isnull().mean().iloc[0] * 100  # Calculate % of nulls in the column
-        print(f"Null percentage for {func.__name__}: {null_percentage:.2f}%")
-        
+        return check_result_nulls(func.__name__, result)
+    except Exception as e:
+        print(f"Error executing function {func.__name__}: {e}")
+        return None, failure_from_exception(e, df=df)
+
+
+def check_result_nulls(function_name: str, result: pd.DataFrame):
+    """
+    Discards every output column with over 80% null values, returns (result, failure).
+
+    A multi-output result keeps its other columns. The failure is only returned when no column is
+    left, and describes the column with the most nulls.
+    """
+    if result.shape[1] == 0:
+        raise ValueError("The function returned a dataframe without columns.")
+
+    # Check for null percentage in every output column
+    null_percentages = result.isnull().mean().to_numpy() * 100
+    keep = []
+    for position, null_percentage in enumerate(null_percentages):
+        column = result.columns[position]
+        print(f"Null percentage for {function_name} column {column}: {null_percentage:.2f}%")
         if null_percentage > 80:
-            print(f"Function {func.__name__} returned over 80% null values. Discarding result.")
-            return None
+            print(f"Function {function_name} returned over 80% null values in {column}. Discarding column.")
+        else:
+            keep.append(position)
 
-        return result
+    if not keep:
+        worst = int(null_percentages.argmax())
+        worst_column = result.iloc[:, [worst]]
+        return None, failure_from_nulls(worst_column, null_percentages[worst] / 100, column=worst_column.columns[0])
+
+    if len(keep) < result.shape[1]:
+        result = result.iloc[:, keep]
+    return result, None
+
+
+def execute_on_input(func, df: pd.DataFrame, copy_free: bool = False, memoize: bool = False):
+    """
+    Runs func on a private copy of df, or in copy-free mode on a read-only view of it.
+
+    A function that writes into the read-only view is re-run on a copy, and from then on always
+    gets a copy. The bytes copied are recorded per feature in EXECUTION_COPY_TRACKER. In memoize
+    mode a single-column element-wise function only sees the distinct values of its column.
+    """
+    if memoize:
+        memoized = MEMOIZED_EXECUTION.wrap(func, df)
+        if memoized is not None:
+            return execute_single_function_with_diagnostics(memoized, df)
+
+    key = function_key(func)
+    if copy_free and not EXECUTION_COPY_TRACKER.mutates(key):
+        view, bytes_copied = read_only_view(df)
+        EXECUTION_COPY_TRACKER.record(func.__name__, bytes_copied)
+        result, failure = execute_single_function_with_diagnostics(func, view)
+        if not is_read_only_violation(failure):
+            return result, failure
+        print(f"Function {func.__name__} writes to its input, running it on a copy.")
+        EXECUTION_COPY_TRACKER.mark_mutating(key)
+
+    EXECUTION_COPY_TRACKER.record(func.__name__, frame_nbytes(df))
+    return execute_single_function_with_diagnostics(func, df.copy())
+
+
+def load_and_execute_function(save_path: str, function_name: str, df: pd.DataFrame, sandbox: SandboxExecutor = None,
+                              code: str = None, copy_free: bool = False, memoize: bool = False):
+    """
+    Loads a generated function from save_path and runs it on df.
+
+    Parameters:
+        save_path (str): The saved generated code.
+        function_name (str): The function to run.
+        df (pd.DataFrame): The input dataframe, never mutated.
+        sandbox (SandboxExecutor): Run the function in a sandboxed worker process instead of in-process.
+        code (str): The generated code saved to save_path, compiled from memory instead of re-reading the file.
+        copy_free (bool): Run the function on a read-only view of df instead of a copy.
+        memoize (bool): Run a single-column element-wise function once per distinct value.
+
+    Returns:
+        tuple: (result, failure) like execute_single_function_with_diagnostics, the failure class can
+               also be a load error, a missing function, a timeout or a resource limit.
+    """
+    if sandbox is not None:
+        print(f"Executing function in sandbox: {function_name}")
+        try:
+            result, failure = sandbox.execute(save_path, function_name, df, copy_free, memoize)
+        except SandboxInputError as e:
+            # Raw data with mixed-type columns can't be shared with the workers, run this one in-process
+            print(f"{e} Executing {function_name} in-process.")
+        else:
+            if result is None:
+                print(f"Sandboxed function {function_name} failed: {failure['failure_class']}")
+                return None, failure
+            try:
+                return check_result_nulls(function_name, result)
+            except Exception as e:
+                return None, failure_from_exception(e, df=df)
+
+    try:
+        func = load_single_function(save_path, function_name, code=code)
     except Exception as e:
-        print(f"Error executing function {func.__name__}: {e}")
-        return None
+        print(f"Function {function_name} could not be loaded: {e}")
+        return None, failure_from_exception(e, failure_class=FAILURE_LOAD_ERROR)
+
+    if not func:
+        print(f"Function {function_name} could not be loaded.")
+        return None, {"failure_class": FAILURE_MISSING_FUNCTION}
+
+    return execute_on_input(func, df, copy_free, memoize)
 
 
 # def load_single_function(file_path: str, function_name: str):
@@ -531,6 +747,11 @@ def execute_single_function(func, df: pd.DataFrame):
 #     print(f"Generated code saved to {file_path}")
     
 
+def generated_source(code: str) -> str:
+    """The module source saved for generated code, also what gets compiled so tracebacks match the file."""
+    return f"\n\n{code}\n"
+
+
 def save_generated_code(code: str, file_path: str):
     """Clear previous contents and save new generated code to a specified Python file path."""
     # Ensure the directory exists
@@ -540,28 +761,534 @@ def save_generated_code(code: str, file_path: str):
     if os.path.exists(file_path):
         open(file_path, "w").close()
     
-    # Write the new code to the specified file
+    # Write the new code to the specified file, kept as an artifact for inspection and the sandbox workers
     with open(file_path, "a") as f:
-        f.write(f"\n\n{code}\n")
+        f.write(generated_source(code))
     print(f"Generated code saved to {file_path}")
 
 
 
-def load_single_function(file_path: str, function_name: str):
-    """Load a specific function from the specified Python file using a unique module name."""
-    module_name = f"generated_module_{os.path.basename(file_path).replace('.py', '')}"
+def load_single_function(file_path: str, function_name: str, code: str = None):
+    """
+    Load a specific function from the compiled function registry.
+
+    The code is compiled once per distinct source, later loads of unchanged code return the same
+    function without re-reading the file or re-running its imports.
+
+    Parameters:
+        file_path (str): The saved generated code, read only when code is not given.
+        function_name (str): The function to return.
+        code (str): The generated code as saved by save_generated_code.
+
+    Returns:
+        The requested function or None if not found.
+    """
+    if code is not None:
+        return FUNCTION_REGISTRY.function(generated_source(code), function_name, filename=file_path)
+    return FUNCTION_REGISTRY.load_file(file_path, function_name)
+
+
+
+def model_chain_type(model: str) -> str:
+    """Returns 'v2' for the OpenAI model and 'v3' for Databricks serving endpoints."""
+    return 'v2' if model == CODE_GEN_MODEL_NAME else 'v3'
+
+
+def model_save_path(save_path: str, model: str) -> str:
+    """Per-model copy of a feature's save path, so hedged attempts don't overwrite each other."""
+    root, ext = os.path.splitext(save_path)
+    return f"{root}__{re.sub(r'[^A-Za-z0-9_]', '_', model)}{ext}"
+
+
+def generate_feature_code(feature_name: str, description: str, documentation: str, df_sample: str,
+                          df: pd.DataFrame, save_path: str, type: str, model: str = None,
+                          bypass_cache: bool = False, context_selector: ColumnContextSelector = None,
+                          repair: bool = True, router: ModelRouter = None, sandbox: SandboxExecutor = None,
+                          copy_free: bool = False, memoize: bool = False):
+    """
+    Runs the generate -> save -> load -> validate cycle for a single feature, retrying up to MAX_RETRIES times.
+
+    With a router, the cycle runs on the selected model and is hedged to an alternate model when the
+    primary is slower than its rolling p95 latency. The first attempt that produces a validated
+    function wins and the other one is cancelled.
+
+    In repair mode, a retry after a failed validation sends the previous code together with the
+    exception, trimmed traceback, null ratio and sample input rows, instead of the original prompt.
+
+    Parameters:
+        feature_name (str): Name of the feature, also used as the generated function name.
+        description (str): The user request describing the feature.
+        documentation (str): Column documentation passed to the LLM.
+        df_sample (str): Table sample produced by df_sampler.
+        df (pd.DataFrame): The base dataframe (without the target column) used to validate the function.
+        save_path (str): Unique file path the generated code is saved to.
+        type (str): 'v2' for the OpenAI chain, anything else for the Databricks chain.
+        model (str): Databricks serving endpoint used by the V3 chain.
+        bypass_cache (bool): Skip cached LLM responses and always call the model.
+        context_selector (ColumnContextSelector): If set, only the relevant columns' documentation
+                                                  and sample values are sent instead of documentation and df_sample.
+        repair (bool): Retry with an error-feedback repair prompt instead of the identical prompt.
+        router (ModelRouter): Hedge slow or failing models across providers, None disables routing.
+        sandbox (SandboxExecutor): Validate the generated functions in sandboxed worker processes.
+        copy_free (bool): Run the generated functions on a read-only view of df instead of a copy.
+        memoize (bool): Run single-column element-wise functions once per distinct value.
+
+    Returns:
+        tuple: (code, result) where result is the dataframe returned by the generated function,
+               or None if every attempt failed.
+    """
+    if router is None:
+        return generate_feature_code_on_model(
+            feature_name, description, documentation, df_sample, df, save_path, type, model, bypass_cache,
+            context_selector, repair, sandbox=sandbox, copy_free=copy_free, memoize=memoize,
+        )
+
+    primary = CODE_GEN_MODEL_NAME if type == 'v2' else model
+
+    def attempt(attempt_model, cancel_event):
+        code, result = generate_feature_code_on_model(
+            feature_name, description, documentation, df_sample, df, model_save_path(save_path, attempt_model),
+            model_chain_type(attempt_model), attempt_model, bypass_cache, context_selector, repair, cancel_event,
+            sandbox, copy_free, memoize,
+        )
+        return (code, result), result is not None
+
+    (code, result), ok, winner = router.run(attempt, primary=primary)
+    if winner != primary:
+        print(f"Feature {feature_name} was generated by hedged model {winner}.")
+
+    if code:
+        save_generated_code(code=code, file_path=save_path)
+    return code, result
+
 
-    # Remove the module from sys.modules if it was previously loaded
-    if module_name in sys.modules:
-        del sys.modules[module_name]
-    
-    # Load the module dynamically from the file path
-    spec = importlib.util.spec_from_file_location(module_name, file_path)
-    generated_module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(generated_module)
 
-    # Return the requested function or None if not found
-    return getattr(generated_module, function_name, None)
+def generate_feature_code_on_model(feature_name: str, description: str, documentation: str, df_sample: str,
+                                   df: pd.DataFrame, save_path: str, type: str, model: str = None,
+                                   bypass_cache: bool = False, context_selector: ColumnContextSelector = None,
+                                   repair: bool = True, cancel_event=None, sandbox: SandboxExecutor = None,
+                                   copy_free: bool = False, memoize: bool = False):
+    """
+    Same as generate_feature_code without routing. The cycle stops as soon as cancel_event is set.
+
+    Returns:
+        tuple: (code, result), result is None if every attempt failed or the attempt was cancelled.
+    """
+    retries = 0
+    code = ""
+
+    if context_selector is not None:
+        documentation, df_sample = build_feature_context(context_selector, [f"{feature_name} {description}"])
+
+    inputs = {
+        "feature_name": feature_name,
+        "request": description,
+        "documentation": documentation,
+        "table_sample": df_sample,
+    }
+
+    failure = None  # Failure of the previous attempt
+
+    while retries < MAX_RETRIES:
+        if cancel_event is not None and cancel_event.is_set():
+            print(f"Generation of feature {feature_name} on {model} was cancelled.")
+            return code, None
+
+        print("Feature:", description)
+        print("Try number:", retries)
+
+        # Retries always go back to the model, a cached response would just repeat the failure
+        skip_cache = bypass_cache or retries > 0
+
+        trigger = failure["failure_class"] if failure else None
+        mode = 'repair' if (repair and failure and code) else 'generate'
+
+        # Invoke the code generation chain based on the specified type
+        if mode == 'repair':
+            print(f"Repairing feature {feature_name} after {trigger} failure.")
+            repair_inputs = {
+                "feature_name": feature_name,
+                "request": description,
+                "previous_code": code,
+                "failure_report": build_failure_report(failure, code, df),
+            }
+            if type == 'v2':
+                output = CODE_REPAIR_CHAIN_V2.invoke(repair_inputs, bypass_cache=True, cancel_event=cancel_event)
+                code = extract_code_from_content_v2(output)
+            else:
+                output = CODE_REPAIR_CHAIN_V3.invoke(repair_inputs, model=model, bypass_cache=True, cancel_event=cancel_event)
+                code = extract_code_from_content_v3(output)
+        elif type == 'v2':
+            output = CODE_GEN_CHAIN_V2.invoke(inputs, bypass_cache=skip_cache, cancel_event=cancel_event)
+            code = extract_code_from_content_v2(output)
+        else:
+            output = CODE_GEN_CHAIN_V3.invoke(inputs, model=model, bypass_cache=skip_cache, cancel_event=cancel_event)
+            code = extract_code_from_content_v3(output)
+
+        if cancel_event is not None and cancel_event.is_set():
+            print(f"Generation of feature {feature_name} on {model} was cancelled.")
+            return code, None
+
+        print("\n\ncode gen chain output:")
+        print(output)
+        print("\nExtracted code:")
+        print(code)
+
+        retries += 1
+
+        if not code:
+            print(f"Retrying Feature {feature_name} due to missing code.")
+            failure = {"failure_class": FAILURE_NO_CODE}
+            CODE_GEN_REPAIR_LOG.record(feature_name, retries - 1, mode, trigger, FAILURE_NO_CODE)
+            invalidate_code_gen_cache(inputs, type, model)
+            continue  # Retry if no code was generated
+
+        # Save the code to the unique file path for this feature
+        save_generated_code(code=code, file_path=save_path)
+
+        # Load and execute the function from the unique file path
+        result, failure = load_and_execute_function(
+            save_path, feature_name, df, sandbox, code=code, copy_free=copy_free, memoize=memoize,
+        )
+        if result is not None:  # If function succeeded
+            CODE_GEN_REPAIR_LOG.record(feature_name, retries - 1, mode, trigger)
+            return code, result
+
+        CODE_GEN_REPAIR_LOG.record(feature_name, retries - 1, mode, trigger, failure["failure_class"])
+        invalidate_code_gen_cache(inputs, type, model)
+        if failure["failure_class"] in (FAILURE_LOAD_ERROR, FAILURE_MISSING_FUNCTION) and not repair:
+            break
+        print(f"Retry {retries} for feature {feature_name}")
+
+    return code, None
+
+
+
+def invalidate_code_gen_cache(inputs: dict, type: str, model: str = None):
+    """Drops a cached LLM response that produced unusable code, so it is not served again."""
+    if type == 'v2':
+        CODE_GEN_CHAIN_V2.invalidate(inputs)
+    else:
+        CODE_GEN_CHAIN_V3.invalidate(inputs, model=model)
+
+
+
+def generate_feature_code_batch(jobs: list, documentation: str, df_sample: str, df: pd.DataFrame,
+                                type: str, model: str = None, bypass_cache: bool = False,
+                                context_selector: ColumnContextSelector = None, repair: bool = True,
+                                router: ModelRouter = None, sandbox: SandboxExecutor = None,
+                                copy_free: bool = False, memoize: bool = False):
+    """
+    Generates several features with a single LLM call that shares the table sample and documentation.
+
+    Each function parsed from the response is saved, loaded and validated on its own. Only the
+    features that are missing from the response or fail validation fall back to generate_feature_code.
+
+    Parameters:
+        jobs (list of tuples): (feature_name, description, save_path) for each feature in the batch.
+        documentation (str): Column documentation passed to the LLM.
+        df_sample (str): Table sample produced by df_sampler.
+        df (pd.DataFrame): The base dataframe (without the target column) used to validate the functions.
+        type (str): 'v2' for the OpenAI chain, anything else for the Databricks chain.
+        model (str): Databricks serving endpoint used by the V3 chain.
+        bypass_cache (bool): Skip cached LLM responses and always call the model.
+        context_selector (ColumnContextSelector): If set, only the columns relevant to the batch are sent.
+        repair (bool): Single-feature fallbacks use error-feedback repair prompts.
+        router (ModelRouter): Single-feature fallbacks are hedged across models.
+        sandbox (SandboxExecutor): Validate the generated functions in sandboxed worker processes.
+        copy_free (bool): Run the generated functions on a read-only view of df instead of a copy.
+        memoize (bool): Run single-column element-wise functions once per distinct value.
+
+    Returns:
+        list of tuples: (code, result) for each job, in the same order as jobs.
+    """
+    feature_names = [feature_name for feature_name, _, _ in jobs]
+
+    batch_documentation, batch_df_sample = documentation, df_sample
+    if context_selector is not None:
+        batch_documentation, batch_df_sample = build_feature_context(
+            context_selector, [f"{name} {description}" for name, description, _ in jobs]
+        )
+
+    inputs = {
+        "feature_requests": format_feature_requests_for_llm([(name, description) for name, description, _ in jobs]),
+        "documentation": batch_documentation,
+        "table_sample": batch_df_sample,
+    }
+
+    print(f"Generating batch of {len(jobs)} features:", feature_names)
+
+    try:
+        if type == 'v2':
+            content = CODE_GEN_BATCH_CHAIN_V2.invoke(inputs, bypass_cache=bypass_cache).content
+        else:
+            content = CODE_GEN_BATCH_CHAIN_V3.invoke(inputs, model=model, bypass_cache=bypass_cache)
+    except Exception as e:
+        print(f"Error generating feature batch {feature_names}: {e}")
+        content = ""
+
+    code_by_feature = extract_code_blocks_by_feature(content, feature_names)
+
+    if not code_by_feature and content:
+        # Nothing usable in the response, don't serve it again
+        if type == 'v2':
+            CODE_GEN_BATCH_CHAIN_V2.invalidate(inputs)
+        else:
+            CODE_GEN_BATCH_CHAIN_V3.invalidate(inputs, model=model)
+
+    results = []
+    for feature_name, description, save_path in jobs:
+        code = code_by_feature.get(feature_name, "")
+        result = None
+
+        if code:
+            save_generated_code(code=code, file_path=save_path)
+            result, _ = load_and_execute_function(
+                save_path, feature_name, df, sandbox, code=code, copy_free=copy_free, memoize=memoize,
+            )
+
+        if result is None:
+            print(f"Batched generation failed for feature {feature_name}, falling back to single feature retries.")
+            code, result = generate_feature_code(
+                feature_name, description, documentation, df_sample, df, save_path, type, model, bypass_cache,
+                context_selector, repair, router, sandbox, copy_free, memoize,
+            )
+
+        results.append((code, result))
+
+    return results
+
+
+
+# Column names are written in backticks in feature requests
+REQUEST_COLUMN_PATTERN = re.compile(r"`([^`]+)`")
+
+
+def request_source_columns(description: str, columns) -> tuple:
+    """The dataframe columns a feature request names in backticks, sorted."""
+    named = set(REQUEST_COLUMN_PATTERN.findall(description))
+    return tuple(sorted(str(column) for column in columns if column in named))
+
+
+def group_jobs_by_source_columns(jobs: list, columns) -> list:
+    """
+    Groups (feature_name, description, save_path) jobs whose requests name the same source columns.
+
+    Returns:
+        list of lists of job indexes, in the order of each group's first job. Jobs that name no
+        column are in a group of their own.
+    """
+    groups = {}
+    for index, (feature_name, description, _) in enumerate(jobs):
+        source_columns = request_source_columns(description, columns)
+        key = source_columns if source_columns else ("", index)
+        groups.setdefault(key, []).append(index)
+    return list(groups.values())
+
+
+def fused_function_name(source_columns: tuple) -> str:
+    name = re.sub(r"\W", "_", "_".join(source_columns)).strip("_") or "shared"
+    return f"{name}_features" if name[0].isalpha() else f"f_{name}_features"
+
+
+def fused_request(jobs: list, source_columns: tuple) -> str:
+    """Combines several feature requests into one request for a single multi-output function."""
+    names = ", ".join(feature_name for feature_name, _, _ in jobs)
+    columns = ", ".join(f"`{column}`" for column in source_columns)
+    lines = [
+        f"Create several features from {columns} in one function. Parse or transform the source columns only "
+        f"once and derive every feature from that shared result.",
+        f"Return one column per feature, named exactly: {names}.",
+    ]
+    lines += [f"- `{feature_name}`: {description}" for feature_name, description, _ in jobs]
+    return "\n".join(lines)
+
+
+def fused_module_code(code: str, fused_name: str, feature_names: list) -> str:
+    """
+    The fused code plus one function per feature returning only its column, saved as every member's code.
+
+    FUSED_OUTPUTS lets the feature runner call the fused function once for all of its features.
+    """
+    outputs = ", ".join(f"{feature_name!r}: {fused_name!r}" for feature_name in feature_names)
+    lines = [code, "", "", "# Features computed by the fused function", f"FUSED_OUTPUTS = {{{outputs}}}"]
+    for feature_name in feature_names:
+        lines += ["", "", f"def {feature_name}(DF):", f"    return {fused_name}(DF)[[{feature_name!r}]]"]
+    return "\n".join(lines) + "\n"
+
+
+def execute_fused_output(save_path: str, feature_name: str, df: pd.DataFrame, fused_results: dict,
+                         code: str = None, copy_free: bool = False, memoize: bool = False):
+    """
+    Runs the fused function feature_name is an output of, once for all of its outputs.
+
+    Parameters:
+        save_path (str): The feature's saved code.
+        feature_name (str): The feature to compute.
+        df (pd.DataFrame): The input dataframe, never mutated.
+        fused_results (dict): Results of the fused functions already run on df, shared across calls
+                              and threads. A fused function running in another thread is waited for.
+        code (str): The feature's code, compiled from memory instead of re-reading the file.
+
+    Returns:
+        tuple: (handled, result). handled is False if the feature is not a fused output and has to
+               be run on its own, result is the feature's column or None if it failed.
+    """
+    try:
+        func = load_single_function(save_path, feature_name, code=code)
+    except Exception:
+        return False, None  # The regular path reports the error
+
+    fused_outputs = getattr(func, "__globals__", {}).get("FUSED_OUTPUTS") or {}
+    fused = func.__globals__.get(fused_outputs.get(feature_name, "")) if func else None
+    if not callable(fused):
+        return False, None
+
+    key = function_key(fused)
+    with FUSED_RESULTS_LOCK:
+        pending = fused_results.get(key)
+        owner = pending is None
+        if owner:
+            pending = fused_results[key] = concurrent.futures.Future()
+
+    if owner:
+        result = None
+        try:
+            result, _ = execute_on_input(fused, df, copy_free, memoize)
+        finally:
+            pending.set_result(result)  # Never leaves other features waiting
+
+    result = pending.result()
+    if result is None or feature_name not in result.columns:
+        return True, None
+    return True, result[[feature_name]]
+
+
+def generate_fused_feature_code(jobs: list, documentation: str, df_sample: str, df: pd.DataFrame, type: str,
+                                model: str = None, bypass_cache: bool = False,
+                                context_selector: ColumnContextSelector = None, repair: bool = True,
+                                router: ModelRouter = None, sandbox: SandboxExecutor = None,
+                                copy_free: bool = False, memoize: bool = False):
+    """
+    Generates a single multi-output function for features that read the same source columns.
+
+    The shared parsing of the source columns then runs once instead of once per feature. Each
+    feature's output column is split off the fused result, features missing from it fall back to
+    generate_feature_code on their own.
+
+    Parameters:
+        jobs (list of tuples): (feature_name, description, save_path) for each feature.
+        Other parameters: same as generate_feature_code_batch.
+
+    Returns:
+        list of tuples: (code, result) for each job, in the same order as jobs.
+    """
+    source_columns = request_source_columns(jobs[0][1], df.columns)
+    fused_name = fused_function_name(source_columns)
+    fused_path = os.path.join(os.path.dirname(jobs[0][2]), f"{fused_name}.py")
+    print(f"Generating features {[job[0] for job in jobs]} in one function {fused_name}.")
+
+    code, result = generate_feature_code(
+        fused_name, fused_request(jobs, source_columns), documentation, df_sample, df, fused_path, type, model,
+        bypass_cache, context_selector, repair, router, sandbox, copy_free, memoize,
+    )
+
+    produced = [job[0] for job in jobs if result is not None and job[0] in result.columns]
+    module_code = fused_module_code(code, fused_name, produced) if produced else ""
+
+    results = []
+    for feature_name, description, save_path in jobs:
+        if feature_name in produced:
+            save_generated_code(code=module_code, file_path=save_path)
+            results.append((module_code, result[[feature_name]]))
+            continue
+
+        print(f"Fused generation did not produce feature {feature_name}, falling back to single feature retries.")
+        results.append(generate_feature_code(
+            feature_name, description, documentation, df_sample, df, save_path, type, model, bypass_cache,
+            context_selector, repair, router, sandbox, copy_free, memoize,
+        ))
+
+    return results
+
+
+async def generate_features_concurrently(jobs: list, documentation: str, df_sample: str, df: pd.DataFrame,
+                                         type: str, model: str = None, max_concurrency: int = CODE_GEN_MAX_CONCURRENCY,
+                                         bypass_cache: bool = False, batch_size: int = 1,
+                                         context_selector: ColumnContextSelector = None, repair: bool = True,
+                                         router: ModelRouter = None, sandbox: SandboxExecutor = None,
+                                         copy_free: bool = False, memoize: bool = False, fuse: bool = False):
+    """
+    Runs generate_feature_code for several features at once, each as an independent task.
+
+    Every job runs on a worker thread, so wall time tracks the slowest feature instead of the
+    sum of all of them. At most max_concurrency features are in flight at the same time.
+
+    Parameters:
+        jobs (list of tuples): (feature_name, description, save_path) for each feature.
+        documentation (str): Column documentation passed to the LLM.
+        df_sample (str): Table sample produced by df_sampler.
+        df (pd.DataFrame): The base dataframe (without the target column).
+        type (str): 'v2' for the OpenAI chain, anything else for the Databricks chain.
+        model (str): Databricks serving endpoint used by the V3 chain.
+        max_concurrency (int): Maximum number of features generated at the same time.
+        bypass_cache (bool): Skip cached LLM responses and always call the model.
+        batch_size (int): Number of features packed into each prompt, 1 disables batching.
+        context_selector (ColumnContextSelector): If set, prompts only include the relevant columns.
+        repair (bool): Retry failed features with error-feedback repair prompts.
+        router (ModelRouter): Hedge slow or failing models across providers, None disables routing.
+        sandbox (SandboxExecutor): Validate the generated functions in sandboxed worker processes.
+        copy_free (bool): Run the generated functions on a read-only view of df instead of a copy.
+        memoize (bool): Run single-column element-wise functions once per distinct value.
+        fuse (bool): Generate one multi-output function for features that read the same source columns.
+
+    Returns:
+        list of tuples: (code, result) for each job, in the same order as jobs.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    batch_size = max(1, batch_size)
+
+    groups = group_jobs_by_source_columns(jobs, df.columns) if fuse else [[index] for index in range(len(jobs))]
+    fused_groups = [group for group in groups if len(group) > 1]
+    singles = [group[0] for group in groups if len(group) == 1]
+    batches = fused_groups + [singles[i:i + batch_size] for i in range(0, len(singles), batch_size)]
+
+    async def run_batch(indexes):
+        batch = [jobs[index] for index in indexes]
+        async with semaphore:
+            if indexes in fused_groups:
+                return await asyncio.to_thread(
+                    generate_fused_feature_code,
+                    batch, documentation, df_sample, df, type, model, bypass_cache, context_selector, repair, router,
+                    sandbox, copy_free, memoize,
+                )
+
+            if len(batch) == 1:
+                feature_name, description, save_path = batch[0]
+                result = await asyncio.to_thread(
+                    generate_feature_code,
+                    feature_name, description, documentation, df_sample, df, save_path, type, model, bypass_cache,
+                    context_selector, repair, router, sandbox, copy_free, memoize,
+                )
+                return [result]
+
+            return await asyncio.to_thread(
+                generate_feature_code_batch,
+                batch, documentation, df_sample, df, type, model, bypass_cache, context_selector, repair, router,
+                sandbox, copy_free, memoize,
+            )
+
+    outputs = await asyncio.gather(*(run_batch(batch) for batch in batches), return_exceptions=True)
+
+    results = [("", None)] * len(jobs)
+    for indexes, output in zip(batches, outputs):
+        if isinstance(output, Exception):
+            print(f"Error generating features {[jobs[index][0] for index in indexes]}: {output}")
+            continue
+        for index, result in zip(indexes, output):
+            results[index] = result
+
+    return results
 
 
 
@@ -613,6 +1340,70 @@ class FeatureFlowState(rx.State):
     # LLM Options 
     llm_to_use: str = "gpt-4o-mini"
 
+    # Code generation concurrency
+    concurrent_codegen: bool = True
+    codegen_max_concurrency: int = CODE_GEN_MAX_CONCURRENCY
+
+    # Skip the on-disk LLM response cache and always call the model
+    bypass_code_gen_cache: bool = False
+
+    # Pack several features into one prompt
+    batched_codegen: bool = False
+    codegen_batch_size: int = CODE_GEN_BATCH_SIZE
+
+    # Only send the columns relevant to each feature to the LLM
+    prune_prompt_context: bool = False
+    context_top_k: int = CONTEXT_TOP_K
+    context_token_budget: int = CONTEXT_TOKEN_BUDGET
+
+    # Retry failed features with an error-feedback repair prompt
+    codegen_repair_mode: bool = True
+
+    # Hedge slow or failing models with a second request to an alternate model
+    hedged_routing: bool = False
+
+    # Run generated functions in sandboxed worker processes with timeouts and resource limits
+    sandboxed_execution: bool = False
+
+    # Hand generated functions a read-only view of the dataset instead of a copy
+    copy_free_execution: bool = False
+
+    # Run single-column element-wise functions once per distinct value and broadcast the results
+    memoized_execution: bool = False
+
+    # Generate one multi-output function for features whose requests name the same source columns
+    fused_codegen: bool = False
+
+    # Run features in dependency order, independent ones in parallel, so features can read generated columns
+    dag_execution: bool = False
+    feature_dag_max_workers: int = FEATURE_DAG_MAX_WORKERS
+    feature_execution_order: List[str] = []
+    feature_dependency_error: str = ""
+
+    # Reuse cached feature columns, only features whose code, dataset or imputation plan changed are recomputed
+    incremental_execution: bool = False
+
+    # Stream the dataset in row batches instead of loading it, only previews are kept in memory
+    out_of_core_execution: bool = False
+    out_of_core_batch_rows: int = OUT_OF_CORE_BATCH_ROWS
+    base_dataset_path: str = ""
+    final_dataset_path: str = ""
+    global_statistic_features: dict = {}  # feature name -> why it can't run batch by batch
+
+    # Record time, memory, throughput, dtypes and nulls of every feature run, flag features below the threshold
+    profile_features: bool = False
+    slow_feature_rows_per_second: float = FEATURE_SLOW_ROWS_PER_SECOND
+    feature_profiles: dict = {}  # feature name -> {"summary": str, "slow": bool}
+
+    # Load a sample first for the preview, imputation options and prompts, the full table loads in the
+    # background and is only waited for by feature execution and AutoML
+    lazy_table_loading: bool = True
+    base_dataset_sampled: bool = False
+    _base_dataset_handle: str = ""  # PENDING_DATASETS handle of the full table while it loads
+
+    # Keep local Arrow snapshots of Databricks tables, reloads of unchanged tables skip the download
+    table_snapshot_cache: bool = True
+
     # ML Options 
     ml_problem_type: str 
     target_var: str 
@@ -757,70 +1548,168 @@ class FeatureFlowState(rx.State):
 
     async def set_base_dataset(self, path: str) -> bool: 
         print("set_base_dataset path:", path)
-        self.base_dataset = pd.read_csv(path)
+        self._discard_base_dataset_load()
+        self.base_dataset_path = path
+        if self.out_of_core_execution:
+            # Only a preview is loaded, feature functions stream the whole file in batches
+            self.base_dataset = pd.read_csv(path, nrows=OUT_OF_CORE_PREVIEW_ROWS)
+        elif self.lazy_table_loading:
+            self.base_dataset = pd.read_csv(path, nrows=LAZY_SAMPLE_ROWS)
+            self._start_base_dataset_load(lambda: pd.read_csv(path))
+        else:
+            self.base_dataset = pd.read_csv(path)
 
         return True 
     
     async def set_base_dataset_from_databricks(self, table) -> bool: 
 
-        self.db_table = table
+        # Data and column metadata are fetched at the same time, off the event loop
+        data_future, metadata_future = self.fetch_databricks_table(table)
+        column_metadata, train_df = await asyncio.gather(metadata_future, data_future)
 
-        connection = sql.connect(
-            server_hostname=self.server_hostname,
-            http_path=self.http_path,
-            access_token=DATABRICKS_TOKEN
-        )
+        self.set_databricks_metadata(column_metadata)
+        self.base_dataset = train_df
 
-        # Query to get data and convert to pandas DataFrame
+        return True
+
+    async def set_base_dataset_from_future(self, data_future) -> bool:
+        """Sets the base dataset once the data future of fetch_databricks_table resolves."""
+        self.base_dataset = await data_future
+        return True
 
-        sql_query = f"SELECT * FROM {self.catalog}.{self.schema}.{table}"
+    def fetch_databricks_table(self, table):
+        """
+        Starts the table query and the column metadata query concurrently on the Databricks I/O
+        threads, each on its own pooled connection, so the event loop isn't blocked by either.
 
-        with connection.cursor() as cursor:
-            cursor.execute(sql_query)
-            columns = [desc[0] for desc in cursor.description]  # Get column names
-            result = cursor.fetchall()
+        The metadata is small and usually arrives long before the data, so callers can publish
+        the schema with set_databricks_metadata while the data is still streaming.
 
-        # Convert to DataFrame
-        train_df = pd.DataFrame(result, columns=columns)
-        self.base_dataset = train_df
+        Parameters:
+            table (str): The table in the configured catalog and schema.
 
+        Returns:
+            tuple: (data_future, metadata_future), asyncio futures of the dataframe and the
+                   (column_name, data_type, comment) rows.
+        """
+        self._discard_base_dataset_load()
+        self.db_table = table
+        self.base_dataset_path = ""
 
+        # Query to get data and convert to pandas DataFrame
 
+        table_name = f"{self.catalog}.{self.schema}.{table}"
+        sql_query = f"SELECT * FROM {table_name}"
+        if self.out_of_core_execution:
+            # Only a preview is loaded, feature functions stream the whole table in batches
+            sql_query += f" LIMIT {OUT_OF_CORE_PREVIEW_ROWS}"
 
         # Query to get column names, data types, and comments
         query_columns = f"""
         SELECT column_name, data_type, comment
         FROM {self.catalog}.information_schema.columns
         WHERE table_schema = '{self.schema}' AND table_name = '{table}'
+        ORDER BY ordinal_position
+        """
+
+        loop = asyncio.get_running_loop()
+        connection_args = (self.server_hostname, self.http_path, DATABRICKS_TOKEN)
+        # Fetched as Arrow batches and converted column by column, no Python object per cell
+        load_data = functools.partial(DATABRICKS_POOL.query, *connection_args, sql_query, fetch_dataframe)
+        use_snapshot = self.table_snapshot_cache and not self.out_of_core_execution
+        if use_snapshot:
+            # Served from the local snapshot while the table's version is unchanged
+            load_data = functools.partial(TABLE_SNAPSHOTS.load, DATABRICKS_POOL, connection_args, table_name)
+
+        if self.lazy_table_loading and not self.out_of_core_execution:
+            # The data future resolves to the sample, the full table is awaited when it's needed
+            self._start_base_dataset_load(load_data)
+            if use_snapshot:
+                load_data = functools.partial(
+                    TABLE_SNAPSHOTS.load, DATABRICKS_POOL, connection_args, table_name,
+                    rows=LAZY_SAMPLE_ROWS, query=sample_query(table_name),
+                )
+            else:
+                load_data = functools.partial(
+                    DATABRICKS_POOL.query, *connection_args, sample_query(table_name), fetch_dataframe
+                )
+
+        data_future = loop.run_in_executor(DATABRICKS_IO_EXECUTOR, load_data)
+        metadata_future = loop.run_in_executor(
+            DATABRICKS_IO_EXECUTOR, DATABRICKS_POOL.query, *connection_args, query_columns
+        )
+        for future in (data_future, metadata_future):
+            # Marks a failure as retrieved, so it isn't logged when the caller stopped at the other one
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        return data_future, metadata_future
+
+    def _start_base_dataset_load(self, load):
+        """Loads the full base dataset in the background, base_dataset holds a sample until it's taken."""
+        self._discard_base_dataset_load()
+        self._base_dataset_handle = PENDING_DATASETS.start(load)
+        self.base_dataset_sampled = True
+        # Choices saved for the previous dataset must not be applied to this one when it arrives
+        self.base_imputation_choices = {}
+
+    def _discard_base_dataset_load(self):
+        if self._base_dataset_handle:
+            PENDING_DATASETS.discard(self._base_dataset_handle)
+        self._base_dataset_handle = ""
+        self.base_dataset_sampled = False
+
+    def _materialize_base_dataset(self) -> pd.DataFrame:
         """
+        Replaces the sample in base_dataset with the full table, blocking until it has loaded.
 
-        # Execute the query to get column metadata
-        column_metadata = []
-        with connection.cursor() as cursor:
-            cursor.execute(query_columns)
-            column_metadata = cursor.fetchall()  # Fetch all metadata at once
+        Imputation choices made on the sample are applied to the full table. A failed load is
+        raised again on every call, base_dataset keeps the sample.
 
+        Returns:
+            pd.DataFrame: The full base dataset.
+        """
+        if not self._base_dataset_handle:
+            return self.base_dataset
+
+        print("Waiting for the full base dataset...")
+        full_df = PENDING_DATASETS.result(self._base_dataset_handle)
+        if self.base_imputation_choices:
+            full_df = handle_null_imputation(full_df, self.base_imputation_choices)
+        self._base_dataset_handle = ""
+        self.base_dataset_sampled = False
+        self.base_dataset = full_df
+        print(f"Full base dataset loaded: {len(full_df)} rows.")
+        return full_df
+
+    async def _await_base_dataset(self) -> pd.DataFrame:
+        """Same as _materialize_base_dataset, but waits without blocking the event loop."""
+        if self._base_dataset_handle:
+            await PENDING_DATASETS.wait(self._base_dataset_handle)
+        return self._materialize_base_dataset()
+
+    def invalidate_table_snapshot(self):
+        """Removes the local snapshot of the loaded table, its next load downloads it again."""
+        if not self.db_table:
+            return
+        table_name = f"{self.catalog}.{self.schema}.{self.db_table}"
+        TABLE_SNAPSHOTS.invalidate(snapshot_key(self.server_hostname, table_name, DATABRICKS_TOKEN))
+        print(f"Local snapshot of {table_name} removed.")
+
+    def clear_table_snapshots(self):
+        """Removes every local table snapshot."""
+        TABLE_SNAPSHOTS.invalidate()
+        print("Table snapshots cleared.")
+
+    def set_databricks_metadata(self, column_metadata: list):
+        """Stores the (column_name, data_type, comment) rows of the loaded table."""
         self.db_table_comments = format_column_metadata_for_llm(column_metadata)
         self.db_table_comments_dict = column_metadata_to_dict(column_metadata)
 
         data_types_dict, descriptions_dict = split_column_metadata(column_metadata)
         self.db_table_data_type_dict = data_types_dict
         self.db_table_descriptions_dict = descriptions_dict
-
-
-        # Close the connection
-        connection.close()
-
-        return True
     
     def get_table_options_from_databricks(self) -> list[str]:
 
-        connection = sql.connect(
-            server_hostname=self.server_hostname,
-            http_path=self.http_path,
-            access_token=DATABRICKS_TOKEN
-        )
-
         query = f"""
         SELECT table_name 
         FROM {self.catalog}.information_schema.tables
@@ -830,14 +1719,17 @@ class FeatureFlowState(rx.State):
         tables: list[str] = ['Failed to find tables...']
 
         # Execute the query and fetch table names
-        with connection.cursor() as cursor:
-            cursor.execute(query)
-            tables = cursor.fetchall()
-
-        connection.close()
+        with self._databricks_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(query)
+                tables = cursor.fetchall()
     
         return tables
 
+    def _databricks_connection(self):
+        """Checks out a pooled connection to the configured warehouse, use as a context manager."""
+        return DATABRICKS_POOL.checkout(self.server_hostname, self.http_path, DATABRICKS_TOKEN)
+
     @rx.var 
     def base_dataset_set(self) -> bool:
         return self.base_dataset is not None
@@ -883,6 +1775,8 @@ class FeatureFlowState(rx.State):
         print("backend: Setting base imputation choices...")
         self.base_imputation_choices = val
 
+        # While the full table loads this imputes the sample, the full table is imputed when it arrives
+
         null_handled_df = handle_null_imputation(self.base_dataset, self.base_imputation_choices)
         self.base_dataset = null_handled_df
 
@@ -1089,6 +1983,7 @@ class FeatureFlowState(rx.State):
 
     def run_test_auto_ml_values(self):
         print("Running AutoML Test")
+        self._discard_base_dataset_load()
         self.base_dataset = pd.read_csv('csvs/base_dataset_1000_missing_values.csv')
         self.final_dataset = pd.read_csv('csvs/base_dataset.csv')
         print("- Loaded csvs")
@@ -1106,6 +2001,7 @@ class FeatureFlowState(rx.State):
 
     async def run_auto_ml_process(self): 
         print("- Starting AutoML training")
+        await self._await_base_dataset()
 
         """
         ['xgboost', 'xgb_limitdepth', 'rf', 'lgbm', 
@@ -1141,6 +2037,18 @@ class FeatureFlowState(rx.State):
         print(f"Generated code saved to {file_path}")
 
 
+    def clear_code_gen_cache(self):
+        """Removes every cached LLM code generation response."""
+        CODE_GEN_CACHE.clear()
+        print("Code gen cache cleared.")
+
+
+    def clear_feature_cache(self):
+        """Removes every cached feature column, the next run recomputes every feature."""
+        FEATURE_COLUMN_CACHE.clear()
+        print("Feature column cache cleared.")
+
+
     def clear_current_generated_code(self, file_path: str = "auto_generated_functions.py"):
         # Delete the file if it exists (optional, removes the file)
         if os.path.exists(file_path):
@@ -1199,201 +2107,17 @@ class FeatureFlowState(rx.State):
     def run_code_gen_and_execution_v2(self):
         print("Running code generation and execution...")
 
-        self.clear_current_generated_code()  # Clear previously generated code file
-
-
-        target_column = self.base_dataset[self.target_var]
-
-        df = self.base_dataset.drop(columns=[self.target_var])
-        
-        # CODE_GEN vars 
-        df_sample = df_sampler(df)        
-        
-        successful_functions = []
-        combined_results = pd.DataFrame()
-
-        for feature in self.features:
-            retries = 0
-            success = False
-
-            while retries < MAX_RETRIES and not success:
-                print("Feature:", feature.description)
-                print("Try number:", retries)
-
-                
-                output = CODE_GEN_CHAIN_V2.invoke({
-                    "feature_name": feature.feature_name,
-                    "request": feature.description,
-                    "documentation": self.db_table_comments,
-                    "table_sample": df_sample,
-                })
-                
-
-                print()
-                print()
-                print("code gen chain output:")
-                print(output)
-                print()
-                print()
-
-                code = extract_code_from_content_v2(output)
-
-                print()
-                print("Extracted code:")
-                print(code)
-                print()
-
-
-                if not code:
-                    print(f"Retrying Feature {feature.feature_name} due to missing code.")
-                    retries += 1 
-                    continue # No code generated; skip this feature
-
-                save_generated_code(code=code)  # Save the latest code to file
-
-                func = load_single_function("auto_generated_functions.py", feature.feature_name)
-                if func:
-                    # result = execute_single_function(func, df)
-                    result = execute_single_function(func, df.copy())
-
-                    if result is not None:  # If function succeeded
-                        combined_results = pd.concat([combined_results, result], axis=1)
-                        successful_functions.append(feature.feature_name)
-                        success = True
-                    else:
-                        retries += 1
-                        print(f"Retry {retries} for feature {feature.feature_name}")
-
-                else: # Function not loaded
-                    print(f"Function {feature.feature_name} could not be loaded.")
-                    break
-
-        combined_results = remove_duplicate_columns(df, combined_results)
-
-        final_result_df = pd.concat([df, combined_results, target_column], axis=1)
-
-
-        print("COMBINED RESULTS DF cols:")
-        print(combined_results.columns.tolist())
-
-        print("DF COL LIST:")
-        print(df.columns.tolist())
-
-        print("Final results columns:")
-        print(final_result_df.columns.tolist())
-
-
-        return final_result_df
+        return self.generate_all_features(type='v2')
             
 
     
 
     
 
-
-
     def run_code_gen_and_execution_v3(self):
         print("Running code generation and execution...")
 
-        self.clear_current_generated_code()  # Clear previously generated code file
-
-
-        print("BASE DATASET COLS:")
-        print(self.base_dataset.columns.tolist())
-
-        target_column = self.base_dataset[self.target_var]
-
-        df = self.base_dataset.drop(columns=[self.target_var])
-
-        print("DF AT BEGINNING COLS:")
-        print(df.columns.tolist())
-        
-        # CODE_GEN vars 
-        df_sample = df_sampler(df)        
-        
-        successful_functions = []
-        combined_results = pd.DataFrame()
-
-        for feature in self.features:
-            retries = 0
-            success = False
-
-            while retries < MAX_RETRIES and not success:
-                print("Feature:", feature.description)
-                print("Try number:", retries)
-
-                
-                output = CODE_GEN_CHAIN_V3.invoke(
-                    {
-                    "feature_name": feature.feature_name,
-                    "request": feature.description,
-                    "documentation": self.db_table_comments,
-                    "table_sample": df_sample,
-                    },
-                    model=self.llm_to_use
-                )
-
-
-
-                print()
-                print()
-                print("V3 code gen chain output:")
-                print(output)
-                print()
-                print()
-
-                #break
-
-                
-                code = extract_code_from_content_v3(output)
-
-                print()
-                print("Extracted code:")
-                print(code)
-                print()
-
-
-                if not code:
-                    print(f"Trying again with feature {feature.feature_name} due to missing code.")
-                    retries += 1 
-                    continue
-                    #break  # No code generated; skip this feature
-
-                save_generated_code(code=code)  # Save the latest code to file
-
-                func = load_single_function("auto_generated_functions.py", feature.feature_name)
-                if func:
-                    #result = execute_single_function(func, df)
-                    result = execute_single_function(func, df.copy())
-
-                    if result is not None:  # If function succeeded
-                        combined_results = pd.concat([combined_results, result], axis=1)
-                        successful_functions.append(feature.feature_name)
-                        success = True
-                    else:
-                        retries += 1
-                        print(f"Retry {retries} for feature {feature.feature_name}")
-
-                else: # Function not loaded
-                    print(f"Function {feature.feature_name} could not be loaded.")
-                    break
-
-
-        combined_results = remove_duplicate_columns(df, combined_results)
-
-        final_result_df = pd.concat([df, combined_results, target_column], axis=1)
-
-        print("COMBINED RESULTS DF cols:")
-        print(combined_results.columns.tolist())
-
-        print("DF COL LIST:")
-        print(df.columns.tolist())
-
-        print("Final results columns:")
-        print(final_result_df.columns.tolist())
-
-
-        return final_result_df
+        return self.generate_all_features(type='v3')
     
 
 
@@ -1425,7 +2149,7 @@ class FeatureFlowState(rx.State):
             #final_result_df = self.run_code_gen_and_execution_v3()
             type = 'v3'
 
-        df = self.base_dataset.drop(columns=[self.target_var])
+        df = self._feature_input_frame()
 
         df_sample = df_sampler(df)
 
@@ -1433,107 +2157,301 @@ class FeatureFlowState(rx.State):
         save_path = f"generated_code/feature_{feature.id}.py"
 
 
-        retries = 0
-        success = False
+        code, result = generate_feature_code(
+            feature_name=feature.name,
+            description=feature.description,
+            documentation=self.db_table_comments,
+            df_sample=df_sample,
+            df=df,
+            save_path=save_path,
+            type=type,
+            model=self.llm_to_use,
+            bypass_cache=self.bypass_code_gen_cache,
+            context_selector=self._context_selector(df),
+            repair=self.codegen_repair_mode,
+            router=self._model_router(),
+            sandbox=self._sandbox_executor(),
+            copy_free=self.copy_free_execution,
+            memoize=self.memoized_execution,
+        )
 
-        code = "Code not set in generate_single_feature_code..."
+        if result is not None:  # If function succeeded
+            feature.code = code
 
-        while retries < MAX_RETRIES and not success:
-            print("Feature:", feature.description)
-            print("Try number:", retries)
+        return code 
 
-            # Invoke the code generation chain based on the specified type
-            if type == 'v2':
-                output = CODE_GEN_CHAIN_V2.invoke({
-                    "feature_name": feature.name,
-                    "request": feature.description,
-                    "documentation": self.db_table_comments,
-                    "table_sample": df_sample,
-                })
-            else: 
-                output = CODE_GEN_CHAIN_V3.invoke(
-                    {
-                        "feature_name": feature.name,
-                        "request": feature.description,
-                        "documentation": self.db_table_comments,
-                        "table_sample": df_sample,
-                    },
-                    model=self.llm_to_use
-                )
+    
 
-            print("\n\ncode gen chain output:")
-            print(output)
+    def run_all_feature_functions(self): 
+        print("Running all feature functions...")
 
-            # Extract code based on the chain version
-            code = extract_code_from_content_v2(output) if type == 'v2' else extract_code_from_content_v3(output)
-            print("\nExtracted code:")
-            print(code)
+        self._materialize_base_dataset()
+        target_column = self.base_dataset[self.target_var]
+        df = self._feature_input_frame()
+        
+        results_accumulator = ColumnAccumulator(df, target_column)
+        fingerprint = None
+        if self.incremental_execution:
+            fingerprint = FEATURE_COLUMN_CACHE.fingerprint(self.base_dataset, extra=self.target_var)
 
-            if not code:
-                print(f"Retrying Feature {feature.name} due to missing code.")
-                retries += 1 
-                continue  # Retry if no code was generated
+        results = self._run_features(self.features_v2, df, self._sandbox_executor(), fingerprint)
 
-            # Save the code to the unique file path for this feature
-            save_generated_code(code=code, file_path=save_path)
+        for feature_name, result in results.items():
+            results_accumulator.add(feature_name, result)  # Failed functions return None and are skipped
 
-            # Load and execute the function from the unique file path
-            func = load_single_function(save_path, feature.name)
-            if func:
-                result = execute_single_function(func, df.copy())
-                if result is not None:  # If function succeeded
-                    
-                    feature.code = code
-                    # combined_results = pd.concat([combined_results, result], axis=1)
-                    # successful_functions.append(feature.feature_name)
-                    success = True
+        return self._combine_feature_results(results_accumulator)
+
+
+    def run_all_feature_functions_out_of_core(self):
+        """
+        Same as run_all_feature_functions, but streams the dataset in row batches so memory use
+        grows with the batch size instead of the table size.
+
+        Functions that need statistics over the whole table are flagged in global_statistic_features.
+        They run first on the columns they read, loaded whole, and their columns are handed to the
+        batches. Every other function runs batch by batch and each output batch is appended to the
+        Parquet output in FEATURE_OUTPUT_DIR.
+
+        Returns:
+            pd.DataFrame: The first OUT_OF_CORE_PREVIEW_ROWS rows of the output.
+        """
+        print("Running all feature functions out of core...")
+
+        if self.base_dataset_path:
+            batches = csv_batches(self.base_dataset_path, self.out_of_core_batch_rows)
+        else:
+            batches = self._databricks_batches(f"SELECT * FROM {self.catalog}.{self.schema}.{self.db_table}")
+        spill = spill_batches(batches)
+        sandbox = self._sandbox_executor()
+
+        try:
+            row_local = []
+            global_columns = []
+            self.global_statistic_features = {}
+            for feature in self.features_v2:
+                source = self._feature_source(feature) or ""
+                reasons = global_statistic_reasons(source, feature.name)
+                if not reasons:
+                    row_local.append(feature)
+                    continue
+
+                self.global_statistic_features[feature.name] = ", ".join(reasons)
+                print(f"Feature {feature.name} needs the whole table: {self.global_statistic_features[feature.name]}.")
+                reads = sorted(feature_columns(source, feature.name)[0])
+                if not reads or not set(reads) <= set(spill.schema.names) - {self.target_var}:
+                    print(f"Feature {feature.name} reads unknown columns, skipping it.")
+                    continue
+                result, _ = load_and_execute_function(
+                    f"generated_code/feature_{feature.id}.py", feature.name, spill.read_columns(reads), sandbox,
+                    code=feature.code or None, copy_free=self.copy_free_execution, memoize=self.memoized_execution,
+                )
+                if result is not None:
+                    global_columns.append(result)
+
+            global_results = pd.concat(global_columns, axis=1) if global_columns else None
+            feature_columns_seen = {}  # Columns of each feature, kept for batches it fails on
+            batch_profiles = {}  # feature name -> profile record of every batch, merged into one run record
+
+            def run_batch(batch):
+                target_column = batch[self.target_var]
+                if self.copy_free_execution:
+                    df, _ = read_only_view(batch, drop_columns=[self.target_var])
                 else:
-                    retries += 1
-                    print(f"Retry {retries} for feature {feature.name}")
-            else:
-                print(f"Function {feature.name} could not be loaded.")
-                break
+                    df = batch.drop(columns=[self.target_var])
+                if global_results is not None:
+                    df = pd.concat([df, global_results.loc[batch.index]], axis=1)
+
+                batch_accumulator = ColumnAccumulator(df, target_column)
+                for feature_name, result in self._run_features(row_local, df, sandbox, profiles=batch_profiles).items():
+                    if result is None and feature_name in feature_columns_seen:
+                        result = pd.DataFrame(index=batch.index, columns=feature_columns_seen[feature_name], dtype=float)
+                    if result is not None:
+                        feature_columns_seen.setdefault(feature_name, list(result.columns))
+                        batch_accumulator.add(feature_name, result)
+                return batch_accumulator.build()[0]
+
+            output = run_features_in_batches(
+                spill, run_batch, FEATURE_OUTPUT_DIR,
+                batch_rows=self.out_of_core_batch_rows, preview_rows=OUT_OF_CORE_PREVIEW_ROWS,
+            )
+        finally:
+            shutil.rmtree(spill.directory, ignore_errors=True)
+
+        for feature_name, records in batch_profiles.items():
+            FEATURE_PROFILER.add(feature_name, merge_records(records))
+
+        self.final_dataset_path = FEATURE_OUTPUT_DIR
+        final_result_df = output.preview_frame()
+        base_columns = set(spill.schema.names) if spill.schema is not None else set()
+        self.combined_results = final_result_df[[c for c in final_result_df.columns if c not in base_columns]]
+        print(f"Wrote {output.rows} rows in {len(output.parts)} part(s) to {FEATURE_OUTPUT_DIR}.")
+        print("Final results columns:", final_result_df.columns.tolist())
+        return final_result_df
 
-        return code 
 
-    
+    def _databricks_batches(self, query: str):
+        """Runs query on the Databricks warehouse and yields the result out_of_core_batch_rows rows at a time."""
+        with self._databricks_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(query)
+                yield from fetch_dataframe_batches(cursor, self.out_of_core_batch_rows)
 
-    def run_all_feature_functions(self): 
-        print("Running all feature functions...")
 
-        target_column = self.base_dataset[self.target_var]
-        df = self.base_dataset.drop(columns=[self.target_var])
-        
-        successful_functions = []
-        combined_results = pd.DataFrame()
+    def _run_features(self, features, df, sandbox, fingerprint=None, profiles=None) -> dict:
+        """
+        Runs features on df in list order, or in dependency order in DAG mode. Returns name -> result.
 
+        When profiles is a dict, profile records are appended to profiles[feature name] instead of
+        the profile history, for runs made of several batches.
+        """
+        fused_results = {}  # Fused functions run once for all of their features
+        if self.dag_execution:
+            return self._run_feature_dag(features, df, sandbox, fused_results, fingerprint, profiles)
+        return {
+            feature.name: self._run_feature(
+                feature, df, sandbox, fused_results, self._feature_cache_key(feature, fingerprint), profiles,
+            )
+            for feature in features
+        }
 
-        for feature in self.features_v2:
 
-            save_path = f"generated_code/feature_{feature.id}.py"
+    def _run_feature(self, feature, df, sandbox, fused_results, cache_key=None, profiles=None):
+        """Runs one saved feature function on df, returns its result or None. Runs are profiled when profiling is on."""
+        token = FEATURE_PROFILER.start() if self.profile_features else None
+        result, status = self._execute_feature(feature, df, sandbox, fused_results, cache_key)
+        if token is not None:
+            record = FEATURE_PROFILER.finish(token, feature.name, len(df), result, status, store=profiles is None)
+            if profiles is not None:
+                profiles.setdefault(feature.name, []).append(record)
+        return result
 
 
-            # Load and execute the function from the unique file path
-            func = load_single_function(save_path, feature.name)
-            if func:
-                result = execute_single_function(func, df.copy())
-                if result is not None:  # If function succeeded
-                    combined_results = pd.concat([combined_results, result], axis=1)
-                    successful_functions.append(feature.name)
+    def _execute_feature(self, feature, df, sandbox, fused_results, cache_key=None):
+        """
+        Runs one saved feature function on df, cached results are reused.
 
-        # Remove duplicate columns and concatenate the final result
-        combined_results = remove_duplicate_columns(df, combined_results)
+        Returns:
+            tuple: (result, status) where status is "ok", "cached" or "failed".
+        """
+        if cache_key is not None:
+            result = FEATURE_COLUMN_CACHE.get(cache_key)
+            if result is not None:
+                print(f"Feature {feature.name} is up to date, using its cached columns.")
+                return result, "cached"
 
-        final_result_df = pd.concat([df, combined_results, target_column], axis=1)
+        save_path = f"generated_code/feature_{feature.id}.py"
 
-        self.combined_results = combined_results
+        handled = False
+        if sandbox is None:
+            handled, result = execute_fused_output(
+                save_path, feature.name, df, fused_results, code=feature.code or None,
+                copy_free=self.copy_free_execution, memoize=self.memoized_execution,
+            )
+
+        # Load and execute the function, compiled code is reused when it has not changed since generation
+        if not handled:
+            result, _ = load_and_execute_function(
+                save_path, feature.name, df, sandbox, code=feature.code or None,
+                copy_free=self.copy_free_execution,
+                memoize=self.memoized_execution,
+            )
+
+        if cache_key is not None and result is not None:
+            FEATURE_COLUMN_CACHE.put(cache_key, result)
+        return result, "ok" if result is not None else "failed"
+
+
+    def _update_feature_profiles(self):
+        """Saves the profile history and publishes the latest profile of every feature for the feature cards."""
+        if not self.profile_features:
+            return
+        FEATURE_PROFILER.save()
 
+        feature_profiles = {}
+        for feature in self.features_v2:
+            record = FEATURE_PROFILER.latest(feature.name)
+            if record is None:
+                continue
+            slow = is_slow(record, self.slow_feature_rows_per_second)
+            feature_profiles[feature.name] = {
+                "summary": format_profile(record, FEATURE_PROFILER.median_wall_seconds(feature.name)),
+                "slow": slow,
+            }
+            if slow:
+                print(f"Feature {feature.name} is slow: {record['rows_per_second']:,.0f} rows/s.")
+        self.feature_profiles = feature_profiles
+
+
+    def _feature_source(self, feature):
+        """The saved module source of a feature, None if it has no code yet."""
+        if feature.code:
+            return generated_source(feature.code)
+        save_path = f"generated_code/feature_{feature.id}.py"
+        if not os.path.exists(save_path):
+            return None
+        with open(save_path, "r") as f:
+            return f.read()
 
-        print("COMBINED RESULTS DF cols:", combined_results.columns.tolist())
-        print("DF COL LIST:", df.columns.tolist())
-        print("Final results columns:", final_result_df.columns.tolist())
 
-        return final_result_df
+    def _feature_cache_key(self, feature, fingerprint, upstream_keys=()):
+        """The feature column cache key of a feature, None when caching is off or the key can't be built."""
+        source = self._feature_source(feature)
+        if fingerprint is None or source is None or None in upstream_keys:
+            return None
+        return feature_cache_key(
+            fingerprint, self.base_imputation_choices, source_hash(source), feature.name, upstream_keys,
+        )
+
+
+    def _run_feature_dag(self, features_to_run, df, sandbox, fused_results, fingerprint=None, profiles=None) -> dict:
+        """
+        Runs the features in column dependency order, independent features in parallel.
+
+        Features on a dependency cycle, or depending on one, are not run and the cycle is reported
+        in feature_dependency_error.
+
+        Returns:
+            dict: feature name -> result or None, in feature list order.
+        """
+        features = {}
+        for feature in features_to_run:
+            if feature.name in features:
+                print(f"Skipping feature {feature.id}, another feature is already named {feature.name}.")
+                continue
+            features[feature.name] = feature
+
+        nodes = {}
+        for name, feature in features.items():
+            nodes[name] = feature_columns(self._feature_source(feature) or "", name)
+
+        dag = FeatureDAG(nodes, df.columns)
+        self.feature_dependency_error = ""
+        cycle = dag.find_cycle()
+        if cycle:
+            blocked = dag.blocked_by_cycles()
+            self.feature_dependency_error = (
+                f"{FeatureDependencyCycle(cycle)}. Not run: {', '.join(name for name in dag.nodes if name in blocked)}."
+            )
+            print(self.feature_dependency_error)
+            dag = dag.subgraph(set(dag.nodes) - blocked)
+
+        self.feature_execution_order = dag.topological_order()
+        print("Feature execution order:", self.feature_execution_order)
+
+        # A feature's input includes its upstream columns, so their keys are part of its key
+        cache_keys = {}
+        for name in self.feature_execution_order:
+            upstream_keys = [cache_keys[dependency] for dependency in dag.upstream[name]]
+            cache_keys[name] = self._feature_cache_key(features[name], fingerprint, upstream_keys)
+
+        results = run_feature_dag(
+            dag, df,
+            lambda name, input_df: self._run_feature(
+                features[name], input_df, sandbox, fused_results, cache_keys[name], profiles,
+            ),
+            max_workers=self.feature_dag_max_workers,
+        )
+        return {name: results.get(name) for name in features}
 
 
     def run_all_feature_functions_parent(self):
@@ -1541,7 +2459,11 @@ class FeatureFlowState(rx.State):
 
         final_result_df = None
 
-        final_result_df = self.run_all_feature_functions()
+        if self.out_of_core_execution:
+            final_result_df = self.run_all_feature_functions_out_of_core()
+            print(f"Full output of {FEATURE_OUTPUT_DIR} is kept on disk, the final dataset is a preview.")
+        else:
+            final_result_df = self.run_all_feature_functions()
 
 
         # Set the final dataset in the parent function
@@ -1555,6 +2477,10 @@ class FeatureFlowState(rx.State):
         else:
             print("No final DataFrame generated.")
 
+        if self.incremental_execution:
+            print("Feature column cache:", FEATURE_COLUMN_CACHE.snapshot())
+        self._update_feature_profiles()
+
 
     # def generate_all_features(self, type):
     #     print("Running code generation and execution...")
@@ -1668,82 +2594,197 @@ class FeatureFlowState(rx.State):
 
         self.clear_current_generated_code()  # Clear previously generated code file
 
+        self._materialize_base_dataset()
         target_column = self.base_dataset[self.target_var]
-        df = self.base_dataset.drop(columns=[self.target_var])
+        df = self._feature_input_frame()
         
         # CODE_GEN vars 
         df_sample = df_sampler(df)        
-        successful_functions = []
-        combined_results = pd.DataFrame()
+        context_selector = self._context_selector(df)
+        results_accumulator = ColumnAccumulator(df, target_column)
+
+        if self.fused_codegen:
+            jobs = [
+                (feature.feature_name, feature.description, f"generated_code/feature_{feature.id}.py")
+                for feature in self.features
+            ]
+            options = dict(
+                documentation=self.db_table_comments,
+                df_sample=df_sample,
+                df=df,
+                type=type,
+                model=self.llm_to_use,
+                bypass_cache=self.bypass_code_gen_cache,
+                context_selector=context_selector,
+                repair=self.codegen_repair_mode,
+                router=self._model_router(),
+                sandbox=self._sandbox_executor(),
+                copy_free=self.copy_free_execution,
+                memoize=self.memoized_execution,
+            )
+
+            for group in group_jobs_by_source_columns(jobs, df.columns):
+                batch = [jobs[index] for index in group]
+                if len(batch) > 1:
+                    results = generate_fused_feature_code(batch, **options)
+                else:
+                    feature_name, description, save_path = batch[0]
+                    results = [generate_feature_code(feature_name, description, save_path=save_path, **options)]
+
+                for (feature_name, _, _), (code, result) in zip(batch, results):
+                    results_accumulator.add(feature_name, result)  # Failed functions return None and are skipped
+
+            return self._combine_feature_results(results_accumulator)
+
+        if self.batched_codegen:
+            jobs = [
+                (feature.feature_name, feature.description, f"generated_code/feature_{feature.id}.py")
+                for feature in self.features
+            ]
+            batch_size = max(1, self.codegen_batch_size)
+
+            for i in range(0, len(jobs), batch_size):
+                batch = jobs[i:i + batch_size]
+                results = generate_feature_code_batch(
+                    batch,
+                    documentation=self.db_table_comments,
+                    df_sample=df_sample,
+                    df=df,
+                    type=type,
+                    model=self.llm_to_use,
+                    bypass_cache=self.bypass_code_gen_cache,
+                    context_selector=context_selector,
+                    repair=self.codegen_repair_mode,
+                    router=self._model_router(),
+                    sandbox=self._sandbox_executor(),
+                    copy_free=self.copy_free_execution,
+                    memoize=self.memoized_execution,
+                )
+                for (feature_name, _, _), (code, result) in zip(batch, results):
+                    results_accumulator.add(feature_name, result)  # Failed functions return None and are skipped
 
-        for feature in self.features:
-            retries = 0
-            success = False
+            return self._combine_feature_results(results_accumulator)
 
+        for feature in self.features:
             # Define a unique save path for each feature
             save_path = f"generated_code/feature_{feature.id}.py"
 
-            while retries < MAX_RETRIES and not success:
-                print("Feature:", feature.description)
-                print("Try number:", retries)
-
-                # Invoke the code generation chain based on the specified type
-                if type == 'v2':
-                    output = CODE_GEN_CHAIN_V2.invoke({
-                        "feature_name": feature.feature_name,
-                        "request": feature.description,
-                        "documentation": self.db_table_comments,
-                        "table_sample": df_sample,
-                    })
-                else: 
-                    output = CODE_GEN_CHAIN_V3.invoke(
-                        {
-                            "feature_name": feature.feature_name,
-                            "request": feature.description,
-                            "documentation": self.db_table_comments,
-                            "table_sample": df_sample,
-                        },
-                        model=self.llm_to_use
-                    )
-
-                print("\n\ncode gen chain output:")
-                print(output)
-
-                # Extract code based on the chain version
-                code = extract_code_from_content_v2(output) if type == 'v2' else extract_code_from_content_v3(output)
-                print("\nExtracted code:")
-                print(code)
-
-                if not code:
-                    print(f"Retrying Feature {feature.feature_name} due to missing code.")
-                    retries += 1 
-                    continue  # Retry if no code was generated
-
-                # Save the code to the unique file path for this feature
-                save_generated_code(code=code, file_path=save_path)
-
-                # Load and execute the function from the unique file path
-                func = load_single_function(save_path, feature.feature_name)
-                if func:
-                    result = execute_single_function(func, df.copy())
-                    if result is not None:  # If function succeeded
-                        combined_results = pd.concat([combined_results, result], axis=1)
-                        successful_functions.append(feature.feature_name)
-                        success = True
-                    else:
-                        retries += 1
-                        print(f"Retry {retries} for feature {feature.feature_name}")
-                else:
-                    print(f"Function {feature.feature_name} could not be loaded.")
-                    break
+            code, result = generate_feature_code(
+                feature_name=feature.feature_name,
+                description=feature.description,
+                documentation=self.db_table_comments,
+                df_sample=df_sample,
+                df=df,
+                save_path=save_path,
+                type=type,
+                model=self.llm_to_use,
+                bypass_cache=self.bypass_code_gen_cache,
+                context_selector=context_selector,
+                repair=self.codegen_repair_mode,
+                router=self._model_router(),
+                sandbox=self._sandbox_executor(),
+                copy_free=self.copy_free_execution,
+                memoize=self.memoized_execution,
+            )
+
+            results_accumulator.add(feature.feature_name, result)  # Failed functions return None and are skipped
+
+        return self._combine_feature_results(results_accumulator)
+
+
+    async def generate_all_features_concurrently(self, type):
+        """Same as generate_all_features, but every feature is generated as an independent task."""
+        print(f"Running concurrent code generation and execution (max {self.codegen_max_concurrency} at a time)...")
+
+        self.clear_current_generated_code()  # Clear previously generated code file
+
+        await self._await_base_dataset()
+        target_column = self.base_dataset[self.target_var]
+        df = self._feature_input_frame()
+
+        # CODE_GEN vars 
+        df_sample = df_sampler(df)
+        jobs = [
+            (feature.feature_name, feature.description, f"generated_code/feature_{feature.id}.py")
+            for feature in self.features
+        ]
+
+        results = await generate_features_concurrently(
+            jobs,
+            documentation=self.db_table_comments,
+            df_sample=df_sample,
+            df=df,
+            type=type,
+            model=self.llm_to_use,
+            max_concurrency=self.codegen_max_concurrency,
+            bypass_cache=self.bypass_code_gen_cache,
+            batch_size=self.codegen_batch_size if self.batched_codegen else 1,
+            context_selector=self._context_selector(df),
+            repair=self.codegen_repair_mode,
+            router=self._model_router(),
+            sandbox=self._sandbox_executor(),
+            copy_free=self.copy_free_execution,
+            memoize=self.memoized_execution,
+            fuse=self.fused_codegen,
+        )
+
+        # Merge the results once every feature has finished
+        results_accumulator = ColumnAccumulator(df, target_column)
+        for (feature_name, _, _), (_, result) in zip(jobs, results):
+            results_accumulator.add(feature_name, result)
+
+        return self._combine_feature_results(results_accumulator)
+
+
+    def _feature_input_frame(self) -> pd.DataFrame:
+        """The base dataset without the target column, a read-only view in copy-free mode instead of a copy."""
+        if self.copy_free_execution:
+            df, bytes_copied = read_only_view(self.base_dataset, drop_columns=[self.target_var])
+        else:
+            df = self.base_dataset.drop(columns=[self.target_var])
+            bytes_copied = frame_nbytes(df)
+        EXECUTION_COPY_TRACKER.record(INPUT_FRAME_KEY, bytes_copied)
+        return df
+
+
+    def _sandbox_executor(self):
+        """The shared sandbox executor when sandboxed execution is on, otherwise None."""
+        return get_sandbox_executor() if self.sandboxed_execution else None
 
-        # Remove duplicate columns and concatenate the final result
-        combined_results = remove_duplicate_columns(df, combined_results)
-        final_result_df = pd.concat([df, combined_results, target_column], axis=1)
+
+    def _model_router(self):
+        """The shared model router when hedged routing is on, otherwise None."""
+        return MODEL_ROUTER if self.hedged_routing else None
+
+
+    def _context_selector(self, df):
+        """Builds the column relevance selector for df, or None when context pruning is off."""
+        if not self.prune_prompt_context:
+            return None
+
+        data_types = self.db_table_data_type_dict or {}
+        descriptions = self.db_table_descriptions_dict or {}
+        column_metadata = [
+            (col, data_types.get(col, str(df[col].dtype)), descriptions.get(col, "No comment provided."))
+            for col in df.columns
+        ]
+
+        return ColumnContextSelector(
+            df,
+            column_metadata,
+            column_docs=load_column_docs(table=self.db_table),
+            top_k=self.context_top_k,
+            token_budget=self.context_token_budget,
+        )
+
+
+    def _combine_feature_results(self, results_accumulator: ColumnAccumulator):
+        # Duplicate columns were dropped as results were added, the final frame is built once
+        final_result_df, combined_results = results_accumulator.build()
         self.combined_results = combined_results
 
         print("COMBINED RESULTS DF cols:", combined_results.columns.tolist())
-        print("DF COL LIST:", df.columns.tolist())
+        print("DF COL LIST:", results_accumulator.df.columns.tolist())
         print("Final results columns:", final_result_df.columns.tolist())
 
         return final_result_df
@@ -1751,7 +2792,8 @@ class FeatureFlowState(rx.State):
 
 
     
-    def run_code_gen_and_execution_parent(self):
+
+    async def run_code_gen_and_execution_parent(self):
         """Parent function to try V3 first with a timeout, and fall back to V2 if necessary."""
 
         final_result_df = None
@@ -1767,7 +2809,12 @@ class FeatureFlowState(rx.State):
             #final_result_df = self.run_code_gen_and_execution_v3()
             type = 'v3'
 
-        final_result_df = self.generate_all_features(type=type)
+        if self.concurrent_codegen:
+            final_result_df = await self.generate_all_features_concurrently(type=type)
+        else:
+            # The sync path would block the event loop while a lazily loading full table downloads
+            await self._await_base_dataset()
+            final_result_df = self.generate_all_features(type=type)
 
 
         # Set the final dataset in the parent function
@@ -1781,6 +2828,9 @@ class FeatureFlowState(rx.State):
         else:
             print("No final DataFrame generated.")
 
+        print("LLM scheduler metrics:", LLM_SCHEDULER.snapshot())
+        print("Bytes copied for execution:", EXECUTION_COPY_TRACKER.snapshot())
+
 
 
     async def test_code_gen_and_execution(self): 
@@ -1793,7 +2843,7 @@ class FeatureFlowState(rx.State):
         self.add_feature("mileage_over_10000", """Give me a field that indicates True when the vehicle has more than 10000 miles on it. Use the mileage field.""")
         self.add_feature("american_brand", """Create a field to indicate that a vehicle was made by an American company""")
 
-        self.run_code_gen_and_execution_parent()
+        await self.run_code_gen_and_execution_parent()
         
 
         return True 
@@ -0,0 +1,265 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import pandas as pd
+import psutil
+
+
+# File the rolling profile history is persisted to
+FEATURE_PROFILE_PATH = os.environ.get("FEATURE_PROFILE_PATH", ".feature_profiles.json")
+
+# Runs kept per feature in the rolling history
+FEATURE_PROFILE_HISTORY = int(os.environ.get("FEATURE_PROFILE_HISTORY", "20"))
+
+# Features processing fewer rows per second than this are flagged as slow
+FEATURE_SLOW_ROWS_PER_SECOND = float(os.environ.get("FEATURE_SLOW_ROWS_PER_SECOND", "200000"))
+
+# Seconds between resident memory samples while a feature runs
+FEATURE_PROFILE_SAMPLE_SECONDS = 0.005
+
+
+class PeakMemorySampler:
+    """
+    Samples the resident memory of this process on one background thread shared by every run.
+
+    Allocation tracing with tracemalloc slows string-heavy pandas code several times, sampling
+    doesn't. The thread only runs while at least one run is measured. Memory is per process, so
+    features running at the same time share their peaks.
+    """
+
+    def __init__(self, interval: float = FEATURE_PROFILE_SAMPLE_SECONDS):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.lock = threading.Lock()
+        self.watchers = {}  # watch id -> [start rss, peak rss]
+        self.next_id = 0
+        self.thread = None
+
+    def watch(self) -> int:
+        """Starts tracking the peak from the current memory, returns the id to pass to stop."""
+        rss = self.process.memory_info().rss
+        with self.lock:
+            watch_id = self.next_id
+            self.next_id += 1
+            self.watchers[watch_id] = [rss, rss]
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.sample, daemon=True, name="feature-profiler")
+                self.thread.start()
+        return watch_id
+
+    def sample(self):
+        while True:
+            time.sleep(self.interval)
+            rss = self.process.memory_info().rss
+            with self.lock:
+                if not self.watchers:
+                    self.thread = None
+                    return
+                for watcher in self.watchers.values():
+                    watcher[1] = max(watcher[1], rss)
+
+    def stop(self, watch_id: int) -> float:
+        """Stops tracking and returns the peak increase over the starting memory in MB."""
+        rss = self.process.memory_info().rss
+        with self.lock:
+            start_rss, peak_rss = self.watchers.pop(watch_id)
+        return (max(peak_rss, rss) - start_rss) / 1024 ** 2
+
+
+def describe_result(result):
+    """The output dtypes and the mean null ratio of a feature result."""
+    if result is None:
+        return "", None
+    if isinstance(result, pd.Series):
+        result = result.to_frame()
+    dtypes = ", ".join(sorted({str(dtype) for dtype in result.dtypes}))
+    null_ratio = float(result.isnull().to_numpy().mean()) if result.size else 0.0
+    return dtypes, null_ratio
+
+
+class FeatureProfiler:
+    """
+    Records how each feature function performed per run and keeps a rolling history on disk.
+
+    Every record has the wall time, the CPU time of the thread that ran the feature, the peak
+    resident memory increase, rows per second, output dtypes, null ratio and whether the result
+    came from the feature column cache or failed.
+    """
+
+    def __init__(self, path: str = FEATURE_PROFILE_PATH, history: int = FEATURE_PROFILE_HISTORY):
+        self.path = path
+        self.history = history
+        self.lock = threading.Lock()
+        self.profiles = None  # feature name -> deque of records, loaded on first use
+        self.sampler = PeakMemorySampler()
+
+    def load(self):
+        if self.profiles is not None:
+            return
+        profiles = {}
+        try:
+            with open(self.path, "r") as f:
+                for name, records in json.load(f).items():
+                    profiles[name] = deque(records, maxlen=self.history)
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        self.profiles = profiles
+
+    def start(self):
+        """Starts measuring a feature run, pass the returned token to finish."""
+        return time.perf_counter(), time.thread_time(), self.sampler.watch()
+
+    def finish(self, token, feature_name: str, rows: int, result, status: str = None, store: bool = True) -> dict:
+        """
+        Records a feature run.
+
+        Parameters:
+            token: What start returned.
+            feature_name (str): The feature.
+            rows (int): Rows of the input frame.
+            result: The feature result, None if it failed.
+            status (str): "ok", "cached" or "failed", derived from result when not given.
+            store (bool): Add the record to the history, False for a part of a run, see merge_records.
+
+        Returns:
+            dict: The record.
+        """
+        wall_start, cpu_start, watch_id = token
+        wall_seconds = time.perf_counter() - wall_start
+        cpu_seconds = time.thread_time() - cpu_start
+        peak_mb = self.sampler.stop(watch_id)
+        dtypes, null_ratio = describe_result(result)
+
+        record = {
+            "run_at": time.time(),
+            "status": status or ("ok" if result is not None else "failed"),
+            "wall_seconds": round(wall_seconds, 4),
+            "cpu_seconds": round(cpu_seconds, 4),
+            "peak_memory_mb": round(max(peak_mb, 0.0), 1),
+            "rows": rows,
+            "rows_per_second": round(rows / wall_seconds, 1) if wall_seconds > 0 else None,
+            "dtypes": dtypes,
+            "null_ratio": None if null_ratio is None else round(null_ratio, 4),
+        }
+        if store:
+            self.add(feature_name, record)
+        return record
+
+    def add(self, feature_name: str, record: dict):
+        """Adds a record to the feature's history."""
+        with self.lock:
+            self.load()
+            self.profiles.setdefault(feature_name, deque(maxlen=self.history)).append(record)
+
+    def latest(self, feature_name: str):
+        with self.lock:
+            self.load()
+            records = self.profiles.get(feature_name)
+            return dict(records[-1]) if records else None
+
+    def median_wall_seconds(self, feature_name: str):
+        """Median wall time over the executed runs in the history, cached and failed runs excluded."""
+        with self.lock:
+            self.load()
+            times = sorted(r["wall_seconds"] for r in self.profiles.get(feature_name, ()) if r["status"] == "ok")
+        return times[len(times) // 2] if times else None
+
+    def save(self):
+        """Writes the history to disk, keeping the previous file if writing fails."""
+        with self.lock:
+            self.load()
+            data = {name: list(records) for name, records in self.profiles.items()}
+        tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Feature profiles could not be saved: {e}")
+
+    def clear(self):
+        with self.lock:
+            self.profiles = {}
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def merge_records(records: list) -> dict:
+    """
+    Combines the records of one feature over the row batches of a run into a single run record.
+
+    Times and rows add up, the peak memory is the highest batch peak and the null ratio is
+    weighted by rows. The run counts as failed only if every batch failed.
+    """
+    rows = sum(record["rows"] for record in records)
+    wall_seconds = sum(record["wall_seconds"] for record in records)
+    executed = [record for record in records if record["status"] != "failed"]
+    with_nulls = [record for record in executed if record["null_ratio"] is not None]
+    null_rows = sum(record["rows"] for record in with_nulls)
+
+    if not executed:
+        status = "failed"
+    elif all(record["status"] == "cached" for record in executed):
+        status = "cached"
+    else:
+        status = "ok"
+
+    return {
+        "run_at": records[0]["run_at"],
+        "status": status,
+        "wall_seconds": round(wall_seconds, 4),
+        "cpu_seconds": round(sum(record["cpu_seconds"] for record in records), 4),
+        "peak_memory_mb": max(record["peak_memory_mb"] for record in records),
+        "rows": rows,
+        "rows_per_second": round(rows / wall_seconds, 1) if wall_seconds > 0 else None,
+        "dtypes": ", ".join(sorted({dtype for record in executed for dtype in record["dtypes"].split(", ") if dtype})),
+        "null_ratio": (
+            round(sum(record["null_ratio"] * record["rows"] for record in with_nulls) / null_rows, 4)
+            if null_rows else None
+        ),
+        "batches": len(records),
+        "failed_batches": len(records) - len(executed),
+    }
+
+
+def is_slow(record: dict, threshold: float = FEATURE_SLOW_ROWS_PER_SECOND) -> bool:
+    """True if an executed run processed fewer rows per second than threshold."""
+    return (
+        record is not None
+        and record["status"] == "ok"
+        and record["rows_per_second"] is not None
+        and record["rows_per_second"] < threshold
+    )
+
+
+def format_profile(record: dict, median_wall_seconds: float = None) -> str:
+    """One line summary of a profile record for the feature cards."""
+    if record is None:
+        return ""
+    if record["status"] == "cached":
+        return f"Cached, {record['wall_seconds'] * 1000:.0f} ms to load"
+    if record["status"] == "failed":
+        return f"Failed after {record['wall_seconds']:.2f}s"
+
+    parts = [
+        f"{record['wall_seconds']:.2f}s wall",
+        f"{record['cpu_seconds']:.2f}s CPU",
+        f"+{record['peak_memory_mb']:.0f} MB peak",
+        f"{record['rows_per_second']:,.0f} rows/s" if record["rows_per_second"] else "",
+        record["dtypes"],
+        f"{record['null_ratio']:.1%} null" if record["null_ratio"] is not None else "",
+    ]
+    if record.get("failed_batches"):
+        parts.append(f"failed on {record['failed_batches']} of {record['batches']} batches")
+    if median_wall_seconds is not None:
+        parts.append(f"median {median_wall_seconds:.2f}s")
+    return " · ".join(part for part in parts if part)
+
+
+# Profiles of every feature run in this process
+FEATURE_PROFILER = FeatureProfiler()
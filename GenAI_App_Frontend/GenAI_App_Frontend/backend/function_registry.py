@@ -0,0 +1,94 @@
+import builtins
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+
+# Compiled generated modules kept in memory before the least recently used are dropped
+FUNCTION_REGISTRY_MAX_ENTRIES = int(os.environ.get("FUNCTION_REGISTRY_MAX_ENTRIES", "1000"))
+
+
+def source_hash(source: str) -> str:
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+class CompiledFunctionRegistry:
+    """
+    In-memory registry of compiled generated code, keyed by the hash of the source.
+
+    Source is compiled and executed once into its own namespace. Loading the same code again,
+    from a string or from its file, returns the already compiled function, so re-running features
+    does not re-parse them or re-run their module-level imports. Changed code has a new hash and
+    is compiled on first use.
+    """
+
+    def __init__(self, max_entries: int = FUNCTION_REGISTRY_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.namespaces = OrderedDict()  # source hash -> module namespace, least recently used first
+        self.sources = {}  # source hash -> source
+        self.lock = threading.Lock()
+        self.compiles = 0
+        self.hits = 0
+
+    def namespace(self, source: str, filename: str = "<generated>") -> dict:
+        """
+        Returns the executed module namespace of source, compiling it the first time it is seen.
+
+        Parameters:
+            source (str): The Python source of the generated module.
+            filename (str): File name shown in tracebacks, the artifact the source was saved to.
+
+        Returns:
+            dict: The module globals. Compile and import errors are raised and nothing is cached.
+        """
+        key = source_hash(source)
+        with self.lock:
+            namespace = self.namespaces.get(key)
+            if namespace is not None:
+                self.namespaces.move_to_end(key)
+                self.hits += 1
+                return namespace
+
+        # Compiled outside the lock, module-level code may be slow. A concurrent compile of the
+        # same source is harmless, the last one wins.
+        namespace = {"__name__": f"generated_{key}", "__file__": filename, "__builtins__": builtins}
+        exec(compile(source, filename, "exec"), namespace)
+
+        with self.lock:
+            self.compiles += 1
+            self.namespaces[key] = namespace
+            self.sources[key] = source
+            while len(self.namespaces) > self.max_entries:
+                evicted, _ = self.namespaces.popitem(last=False)
+                self.sources.pop(evicted, None)
+        return namespace
+
+    def function(self, source: str, function_name: str, filename: str = "<generated>"):
+        """The function named function_name defined by source, or None if it defines no such function."""
+        return self.namespace(source, filename).get(function_name)
+
+    def load_file(self, file_path: str, function_name: str):
+        """Reads a saved module and returns function_name from it, recompiling only if the file changed."""
+        with open(file_path, "r") as f:
+            source = f.read()
+        return self.function(source, function_name, filename=file_path)
+
+    def source_of(self, func):
+        """The source a registry function was compiled from, None for other functions."""
+        module = getattr(func, "__module__", None) or ""
+        with self.lock:
+            return self.sources.get(module[len("generated_"):]) if module.startswith("generated_") else None
+
+    def clear(self):
+        with self.lock:
+            self.namespaces.clear()
+            self.sources.clear()
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {"entries": len(self.namespaces), "compiles": self.compiles, "hits": self.hits}
+
+
+# Registry shared by the generation and re-run paths of this process
+FUNCTION_REGISTRY = CompiledFunctionRegistry()
@@ -0,0 +1,101 @@
+import asyncio
+import os
+import random
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+
+# Rows loaded up front for the preview, the imputation options and code generation prompts
+LAZY_SAMPLE_ROWS = int(os.environ.get("LAZY_SAMPLE_ROWS", "1000"))
+
+# "limit" previews the first rows, "tablesample" lets the warehouse pick rows across the table
+LAZY_SAMPLE_METHOD = os.environ.get("LAZY_SAMPLE_METHOD", "limit")
+
+# Full tables loaded in the background at the same time
+LAZY_LOAD_WORKERS = int(os.environ.get("LAZY_LOAD_WORKERS", "2"))
+
+
+def sample_query(table_name: str, rows: int = LAZY_SAMPLE_ROWS, method: str = LAZY_SAMPLE_METHOD) -> str:
+    """
+    Builds the query for a sample of a table, pushed down to the warehouse.
+
+    Parameters:
+        table_name (str): Fully qualified table name.
+        rows (int): Rows in the sample.
+        method (str): "limit" or "tablesample".
+
+    Returns:
+        str: The SQL query.
+    """
+    if method == "tablesample":
+        return f"SELECT * FROM {table_name} TABLESAMPLE ({rows} ROWS)"
+    return f"SELECT * FROM {table_name} LIMIT {rows}"
+
+
+def sample_arrow_table(table, rows: int = LAZY_SAMPLE_ROWS, method: str = LAZY_SAMPLE_METHOD):
+    """
+    Same sample as sample_query, taken from an Arrow table already on this machine.
+
+    "tablesample" picks rows uniformly across the table, in table order, "limit" takes the first rows.
+    """
+    if method == "tablesample" and table.num_rows > rows:
+        return table.take(sorted(random.sample(range(table.num_rows), rows)))
+    return table.slice(0, rows)
+
+
+class PendingDatasets:
+    """
+    Full datasets loading in the background, by handle.
+
+    State keeps only the handle string, the futures stay in this process. A handle is released
+    once its dataset was taken, or discarded when another dataset replaces it.
+    """
+
+    def __init__(self, max_workers: int = LAZY_LOAD_WORKERS):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="lazy-dataset")
+        self.lock = threading.Lock()
+        self.futures = {}
+
+    def start(self, load) -> str:
+        """
+        Starts loading a dataset in the background.
+
+        Parameters:
+            load: Callable () -> pd.DataFrame.
+
+        Returns:
+            str: The handle to wait on.
+        """
+        handle = uuid.uuid4().hex
+        future = self.executor.submit(load)
+        with self.lock:
+            self.futures[handle] = future
+        return handle
+
+    def result(self, handle: str) -> pd.DataFrame:
+        """Blocks until the dataset is loaded and releases the handle. Load errors are raised here."""
+        with self.lock:
+            future = self.futures[handle]
+        df = future.result()
+        self.discard(handle)
+        return df
+
+    async def wait(self, handle: str):
+        """Waits for the dataset without blocking the event loop, result() then returns immediately."""
+        with self.lock:
+            future = self.futures[handle]
+        await asyncio.wrap_future(future)
+
+    def discard(self, handle: str):
+        """Forgets a dataset, a load that hasn't started yet is cancelled."""
+        with self.lock:
+            future = self.futures.pop(handle, None)
+        if future is not None:
+            future.cancel()
+
+
+# Base datasets of every session still loading in this process
+PENDING_DATASETS = PendingDatasets()
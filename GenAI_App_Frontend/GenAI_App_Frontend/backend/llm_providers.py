@@ -0,0 +1,216 @@
+import asyncio
+import concurrent.futures
+import os
+import queue
+import threading
+
+import httpx
+from dotenv import load_dotenv
+from openai import AsyncOpenAI
+
+from .llm_scheduler import LLM_SCHEDULER, LLMScheduler, estimate_request_tokens
+
+load_dotenv()
+
+
+# Databricks token and serving endpoint base URL
+DATABRICKS_TOKEN = os.environ.get("DATABRICKS_TOKEN")
+DATABRICKS_ENDPOINT = os.environ.get(
+    "DATABRICKS_ENDPOINT", "https://dbc-bfc39191-ad8d.cloud.databricks.com/serving-endpoints"
+)
+
+# OpenAI base URL, None uses the public API
+OPENAI_API_BASE = os.environ.get("OPENAI_API_BASE") or None
+
+# Seconds allowed to open a connection to a provider
+LLM_CONNECT_TIMEOUT = float(os.environ.get("LLM_CONNECT_TIMEOUT", "5"))
+
+# Seconds allowed between two reads, i.e. between streamed tokens
+LLM_READ_TIMEOUT = float(os.environ.get("LLM_READ_TIMEOUT", "60"))
+
+# Connection pool shared by every provider
+LLM_MAX_CONNECTIONS = int(os.environ.get("LLM_MAX_CONNECTIONS", "64"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("LLM_MAX_KEEPALIVE_CONNECTIONS", "32"))
+LLM_KEEPALIVE_EXPIRY = 60.0
+
+# Seconds between checks of a request's cancel_event while waiting on the I/O loop
+LLM_CANCEL_POLL_SECONDS = 0.1
+
+# Marks the end of a streamed response in the token queue
+STREAM_END = object()
+
+
+class LLMEventLoop:
+    """
+    Background event loop that owns the async HTTP clients.
+
+    All provider I/O runs on this loop, so many requests share one keep-alive connection pool and
+    progress concurrently. Async callers await the result without blocking their own loop, worker
+    threads block only on their own request.
+    """
+
+    def __init__(self):
+        self.loop = None
+        self.thread = None
+        self.http_client = None
+        self.lock = threading.Lock()
+
+    def ensure_started(self):
+        with self.lock:
+            if self.loop is not None:
+                return self.loop
+
+            loop = asyncio.new_event_loop()
+            started = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(started.set)
+                loop.run_forever()
+
+            self.thread = threading.Thread(target=run, name="llm-io-loop", daemon=True)
+            self.thread.start()
+            started.wait()
+            self.loop = loop
+            return loop
+
+    def submit(self, coroutine):
+        """Schedules a coroutine on the loop and returns its concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.ensure_started())
+
+    def shared_http_client(self) -> httpx.AsyncClient:
+        """The pooled HTTP client, created on the loop the first time a provider needs it."""
+        if self.http_client is None:
+            self.http_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(LLM_READ_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+                ),
+            )
+        return self.http_client
+
+
+LLM_EVENT_LOOP = LLMEventLoop()
+
+
+class LLMProvider:
+    """OpenAI-compatible chat completions provider backed by the shared connection pool."""
+
+    def __init__(self, name: str, base_url: str = None, api_key: str = None, event_loop: LLMEventLoop = LLM_EVENT_LOOP,
+                 scheduler: LLMScheduler = LLM_SCHEDULER):
+        """
+        Parameters:
+            name (str): Provider name used in logs.
+            base_url (str): API base URL, None for the public OpenAI API.
+            api_key (str): API key, None reads OPENAI_API_KEY.
+            event_loop (LLMEventLoop): Loop the requests run on.
+            scheduler (LLMScheduler): Rate-limit scheduler every request is queued on.
+        """
+        self.name = name
+        self.base_url = base_url
+        self.api_key = api_key
+        self.event_loop = event_loop
+        self.scheduler = scheduler
+        self.async_client = None
+
+    def client(self) -> AsyncOpenAI:
+        # Only called from the I/O loop, so no locking is needed
+        if self.async_client is None:
+            self.async_client = AsyncOpenAI(
+                base_url=self.base_url,
+                api_key=self.api_key or os.environ.get("OPENAI_API_KEY"),
+                http_client=self.event_loop.shared_http_client(),
+                max_retries=0,  # 429s and timeouts are retried by the scheduler
+            )
+        return self.async_client
+
+    async def _complete(self, messages: list, model: str, **params) -> str:
+        async def request():
+            response = await self.client().chat.completions.create(messages=messages, model=model, **params)
+            return response.choices[0].message.content
+
+        estimated_tokens = estimate_request_tokens(messages, params.get("max_tokens"))
+        return await self.scheduler.run(model, estimated_tokens, request)
+
+    async def _stream_to_queue(self, messages: list, model: str, tokens: queue.Queue, **params):
+        received = False
+
+        async def request():
+            nonlocal received
+            stream = await self.client().chat.completions.create(messages=messages, model=model, stream=True, **params)
+            try:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        received = True
+                        tokens.put(chunk.choices[0].delta.content)
+            finally:
+                await stream.close()  # Returns the connection to the pool, also when cancelled
+
+        try:
+            estimated_tokens = estimate_request_tokens(messages, params.get("max_tokens"))
+            # A stream that already produced tokens can't be retried without duplicating them
+            await self.scheduler.run(model, estimated_tokens, request, can_retry=lambda: not received)
+        except Exception as e:
+            tokens.put(e)
+        finally:
+            tokens.put(STREAM_END)
+
+    def complete(self, messages: list, model: str, cancel_event=None, **params) -> str:
+        """
+        Blocking chat completion for worker threads.
+
+        Parameters:
+            messages (list of dict): Chat messages with role and content.
+            model (str): The model or serving endpoint name.
+            cancel_event (threading.Event): Cancels the request on the I/O loop as soon as it is set.
+            **params: Extra completion parameters, e.g. max_tokens or temperature.
+
+        Returns:
+            str: The response content, empty if the request was cancelled.
+        """
+        future = self.event_loop.submit(self._complete(messages, model, **params))
+        if cancel_event is None:
+            return future.result()
+
+        while True:
+            try:
+                return future.result(timeout=LLM_CANCEL_POLL_SECONDS)
+            except concurrent.futures.TimeoutError:
+                if cancel_event.is_set():
+                    future.cancel()  # Cancels the task on the loop, which closes the request
+                    return ""
+
+    def stream(self, messages: list, model: str, cancel_event=None, **params):
+        """
+        Blocking token generator for worker threads.
+
+        Closing the generator early, or setting cancel_event, cancels the request on the I/O loop and
+        releases its connection, also while waiting for the next token.
+
+        Yields:
+            str: Response content tokens.
+        """
+        tokens = queue.Queue()
+        future = self.event_loop.submit(self._stream_to_queue(messages, model, tokens, **params))
+        try:
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                try:
+                    token = tokens.get(timeout=LLM_CANCEL_POLL_SECONDS)
+                except queue.Empty:
+                    continue
+                if token is STREAM_END:
+                    break
+                if isinstance(token, Exception):
+                    raise token
+                yield token
+        finally:
+            future.cancel()
+
+
+# Shared providers used by every code generation chain
+OPENAI_PROVIDER = LLMProvider("openai", base_url=OPENAI_API_BASE)
+DATABRICKS_PROVIDER = LLMProvider("databricks", base_url=DATABRICKS_ENDPOINT, api_key=DATABRICKS_TOKEN)
@@ -0,0 +1,232 @@
+import asyncio
+import os
+import time
+from collections import deque
+
+import openai
+
+
+# Token-per-minute budget for each model, prompt plus maximum output tokens
+RATE_LIMIT_TOKENS_PER_MINUTE = {
+    "gpt-4o-mini": 200000,
+}
+RATE_LIMIT_DEFAULT_TOKENS_PER_MINUTE = int(os.environ.get("LLM_TOKENS_PER_MINUTE", "100000"))
+
+# Concurrent requests per model: starts at the initial value, grows by one for every window
+# of successful requests and is halved on a 429 or timeout
+RATE_LIMIT_INITIAL_CONCURRENCY = 4
+RATE_LIMIT_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "16"))
+
+# Throttled requests are retried this many times before the error is raised
+RATE_LIMIT_MAX_RETRIES = 4
+
+# Backoff used when a throttled response has no Retry-After header, doubled on every retry
+RATE_LIMIT_BASE_BACKOFF = 1.0
+RATE_LIMIT_MAX_BACKOFF = 30.0
+
+# Number of recent requests the wait-time metrics are computed over
+RATE_LIMIT_METRICS_WINDOW = 200
+
+# Output tokens assumed when a request does not set max_tokens
+DEFAULT_MAX_OUTPUT_TOKENS = 1024
+
+
+def retry_after_seconds(error: Exception):
+    """Reads the Retry-After (or retry-after-ms) header of a provider error, None if there is none."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+
+    headers = response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        return None  # HTTP-date form, fall back to exponential backoff
+    return None
+
+
+def is_throttling_error(error: Exception) -> bool:
+    """True for errors that mean the provider is overloaded: 429s and timeouts."""
+    return isinstance(error, (openai.RateLimitError, openai.APITimeoutError, asyncio.TimeoutError))
+
+
+def estimate_request_tokens(messages: list, max_tokens: int = None) -> int:
+    """Approximate prompt tokens (about 4 characters per token) plus the output token limit."""
+    prompt_chars = sum(len(str(message.get("content", ""))) for message in messages)
+    return prompt_chars // 4 + (max_tokens or DEFAULT_MAX_OUTPUT_TOKENS)
+
+
+class ModelRateLimiter:
+    """
+    Token bucket and AIMD concurrency limit for one model.
+
+    Only used from the LLM I/O loop, so plain attributes are safe without locks.
+    """
+
+    def __init__(self, model: str, tokens_per_minute: int, initial_concurrency: int = RATE_LIMIT_INITIAL_CONCURRENCY,
+                 max_concurrency: int = RATE_LIMIT_MAX_CONCURRENCY):
+        self.model = model
+        self.capacity = float(tokens_per_minute)
+        self.tokens = float(tokens_per_minute)
+        self.refill_per_second = tokens_per_minute / 60.0
+        self.updated = time.monotonic()
+
+        self.concurrency_limit = float(min(initial_concurrency, max_concurrency))
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.paused_until = 0.0
+
+        self.changed = asyncio.Event()
+        self.wait_times = deque(maxlen=RATE_LIMIT_METRICS_WINDOW)
+        self.requests = 0
+        self.throttled = 0
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+        self.updated = now
+
+    async def acquire(self, tokens: int):
+        """Waits until the model is not paused, has a free concurrency slot and enough budget."""
+        tokens = min(float(tokens), self.capacity)  # A single oversized request must still get through
+        start = time.monotonic()
+        self.queue_depth += 1
+        try:
+            while True:
+                now = time.monotonic()
+                self.refill(now)
+
+                if now < self.paused_until:
+                    delay = self.paused_until - now
+                elif self.in_flight >= int(self.concurrency_limit):
+                    delay = None  # Until a request finishes
+                elif self.tokens < tokens:
+                    delay = (tokens - self.tokens) / self.refill_per_second
+                else:
+                    self.tokens -= tokens
+                    self.in_flight += 1
+                    break
+
+                changed = self.changed
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.queue_depth -= 1
+
+        self.wait_times.append(time.monotonic() - start)
+        self.requests += 1
+
+    def release(self, throttled: bool = False, backoff: float = None):
+        """
+        Frees the slot taken by acquire and adjusts the concurrency limit.
+
+        Parameters:
+            throttled (bool): The request got a 429 or timed out. Halves the concurrency limit.
+            backoff (float): Seconds no new request may start for this model.
+        """
+        self.in_flight -= 1
+
+        if throttled:
+            self.throttled += 1
+            self.concurrency_limit = max(1.0, self.concurrency_limit / 2)
+            if backoff:
+                self.paused_until = max(self.paused_until, time.monotonic() + backoff)
+            print(f"Rate limited on {self.model}: concurrency limit {int(self.concurrency_limit)}, "
+                  f"backing off {backoff or 0:.1f}s.")
+        else:
+            # Additive increase, one extra slot per full window of successful requests
+            self.concurrency_limit = min(float(self.max_concurrency), self.concurrency_limit + 1 / self.concurrency_limit)
+
+        # Wake every waiter so they re-check the new state
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    def snapshot(self) -> dict:
+        waits = sorted(self.wait_times)
+        return {
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "concurrency_limit": int(self.concurrency_limit),
+            "tokens_available": int(self.tokens),
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "wait_mean": sum(waits) / len(waits) if waits else 0.0,
+            "wait_p95": waits[min(len(waits) - 1, int(0.95 * len(waits)))] if waits else 0.0,
+        }
+
+
+class LLMScheduler:
+    """
+    Process-wide scheduler every provider request goes through.
+
+    Requests are queued per model until the model's token bucket and concurrency limit allow them.
+    Throttled requests (429 or timeout) shrink the concurrency limit, pause the model for the
+    Retry-After period (or an exponential backoff) and are retried instead of failing.
+    """
+
+    def __init__(self, tokens_per_minute: dict = None, default_tokens_per_minute: int = RATE_LIMIT_DEFAULT_TOKENS_PER_MINUTE,
+                 max_retries: int = RATE_LIMIT_MAX_RETRIES):
+        self.tokens_per_minute = dict(RATE_LIMIT_TOKENS_PER_MINUTE if tokens_per_minute is None else tokens_per_minute)
+        self.default_tokens_per_minute = default_tokens_per_minute
+        self.max_retries = max_retries
+        self.limiters = {}
+
+    def limiter(self, model: str) -> ModelRateLimiter:
+        if model not in self.limiters:
+            budget = self.tokens_per_minute.get(model, self.default_tokens_per_minute)
+            self.limiters[model] = ModelRateLimiter(model, budget)
+        return self.limiters[model]
+
+    async def run(self, model: str, estimated_tokens: int, request, can_retry=None):
+        """
+        Runs a request once the model has capacity, retrying throttled attempts.
+
+        Parameters:
+            model (str): The model the request is sent to.
+            estimated_tokens (int): Prompt plus maximum output tokens, see estimate_request_tokens.
+            request (callable): Returns a new coroutine performing the request.
+            can_retry (callable): Returns False when a failed attempt must not be retried,
+                                  e.g. because part of a stream was already consumed.
+
+        Returns:
+            The request's result.
+        """
+        limiter = self.limiter(model)
+
+        for attempt in range(self.max_retries + 1):
+            await limiter.acquire(estimated_tokens)
+            try:
+                result = await request()
+            except asyncio.CancelledError:
+                limiter.release()
+                raise
+            except Exception as e:
+                if not is_throttling_error(e):
+                    limiter.release()
+                    raise
+
+                backoff = retry_after_seconds(e)
+                if backoff is None:
+                    backoff = min(RATE_LIMIT_MAX_BACKOFF, RATE_LIMIT_BASE_BACKOFF * 2 ** attempt)
+                limiter.release(throttled=True, backoff=backoff)
+
+                if attempt == self.max_retries or (can_retry is not None and not can_retry()):
+                    raise
+                print(f"Retrying {model} request after {type(e).__name__} (attempt {attempt + 1}).")
+                continue
+
+            limiter.release()
+            return result
+
+    def snapshot(self) -> dict:
+        """Queue depth, wait times and limits for every model seen so far."""
+        return {model: limiter.snapshot() for model, limiter in list(self.limiters.items())}
+
+
+# Shared scheduler used by every provider
+LLM_SCHEDULER = LLMScheduler()
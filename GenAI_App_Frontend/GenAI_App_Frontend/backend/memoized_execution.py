@@ -0,0 +1,245 @@
+import ast
+import functools
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .function_registry import FUNCTION_REGISTRY
+from .readonly_frames import function_key
+
+
+# Memoize only when the source column has at most this many distinct values per row
+MEMO_MAX_UNIQUE_RATIO = float(os.environ.get("MEMO_MAX_UNIQUE_RATIO", "0.5"))
+
+# Distinct rows used to check once that a function really is element-wise, each is used twice
+MEMO_VERIFY_ROWS = 128
+
+# Encoded columns kept so functions reading the same column share one factorization
+MEMO_MAX_ENCODINGS = 8
+
+# DF attributes a memoized function may use besides selecting its source column
+MEMO_ALLOWED_FRAME_ATTRIBUTES = frozenset({"columns", "index", "copy"})
+
+# Methods whose result for a row depends on other rows, a function calling any of them is never memoized
+NON_ELEMENTWISE_METHODS = frozenset({
+    "shift", "diff", "pct_change", "rank", "cumsum", "cumprod", "cummax", "cummin", "rolling", "expanding",
+    "ewm", "groupby", "transform", "mean", "median", "std", "var", "sum", "prod", "min", "max", "quantile",
+    "mode", "count", "nunique", "unique", "value_counts", "duplicated", "drop_duplicates", "sort_values",
+    "sort_index", "ffill", "bfill", "interpolate", "iloc", "head", "tail", "sample", "nlargest", "nsmallest",
+    "idxmin", "idxmax", "describe", "corr", "cov", "shape", "size", "reindex",
+})
+
+
+def frame_parameter(function: ast.FunctionDef):
+    args = function.args.posonlyargs + function.args.args
+    return args[0].arg if args else None
+
+
+def column_names(node: ast.AST):
+    """The column names of DF['a'] or DF[['a', 'b']], None if the selection isn't constant."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return [node.value]
+    if isinstance(node, ast.List) and all(isinstance(e, ast.Constant) and isinstance(e.value, str) for e in node.elts):
+        return [e.value for e in node.elts]
+    return None
+
+
+def elementwise_source_column(source: str, function_name: str):
+    """
+    Statically checks whether a generated function reads a single column and nothing row-dependent.
+
+    Parameters:
+        source (str): The generated module source.
+        function_name (str): The feature function in it.
+
+    Returns:
+        str: The one column the function reads, or None if it is not a memoization candidate.
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return None
+
+    function = next(
+        (node for node in tree.body if isinstance(node, ast.FunctionDef) and node.name == function_name), None
+    )
+    if function is None or frame_parameter(function) is None:
+        return None
+    frame = frame_parameter(function)
+
+    parents = {}
+    for node in ast.walk(function):
+        for child in ast.iter_child_nodes(node):
+            parents[child] = node
+
+    read, written = [], set()
+    for node in ast.walk(function):
+        if isinstance(node, ast.Attribute) and node.attr in NON_ELEMENTWISE_METHODS:
+            return None
+        if not (isinstance(node, ast.Name) and node.id == frame) or isinstance(node.ctx, ast.Store):
+            continue
+
+        parent = parents.get(node)
+        if isinstance(parent, ast.Attribute) and parent.attr in MEMO_ALLOWED_FRAME_ATTRIBUTES:
+            continue
+        if isinstance(parent, ast.Subscript) and parent.value is node:
+            names = column_names(parent.slice)
+            if names is None:
+                return None
+            if isinstance(parent.ctx, ast.Store):
+                written.update(names)
+            else:
+                read.extend(names)
+            continue
+        return None  # DF passed on, iterated, measured or used some other way
+
+    sources = [name for name in dict.fromkeys(read) if name not in written]
+    return sources[0] if len(sources) == 1 else None
+
+
+def factorize_column(series: pd.Series):
+    """
+    Dictionary-encodes a column.
+
+    Returns:
+        tuple: (codes, representatives) where representatives holds one row position per distinct
+               value, nulls included, and codes maps every row to its distinct value.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)  # Categoricals are factorized by their codes
+    representatives = np.empty(len(uniques), dtype=np.intp)
+    representatives[codes] = np.arange(len(codes))  # Any position of a value represents it
+    return codes, representatives
+
+
+def broadcast(result, codes: np.ndarray, distinct: int, index: pd.Index):
+    """Expands a result computed on the distinct values back to every row, None if its shape doesn't allow it."""
+    if not isinstance(result, (pd.DataFrame, pd.Series)) or len(result) != distinct:
+        return None
+    if not result.index.equals(pd.RangeIndex(distinct)):
+        return None
+    expanded = result.take(codes)
+    expanded.index = index
+    return expanded
+
+
+def run_on_distinct_values(func, series: pd.Series, column: str, index: pd.Index = None):
+    """Runs func once per distinct value of series and broadcasts the result, None if it can't be broadcast."""
+    codes, representatives = factorize_column(series)
+    distinct = series.iloc[representatives].to_frame(name=column).reset_index(drop=True)
+    return broadcast(func(distinct), codes, len(representatives), series.index if index is None else index)
+
+
+def results_match(expected, actual) -> bool:
+    if actual is None or type(expected) is not type(actual):
+        return False
+    return expected.reset_index(drop=True).equals(actual.reset_index(drop=True))
+
+
+class MemoizedExecution:
+    """
+    Runs single-column element-wise generated functions once per distinct input value.
+
+    A function qualifies when static analysis finds it reads exactly one column and nothing
+    row-dependent, and a one-time check on a sample where every value appears twice gives the same
+    result memoized as run directly. The verdict is cached by code hash.
+    """
+
+    def __init__(self, max_unique_ratio: float = MEMO_MAX_UNIQUE_RATIO):
+        self.max_unique_ratio = max_unique_ratio
+        self.columns = {}  # function key -> source column or None
+        self.verified = {}  # function key -> bool
+        self.encodings = OrderedDict()  # (id(df), column) -> (weakref to df, codes, representatives)
+        self.lock = threading.Lock()
+
+    def encode(self, df: pd.DataFrame, column: str):
+        """factorize_column of df[column], shared by every function that reads the same column of df."""
+        key = (id(df), column)
+        with self.lock:
+            entry = self.encodings.get(key)
+            if entry is not None and entry[0]() is df:  # Guards against a reused id
+                self.encodings.move_to_end(key)
+                return entry[1], entry[2]
+
+        codes, representatives = factorize_column(df[column])
+        with self.lock:
+            self.encodings[key] = (weakref.ref(df), codes, representatives)
+            while len(self.encodings) > MEMO_MAX_ENCODINGS:
+                self.encodings.popitem(last=False)
+        return codes, representatives
+
+    def source_column(self, func):
+        key = function_key(func)
+        with self.lock:
+            if key in self.columns:
+                return self.columns[key]
+        source = FUNCTION_REGISTRY.source_of(func)
+        column = elementwise_source_column(source, func.__name__) if source else None
+        with self.lock:
+            self.columns[key] = column
+        return column
+
+    def verify(self, func, series: pd.Series, column: str, codes: np.ndarray, representatives: np.ndarray) -> bool:
+        """Compares direct and memoized results on a sample with every distinct value in it twice."""
+        key = function_key(func)
+        with self.lock:
+            if key in self.verified:
+                return self.verified[key]
+
+        rng = np.random.default_rng(0)
+        picked = rng.permutation(representatives)[:MEMO_VERIFY_ROWS]
+        sample = series.iloc[np.concatenate([picked, picked[::-1]])].reset_index(drop=True)
+        try:
+            expected = func(sample.to_frame(name=column))
+            actual = run_on_distinct_values(func, sample, column)
+            ok = results_match(expected, actual)
+        except Exception:
+            ok = False  # Errors surface on the regular path
+
+        with self.lock:
+            self.verified[key] = ok
+        if not ok:
+            print(f"Function {func.__name__} is not element-wise, running it on every row.")
+        return ok
+
+    def wrap(self, func, df: pd.DataFrame):
+        """
+        Returns a replacement for func that evaluates df's source column once per distinct value,
+        or None if func doesn't qualify or the column has too many distinct values to gain anything.
+        """
+        column = self.source_column(func)
+        if column is None or column not in df.columns or not isinstance(df[column], pd.Series):
+            return None
+
+        series = df[column]
+        codes, representatives = self.encode(df, column)
+        if len(representatives) > self.max_unique_ratio * max(len(series), 1):
+            return None
+        if not self.verify(func, series, column, codes, representatives):
+            return None
+
+        @functools.wraps(func)
+        def memoized(DF):
+            distinct = series.iloc[representatives].to_frame(name=column).reset_index(drop=True)
+            result = broadcast(func(distinct), codes, len(representatives), DF.index)
+            if result is None:
+                print(f"Function {func.__name__} result can't be broadcast, running it on every row.")
+                return func(DF.copy())
+            print(f"Function {func.__name__} ran on {len(representatives)} distinct values for {len(DF)} rows.")
+            return result
+
+        return memoized
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                "memoized": sorted(key for key, ok in self.verified.items() if ok),
+                "rejected": sorted(key for key, ok in self.verified.items() if not ok),
+            }
+
+
+# Shared memoization decisions of this process
+MEMOIZED_EXECUTION = MemoizedExecution()
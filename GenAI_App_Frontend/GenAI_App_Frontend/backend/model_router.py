@@ -0,0 +1,242 @@
+import concurrent.futures
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+# Models a slow or failing primary can be hedged to, in order of preference
+ROUTER_ALTERNATE_MODELS = [
+    "gpt-4o-mini",
+    "databricks-meta-llama-3-1-70b-instruct",
+]
+
+# Number of recent calls the latency percentiles and error rate are computed over
+ROUTER_WINDOW = 50
+
+# Minimum number of recorded calls before a model's own p95 is trusted as its hedge delay
+ROUTER_MIN_SAMPLES = 5
+
+# Hedge delay used until enough calls have been recorded
+ROUTER_DEFAULT_HEDGE_DELAY = 20.0
+
+# Models with a recent error rate above this are not used as the hedge target
+ROUTER_MAX_ERROR_RATE = 0.5
+
+
+def percentile(values, fraction: float) -> float:
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+class ModelStats:
+    """
+    Rolling latency and error statistics for one model.
+
+    Latencies are of single LLM calls. Outcomes are per LLM call and per routed attempt: a call
+    that raised or an attempt whose generated function failed validation counts as an error.
+    """
+
+    def __init__(self, window: int = ROUTER_WINDOW):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)  # True for a completed call, False for an error
+        self.lock = threading.Lock()
+
+    def record(self, latency: float, error: bool = False):
+        with self.lock:
+            if not error:
+                self.latencies.append(latency)
+            self.outcomes.append(not error)
+
+    def record_error(self):
+        """Records a failure without a latency, e.g. an attempt that produced invalid code."""
+        with self.lock:
+            self.outcomes.append(False)
+
+    def p50(self):
+        with self.lock:
+            return percentile(self.latencies, 0.5) if self.latencies else None
+
+    def p95(self):
+        with self.lock:
+            return percentile(self.latencies, 0.95) if self.latencies else None
+
+    def error_rate(self) -> float:
+        with self.lock:
+            if not self.outcomes:
+                return 0.0
+            return 1 - sum(self.outcomes) / len(self.outcomes)
+
+    def sample_count(self) -> int:
+        with self.lock:
+            return len(self.latencies)
+
+    def snapshot(self) -> dict:
+        return {
+            "p50": self.p50(),
+            "p95": self.p95(),
+            "error_rate": self.error_rate(),
+            "samples": self.sample_count(),
+        }
+
+
+class ModelStatsRegistry:
+    """Statistics of every model, shared by the code generation chains and the router."""
+
+    def __init__(self):
+        self.stats = {}
+        self.lock = threading.Lock()
+
+    def get(self, model: str) -> ModelStats:
+        with self.lock:
+            if model not in self.stats:
+                self.stats[model] = ModelStats()
+            return self.stats[model]
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            models = list(self.stats)
+        return {model: self.get(model).snapshot() for model in models}
+
+
+MODEL_STATS = ModelStatsRegistry()
+
+
+@contextmanager
+def recorded_llm_call(model: str, cancel_event: threading.Event = None, stats: ModelStatsRegistry = MODEL_STATS):
+    """
+    Records the latency of the LLM call made inside the block, or an error if it raises.
+
+    A call cut short by cancel_event is not recorded: its elapsed time is only a lower bound and
+    would pull the percentiles down.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        if cancel_event is None or not cancel_event.is_set():
+            stats.get(model).record(time.perf_counter() - start, error=True)
+        raise
+    if cancel_event is None or not cancel_event.is_set():
+        stats.get(model).record(time.perf_counter() - start)
+
+
+class ModelRouter:
+    """
+    Routes code generation attempts to a primary model and hedges to an alternate when it is slow.
+
+    An attempt is a callable taking (model, cancel_event) and returning (value, ok). If the primary
+    has not finished within its rolling p95 latency, or fails, a second attempt is started on the
+    healthiest alternate. The first attempt that returns ok wins and the other one is cancelled
+    through its cancel_event.
+
+    Latencies come from the LLM calls the chains record in MODEL_STATS, not from the attempt as a
+    whole, which also includes validation and repair retries.
+    """
+
+    def __init__(self, alternate_models=None, max_workers: int = 16, stats: ModelStatsRegistry = MODEL_STATS):
+        self.alternate_models = alternate_models if alternate_models is not None else list(ROUTER_ALTERNATE_MODELS)
+        self.stats = stats
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="model-router")
+
+    def model_stats(self, model: str) -> ModelStats:
+        return self.stats.get(model)
+
+    def hedge_delay(self, model: str) -> float:
+        """Seconds to wait on the primary before hedging: its p95 once enough calls are recorded."""
+        stats = self.model_stats(model)
+        if stats.sample_count() < ROUTER_MIN_SAMPLES:
+            return ROUTER_DEFAULT_HEDGE_DELAY
+        return stats.p95()
+
+    def pick_alternate(self, primary: str):
+        """Returns the alternate with the lowest p50 among those with an acceptable error rate."""
+        candidates = [model for model in self.alternate_models if model != primary]
+        healthy = [model for model in candidates if self.model_stats(model).error_rate() <= ROUTER_MAX_ERROR_RATE]
+        if not healthy:
+            return None
+
+        def expected_latency(model):
+            p50 = self.model_stats(model).p50()
+            return p50 if p50 is not None else ROUTER_DEFAULT_HEDGE_DELAY
+
+        # Keep the configured preference order between models with no history
+        return min(healthy, key=lambda model: (expected_latency(model), candidates.index(model)))
+
+    def guarded_attempt(self, attempt, model: str, cancel_event: threading.Event):
+        try:
+            value, ok = attempt(model, cancel_event)
+        except Exception as e:
+            # A failed LLM call was already recorded by the chain that made it
+            print(f"Router: model {model} raised {type(e).__name__}: {e}")
+            return None, False
+
+        # Code that never validated counts against the model, a cancelled loser isn't recorded
+        if not ok and not cancel_event.is_set():
+            self.model_stats(model).record_error()
+        return value, ok
+
+    def run(self, attempt, primary: str):
+        """
+        Runs an attempt on the primary model, hedging to an alternate if needed.
+
+        Parameters:
+            attempt (callable): Takes (model, cancel_event), returns (value, ok).
+            primary (str): The model chosen by the user.
+
+        Returns:
+            tuple: (value, ok, model) from the winning attempt, or from the primary if nothing succeeded.
+        """
+        events = {primary: threading.Event()}
+        futures = {self.executor.submit(self.guarded_attempt, attempt, primary, events[primary]): primary}
+
+        done, _ = concurrent.futures.wait(futures, timeout=self.hedge_delay(primary))
+        if done:
+            value, ok = next(iter(done)).result()
+            if ok:
+                return value, ok, primary
+            fallback = (value, ok, primary)
+        else:
+            fallback = None
+
+        alternate = self.pick_alternate(primary)
+        if alternate is None:
+            if fallback is not None:
+                return fallback
+            value, ok = next(iter(futures)).result()
+            return value, ok, primary
+
+        print(f"Router: hedging {primary} with {alternate} (p95 {self.model_stats(primary).p95()}).")
+        events[alternate] = threading.Event()
+        futures[self.executor.submit(self.guarded_attempt, attempt, alternate, events[alternate])] = alternate
+
+        pending = {future for future in futures if not future.done()}
+        results = {}
+        for future in futures:
+            if future.done():
+                results[futures[future]] = future.result()
+
+        while pending:
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                model = futures[future]
+                value, ok = future.result()
+                results[model] = (value, ok)
+                if ok:
+                    # Cancel the loser
+                    for other, event in events.items():
+                        if other != model:
+                            event.set()
+                    return value, ok, model
+
+        value, ok = results.get(primary, (None, False))
+        return value, ok, primary
+
+    def snapshot(self) -> dict:
+        """Current statistics for every model seen by the router."""
+        return self.stats.snapshot()
+
+
+MODEL_ROUTER = ModelRouter()
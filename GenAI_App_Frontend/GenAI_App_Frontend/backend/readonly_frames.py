@@ -0,0 +1,105 @@
+import threading
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+
+# Bytes copied to build the input frame of a run are recorded under this name
+INPUT_FRAME_KEY = "<input frame>"
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    """Bytes a shallow df.copy() duplicates: the column buffers, not the Python objects they point to."""
+    return int(df.memory_usage(index=False, deep=False).sum())
+
+
+def read_only_view(df: pd.DataFrame, drop_columns: list = None):
+    """
+    Builds a frame that shares df's NumPy buffers with their write flag cleared.
+
+    The view is a separate DataFrame, so adding, replacing or dropping columns on it never touches
+    df. Writing into existing values (df.loc[...] = x, inplace fillna/replace, .values[...] = x)
+    raises "ValueError: assignment destination is read-only" instead of corrupting df. Columns
+    backed by pandas extension arrays can't be write-protected and are copied.
+
+    Parameters:
+        df (pd.DataFrame): The frame to protect.
+        drop_columns (list): Columns left out of the view, e.g. the target variable.
+
+    Returns:
+        tuple: (view, bytes_copied)
+    """
+    drop_columns = set(drop_columns or [])
+    arrays = []
+    names = []
+    bytes_copied = 0
+
+    for position, name in enumerate(df.columns):
+        if name in drop_columns:
+            continue
+        series = df.iloc[:, position]  # Positional, duplicate column names are kept
+        if isinstance(series.dtype, np.dtype):
+            values = series.to_numpy(copy=False).view()
+            values.flags.writeable = False
+        else:
+            values = series.array.copy()
+            bytes_copied += int(series.memory_usage(index=False, deep=False))
+        arrays.append(values)
+        names.append(name)
+
+    view = pd.DataFrame(dict(enumerate(arrays)), index=df.index, copy=False)
+    view.columns = pd.Index(names, dtype=df.columns.dtype) if names else df.columns[:0]
+    return view, bytes_copied
+
+
+def is_read_only_violation(failure: dict) -> bool:
+    """True if a failure record comes from a function writing into a read-only view."""
+    return (
+        failure is not None
+        and failure.get("exception_type") == "ValueError"
+        and "read-only" in failure.get("message", "")
+    )
+
+
+def function_key(func) -> str:
+    """Identifies a generated function by its code, registry modules are named after the code hash."""
+    return f"{func.__module__}.{func.__qualname__}"
+
+
+class ExecutionCopyTracker:
+    """Bytes copied per feature, and the functions that were seen writing to their input."""
+
+    def __init__(self):
+        self.bytes_copied = Counter()
+        self.mutating = set()
+        self.lock = threading.Lock()
+
+    def record(self, feature_name: str, nbytes: int):
+        with self.lock:
+            self.bytes_copied[feature_name] += nbytes
+
+    def mark_mutating(self, key: str):
+        with self.lock:
+            self.mutating.add(key)
+
+    def mutates(self, key: str) -> bool:
+        with self.lock:
+            return key in self.mutating
+
+    def reset(self):
+        """Clears the byte counts, functions known to mutate their input stay known."""
+        with self.lock:
+            self.bytes_copied.clear()
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                "bytes_copied": dict(self.bytes_copied),
+                "total_bytes_copied": sum(self.bytes_copied.values()),
+                "mutating_functions": sorted(self.mutating),
+            }
+
+
+# Tracker shared by every execution path of this process
+EXECUTION_COPY_TRACKER = ExecutionCopyTracker()
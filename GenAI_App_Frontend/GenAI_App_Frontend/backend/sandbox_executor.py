@@ -0,0 +1,344 @@
+import multiprocessing
+import os
+import queue
+import resource
+import tempfile
+import threading
+import time
+
+import pandas as pd
+import pyarrow as pa
+
+from .code_gen_repair import (
+    FAILURE_LOAD_ERROR, FAILURE_MISSING_FUNCTION, FAILURE_TIMEOUT, FAILURE_RESOURCE_LIMIT, failure_from_exception,
+)
+from .function_registry import FUNCTION_REGISTRY
+from .readonly_frames import function_key, read_only_view
+from .memoized_execution import MEMOIZED_EXECUTION
+
+
+# Wall-clock seconds a feature function may run before its worker is killed
+SANDBOX_TIMEOUT_SECONDS = float(os.environ.get("SANDBOX_TIMEOUT_SECONDS", "60"))
+
+# Address space cap of each worker in MB, 0 disables it. Must leave room for a copy of the dataset.
+SANDBOX_MEMORY_LIMIT_MB = int(os.environ.get("SANDBOX_MEMORY_LIMIT_MB", "8192"))
+
+# CPU seconds a single feature function may use
+SANDBOX_CPU_SECONDS = int(os.environ.get("SANDBOX_CPU_SECONDS", "120"))
+
+# Number of pre-warmed worker processes
+SANDBOX_WORKERS = int(os.environ.get("SANDBOX_WORKERS", "2"))
+
+# Seconds a worker may take to report ready after being started
+SANDBOX_START_TIMEOUT = 60
+
+# Dataset files kept for the workers, more than one so in-flight tasks for the previous dataset still work
+SANDBOX_MAX_DATASETS = 2
+
+
+class SandboxInputError(Exception):
+    """The input dataframe can't be shared with the workers, e.g. an object column mixing types has no Arrow type."""
+
+
+def dataframe_to_ipc(df: pd.DataFrame) -> bytes:
+    """Serializes a dataframe, index included, to an Arrow IPC stream."""
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def dataframe_from_ipc(data: bytes) -> pd.DataFrame:
+    return pa.ipc.open_stream(pa.py_buffer(data)).read_all().to_pandas()
+
+
+def write_dataset_file(df: pd.DataFrame, path: str):
+    """Writes the dataset workers read from as an Arrow IPC file, which they memory-map."""
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def limit_worker_resources(memory_limit_mb: int):
+    if memory_limit_mb:
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def limit_task_cpu(cpu_seconds: int):
+    """Lets the next task use cpu_seconds on top of what this worker has used so far."""
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(usage.ru_utime + usage.ru_stime) + cpu_seconds + 1
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def sandbox_worker_main(connection, memory_limit_mb: int, cpu_seconds: int):
+    """
+    Worker process loop: receives (dataset_path, file_path, function_name, copy_free, memoize) tasks and
+    replies with ("ok", arrow_ipc_bytes) or ("failed", failure_dict).
+    """
+    limit_worker_resources(memory_limit_mb)
+    datasets = {}  # Only the most recent dataset is kept
+    mutating = set()  # Functions seen writing to a read-only view
+
+    connection.send(("ready", os.getpid()))
+    while True:
+        try:
+            task = connection.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+
+        dataset_path, file_path, function_name, copy_free, memoize = task
+        limit_task_cpu(cpu_seconds)
+
+        try:
+            if dataset_path not in datasets:
+                datasets.clear()
+                with pa.memory_map(dataset_path, "r") as source:
+                    datasets[dataset_path] = pa.ipc.open_file(source).read_all().to_pandas()
+            df = datasets[dataset_path]
+        except MemoryError as e:
+            connection.send(("failed", failure_from_exception(e, failure_class=FAILURE_RESOURCE_LIMIT)))
+            return
+        except Exception as e:
+            connection.send(("failed", failure_from_exception(e)))
+            continue
+
+        try:
+            func = FUNCTION_REGISTRY.load_file(file_path, function_name)  # Worker's own registry
+        except Exception as e:
+            connection.send(("failed", failure_from_exception(e, failure_class=FAILURE_LOAD_ERROR)))
+            continue
+        if func is None:
+            connection.send(("failed", {"failure_class": FAILURE_MISSING_FUNCTION}))
+            continue
+
+        try:
+            # The cached dataset is reused by later tasks, so functions never get it directly
+            memoized = MEMOIZED_EXECUTION.wrap(func, df) if memoize else None
+            if memoized is not None:
+                result = memoized(df)
+            elif copy_free and function_key(func) not in mutating:
+                try:
+                    result = func(read_only_view(df)[0])
+                except ValueError as e:
+                    if "read-only" not in str(e):
+                        raise
+                    mutating.add(function_key(func))
+                    result = func(df.copy())
+            else:
+                result = func(df.copy())
+            if isinstance(result, pd.Series):
+                result = result.to_frame()
+        except MemoryError as e:
+            connection.send(("failed", failure_from_exception(e, failure_class=FAILURE_RESOURCE_LIMIT, df=df)))
+            return  # Start fresh after running out of memory
+        except Exception as e:
+            connection.send(("failed", failure_from_exception(e, df=df)))
+            continue
+
+        try:
+            connection.send(("ok", dataframe_to_ipc(result)))
+        except (pa.ArrowException, TypeError, ValueError):
+            # Mixed-type object columns have no Arrow type, send those few results as they are
+            connection.send(("ok_object", result))
+
+
+class SandboxWorker:
+    def __init__(self, context, memory_limit_mb: int, cpu_seconds: int):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(
+            target=sandbox_worker_main,
+            args=(child_connection, memory_limit_mb, cpu_seconds),
+            daemon=True,
+            name="feature-sandbox",
+        )
+        self.process.start()
+        child_connection.close()
+
+        try:
+            if not self.connection.poll(SANDBOX_START_TIMEOUT):
+                raise EOFError
+            self.connection.recv()
+        except (EOFError, OSError):
+            self.kill()
+            raise RuntimeError("Sandbox worker did not start.")
+
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+        self.connection.close()
+
+
+class SandboxExecutor:
+    """
+    Runs generated feature functions in pre-warmed worker processes.
+
+    Each call has a wall-clock timeout and a CPU cap, and every worker has an address space cap.
+    A worker that times out, exceeds a limit or dies is killed and replaced. The dataset is shared
+    with the workers through a memory-mapped Arrow IPC file and results come back as Arrow IPC
+    streams, so no dataframe is pickled.
+    """
+
+    def __init__(self, workers: int = SANDBOX_WORKERS, timeout: float = SANDBOX_TIMEOUT_SECONDS,
+                 memory_limit_mb: int = SANDBOX_MEMORY_LIMIT_MB, cpu_seconds: int = SANDBOX_CPU_SECONDS):
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.cpu_seconds = cpu_seconds
+        self.context = multiprocessing.get_context("spawn")  # Never fork the threaded app server
+
+        self.dataset_dir = tempfile.mkdtemp(prefix="feature_sandbox_")
+        self.datasets = {}  # id(df) -> (df, path) in insertion order, the dataframe is kept so its id can't be reused
+        self.dataset_lock = threading.Lock()
+
+        self.idle = queue.Queue()  # Idle workers, None for a slot whose replacement worker failed to start
+        for _ in range(max(1, workers)):
+            self.idle.put(self.new_worker())
+
+    def new_worker(self) -> SandboxWorker:
+        return SandboxWorker(self.context, self.memory_limit_mb, self.cpu_seconds)
+
+    def respawn(self):
+        """A worker to replace a killed one, or None to start it on the next checkout if that fails."""
+        try:
+            return self.new_worker()
+        except Exception as e:
+            print(f"Sandbox worker could not be restarted, retrying on next use: {e}")
+            return None
+
+    def checkout(self) -> SandboxWorker:
+        """Takes an idle worker, starting one for an empty slot. The slot is kept if that fails."""
+        worker = self.idle.get()
+        if worker is not None:
+            return worker
+        try:
+            return self.new_worker()
+        except Exception:
+            self.idle.put(None)
+            raise
+
+    def dataset_path(self, df: pd.DataFrame) -> str:
+        """
+        Writes df for the workers the first time it is seen and returns the file path.
+
+        Raises SandboxInputError when df can't be converted to Arrow. The failure is remembered,
+        so the conversion isn't retried for every feature run on the same dataframe.
+        """
+        with self.dataset_lock:
+            entry = self.datasets.get(id(df))
+            if entry is not None and entry[0] is df:
+                if entry[1] is None:
+                    raise SandboxInputError("The dataset could not be converted to Arrow.")
+                return entry[1]
+
+            while len(self.datasets) >= SANDBOX_MAX_DATASETS:
+                _, old_path = self.datasets.pop(next(iter(self.datasets)))
+                if old_path is None:
+                    continue
+                try:
+                    os.remove(old_path)
+                except FileNotFoundError:
+                    pass
+
+            path = os.path.join(self.dataset_dir, f"dataset_{id(df)}_{time.time_ns()}.arrow")
+            try:
+                write_dataset_file(df, path)
+            except (pa.ArrowException, TypeError, ValueError) as e:
+                if os.path.exists(path):
+                    os.remove(path)
+                self.datasets[id(df)] = (df, None)
+                raise SandboxInputError(f"The dataset could not be converted to Arrow: {e}") from e
+            self.datasets[id(df)] = (df, path)
+            return path
+
+    def execute(self, file_path: str, function_name: str, df: pd.DataFrame, copy_free: bool = False,
+                memoize: bool = False):
+        """
+        Runs function_name from file_path on df in a worker.
+
+        Parameters:
+            file_path (str): The saved generated code.
+            function_name (str): The function to run.
+            df (pd.DataFrame): The input dataframe. Workers get their own copy, so it is never mutated.
+            copy_free (bool): Run the function on a read-only view of the worker's dataset instead of a copy.
+            memoize (bool): Run a single-column element-wise function once per distinct value.
+
+        Returns:
+            tuple: (result, failure) where result is the returned dataframe or None, and failure
+                   is None or a failure record like execute_single_function_with_diagnostics returns.
+
+        Raises:
+            SandboxInputError: df can't be shared with the workers, run the function in-process instead.
+        """
+        dataset_path = self.dataset_path(df)
+        try:
+            worker = self.checkout()
+        except Exception as e:
+            print(f"No sandbox worker available for {function_name}: {e}")
+            return None, failure_from_exception(e, failure_class=FAILURE_RESOURCE_LIMIT)
+        replace = False
+
+        try:
+            worker.connection.send((dataset_path, os.path.abspath(file_path), function_name, copy_free, memoize))
+
+            if not worker.connection.poll(self.timeout):
+                print(f"Function {function_name} did not finish within {self.timeout:.0f}s, killing its worker.")
+                replace = True
+                return None, {"failure_class": FAILURE_TIMEOUT, "timeout": self.timeout}
+
+            try:
+                status, payload = worker.connection.recv()
+            except (EOFError, OSError):
+                # Killed by RLIMIT_CPU, RLIMIT_AS or a crash in native code
+                print(f"Sandbox worker died while running {function_name}.")
+                replace = True
+                return None, {"failure_class": FAILURE_RESOURCE_LIMIT, "exit_code": worker.process.exitcode}
+
+            if status == "ok":
+                return dataframe_from_ipc(payload), None
+            if status == "ok_object":
+                return payload, None
+
+            if payload["failure_class"] == FAILURE_RESOURCE_LIMIT:
+                replace = True
+            return None, payload
+        finally:
+            if replace or not worker.alive():
+                worker.kill()
+                worker = self.respawn()
+            self.idle.put(worker)
+
+    def shutdown(self):
+        while not self.idle.empty():
+            worker = self.idle.get()
+            if worker is None:
+                continue
+            try:
+                worker.connection.send(None)
+            except OSError:
+                pass
+            worker.kill()
+
+
+SANDBOX_EXECUTOR = None
+SANDBOX_EXECUTOR_LOCK = threading.Lock()
+
+
+def get_sandbox_executor() -> SandboxExecutor:
+    """The shared executor, started on first use."""
+    global SANDBOX_EXECUTOR
+    with SANDBOX_EXECUTOR_LOCK:
+        if SANDBOX_EXECUTOR is None:
+            SANDBOX_EXECUTOR = SandboxExecutor()
+        return SANDBOX_EXECUTOR
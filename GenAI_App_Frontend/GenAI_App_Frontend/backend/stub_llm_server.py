@@ -0,0 +1,197 @@
+"""
+Local OpenAI-compatible chat completions server for deterministic code generation tests.
+
+Point both providers at it:
+
+    OPENAI_API_BASE=http://127.0.0.1:8765/v1
+    DATABRICKS_ENDPOINT=http://127.0.0.1:8765/v1
+
+and start it with `python -m GenAI_App_Frontend.backend.stub_llm_server --port 8765`, or in-process
+with StubLLMServer(...).start(). Responses are built from the "The function should be named X."
+line of the prompt, so every model returns the same valid function. Latency and failures can be
+configured per model to exercise the router.
+"""
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .fake_llm import synthetic_code_response
+
+
+STUB_DEFAULT_PORT = 8765
+
+# Seconds between streamed chunks
+STUB_CHUNK_DELAY = 0.005
+
+
+class StubModelBehaviour:
+    """Latency and failure injection for one model."""
+
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0, status: int = 429, retry_after: float = None):
+        """
+        Parameters:
+            latency (float): Seconds to wait before the first token.
+            failure_rate (float): Fraction of requests answered with an error status, spread evenly.
+            status (int): HTTP status used for injected failures.
+            retry_after (float): Retry-After header sent with injected failures.
+        """
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.status = status
+        self.retry_after = retry_after
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def next_request_fails(self) -> bool:
+        with self.lock:
+            self.requests += 1
+            if self.failure_rate <= 0:
+                return False
+            # Deterministic: fail whenever the running failure count falls behind the target rate
+            return int(self.requests * self.failure_rate) > int((self.requests - 1) * self.failure_rate)
+
+
+class StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # Concurrency tests open many connections at once
+
+
+class StubLLMServer:
+    """Threaded OpenAI-compatible server, one instance per test."""
+
+    def __init__(self, port: int = 0, behaviours: dict = None):
+        """
+        Parameters:
+            port (int): Port to listen on, 0 picks a free port.
+            behaviours (dict): Model name to StubModelBehaviour, unknown models answer immediately.
+        """
+        self.behaviours = behaviours or {}
+        self.request_log = []
+        self.server = StubHTTPServer(("127.0.0.1", port), self.handler_class())
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+
+    def behaviour(self, model: str) -> StubModelBehaviour:
+        if model not in self.behaviours:
+            self.behaviours[model] = StubModelBehaviour()
+        return self.behaviours[model]
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        print(f"Stub LLM server listening on {self.base_url}")
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self.send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+                    return
+
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                model = body.get("model", "")
+                prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+                behaviour = stub.behaviour(model)
+                stub.request_log.append({"model": model, "stream": bool(body.get("stream")), "time": time.time()})
+
+                time.sleep(behaviour.latency)
+                if behaviour.next_request_fails():
+                    headers = {"Retry-After": str(behaviour.retry_after)} if behaviour.retry_after is not None else {}
+                    self.send_json(behaviour.status, {"error": {"message": "Injected failure", "type": "stub"}}, headers)
+                    return
+
+                content = synthetic_code_response(prompt)
+                if body.get("stream"):
+                    self.send_stream(model, content)
+                else:
+                    self.send_json(200, {
+                        "id": f"chatcmpl-{uuid.uuid4().hex}",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                        "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                                  "total_tokens": (len(prompt) + len(content)) // 4},
+                    })
+
+            def send_json(self, status, payload, headers=None):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def send_stream(self, model, content):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+
+                chunk_id = f"chatcmpl-{uuid.uuid4().hex}"
+                pieces = re.findall(r"\S*\s*", content)
+                try:
+                    for piece in pieces + [None]:
+                        delta = {"content": piece} if piece is not None else {}
+                        chunk = {
+                            "id": chunk_id,
+                            "object": "chat.completion.chunk",
+                            "created": int(time.time()),
+                            "model": model,
+                            "choices": [{"index": 0, "delta": delta, "finish_reason": None if piece is not None else "stop"}],
+                        }
+                        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                        self.wfile.flush()
+                        time.sleep(STUB_CHUNK_DELAY)
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # The client cancelled the stream
+                self.close_connection = True
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stub LLM server.")
+    parser.add_argument("--port", type=int, default=STUB_DEFAULT_PORT)
+    parser.add_argument("--latency", action="append", default=[], metavar="MODEL=SECONDS",
+                        help="Delay before the first token for a model, can be repeated.")
+    parser.add_argument("--failure-rate", action="append", default=[], metavar="MODEL=RATE",
+                        help="Fraction of requests answered with 429 for a model, can be repeated.")
+    args = parser.parse_args()
+
+    behaviours = {}
+    for option, field in ((args.latency, "latency"), (args.failure_rate, "failure_rate")):
+        for item in option:
+            model, value = item.split("=", 1)
+            behaviours.setdefault(model, StubModelBehaviour())
+            setattr(behaviours[model], field, float(value))
+
+    server = StubLLMServer(port=args.port, behaviours=behaviours).start()
+    try:
+        server.thread.join()
+    except KeyboardInterrupt:
+        server.stop()
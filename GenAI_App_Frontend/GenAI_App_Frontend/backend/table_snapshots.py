@@ -0,0 +1,219 @@
+import hashlib
+import json
+import os
+import threading
+
+import pandas as pd
+import pyarrow as pa
+
+from .databricks_fetch import arrow_to_pandas, fetch_arrow_table
+from .lazy_dataset import LAZY_SAMPLE_METHOD, sample_arrow_table
+
+
+# Directory the local copies of Databricks tables are written to
+TABLE_SNAPSHOT_DIR = os.environ.get("TABLE_SNAPSHOT_DIR", ".table_snapshots")
+
+# Total size of the snapshots on disk before the least recently used are evicted
+TABLE_SNAPSHOT_MAX_BYTES = int(os.environ.get("TABLE_SNAPSHOT_MAX_BYTES", str(10 * 1024 ** 3)))
+
+
+def snapshot_key(server_hostname: str, table_name: str, access_token: str) -> str:
+    """
+    The snapshot key of a table. The token is part of it because row filters and column masks
+    can give users different contents for the same table.
+    """
+    parts = [server_hostname, table_name.lower(), access_token or ""]
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def probe_table_version(cursor, table_name: str):
+    """
+    Reads the current Delta version of a table, one row of its history.
+
+    Returns:
+        str: The version, or None for tables without a Delta history such as views.
+    """
+    try:
+        cursor.execute(f"DESCRIBE HISTORY {table_name} LIMIT 1")
+        rows = cursor.fetchall()
+    except Exception as e:
+        print(f"No version for {table_name}, it won't be snapshotted: {e}")
+        return None
+    return str(rows[0][0]) if rows else None
+
+
+class TableSnapshotCache:
+    """
+    Local copies of Databricks tables as uncompressed Arrow IPC files, tagged with the table version.
+
+    A snapshot is only used while the table's Delta version is still the one it was downloaded at,
+    which a DESCRIBE HISTORY LIMIT 1 query checks without reading data. Snapshots are memory-mapped,
+    so loading one doesn't read the file up front and string columns stay backed by the mapping.
+    Eviction is least-recently-used, bounded by the total size on disk.
+    """
+
+    def __init__(self, directory: str = TABLE_SNAPSHOT_DIR, max_bytes: int = TABLE_SNAPSHOT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.RLock()  # Held by evict while it removes entries
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def data_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.arrow")
+
+    def meta_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str, version: str):
+        """
+        The snapshot for key if it was taken at version, memory-mapped, otherwise None.
+        A snapshot of another version is deleted.
+        """
+        try:
+            with open(self.meta_path(key), "r") as f:
+                meta = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            with self.lock:
+                self.misses += 1
+            return None
+
+        if meta.get("version") != version:
+            print(f"Snapshot of {meta.get('table')} is at version {meta.get('version')}, the table at {version}.")
+            self.remove(key)
+            with self.lock:
+                self.stale += 1
+            return None
+
+        try:
+            table = pa.ipc.open_file(pa.memory_map(self.data_path(key), "r")).read_all()
+            # Touch the entry so eviction is least-recently-used rather than oldest-written
+            os.utime(self.data_path(key), None)
+        except (OSError, pa.ArrowException):
+            self.remove(key)
+            with self.lock:
+                self.misses += 1
+            return None
+
+        with self.lock:
+            self.hits += 1
+        return table
+
+    def put(self, key: str, version: str, table_name: str, table: pa.Table):
+        """Writes a snapshot of table taken at version, evicting old snapshots if needed."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.data_path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            os.replace(tmp_path, path)
+            with open(self.meta_path(key), "w") as f:
+                json.dump({"table": table_name, "version": version, "rows": table.num_rows}, f)
+        except (OSError, pa.ArrowException) as e:
+            print(f"Snapshot of {table_name} could not be written: {e}")
+            self.remove(key)
+            return
+
+        self.evict()
+
+    def load(self, pool, connection_args: tuple, table_name: str, rows: int = None, query: str = None,
+             sample_method: str = LAZY_SAMPLE_METHOD) -> pd.DataFrame:
+        """
+        Loads a table from its snapshot when the table hasn't changed, otherwise from the warehouse.
+
+        The version is probed before the data is read, so a table written to during the download
+        is only snapshotted at the older version and downloaded again next time.
+
+        Parameters:
+            pool (DatabricksConnectionPool): Pool the queries run on.
+            connection_args (tuple): (server_hostname, http_path, access_token).
+            table_name (str): Fully qualified table name.
+            rows (int): Load only this many rows for a preview. Previews don't write snapshots.
+            query (str): The preview query to run when there is no snapshot, LIMIT rows by default.
+            sample_method (str): How a preview is sampled from a snapshot, "limit" or "tablesample"
+                                 like sample_query, so it matches what query returns.
+
+        Returns:
+            pd.DataFrame: The table, or its first rows.
+        """
+        server_hostname, _, access_token = connection_args
+        key = snapshot_key(server_hostname, table_name, access_token)
+
+        def download(cursor):
+            version = probe_table_version(cursor, table_name)
+            table = self.get(key, version) if version is not None else None
+            if table is not None:
+                return version, table, None
+            if rows is not None:
+                cursor.execute(query or f"SELECT * FROM {table_name} LIMIT {rows}")
+            else:
+                cursor.execute(f"SELECT * FROM {table_name}")
+            columns = [desc[0] for desc in cursor.description]
+            return version, fetch_arrow_table(cursor), columns
+
+        with pool.checkout(*connection_args) as connection:
+            with connection.cursor() as cursor:
+                version, table, columns = download(cursor)
+
+        if columns is None:
+            print(f"Loaded {table_name} from its local snapshot at version {version}.")
+            return arrow_to_pandas(sample_arrow_table(table, rows, sample_method) if rows is not None else table)
+        if table is None:
+            return pd.DataFrame(columns=columns)
+        if rows is None and version is not None:
+            self.put(key, version, table_name, table)
+        return arrow_to_pandas(table)
+
+    def invalidate(self, key: str = None):
+        """Removes the snapshot for key, or every snapshot."""
+        if key is not None:
+            self.remove(key)
+            return
+        with self.lock:
+            if not os.path.isdir(self.directory):
+                return
+            for name in os.listdir(self.directory):
+                if name.endswith(".arrow") or name.endswith(".json"):
+                    try:
+                        os.remove(os.path.join(self.directory, name))
+                    except FileNotFoundError:
+                        pass
+
+    def remove(self, key: str):
+        with self.lock:
+            for path in (self.data_path(key), self.meta_path(key)):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def evict(self):
+        """Deletes the least recently used snapshots until the directory fits in max_bytes."""
+        with self.lock:
+            entries = []
+            for name in os.listdir(self.directory):
+                if not name.endswith(".arrow"):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name[:-len(".arrow")]))
+
+            total = sum(size for _, size, _ in entries)
+            entries.sort()
+            for _, size, key in entries:
+                if total <= self.max_bytes:
+                    break
+                self.remove(key)
+                total -= size
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "stale": self.stale}
+
+
+# Snapshots shared by every session of this process
+TABLE_SNAPSHOTS = TableSnapshotCache()
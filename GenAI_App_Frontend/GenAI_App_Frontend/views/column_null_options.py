@@ -125,7 +125,8 @@ def get_base_item(item):
 
 def base_null_options():
     return rx.cond(
-        FeatureFlowState.base_dataset_set & BaseListState.columns_set, 
+        # Rendered from the schema, Databricks tables publish it before their rows arrive
+        BaseListState.columns_set, 
 
         rx.vstack(
             rx.heading("Null Value Imputation Options - Base Dataset"),
@@ -17,6 +17,10 @@ class Feature(rx.Base):
 
     code: str = "none"
 
+    # Latest execution profile, and whether the feature is below the throughput threshold
+    profile: str = ""
+    slow: bool = False
+
     # def __init__(self, id, name, description, code):
     #     self.id = id 
     #     self.name = name 
@@ -75,6 +79,12 @@ class FeatureListState(rx.State):
     # features: list[Any] = features_dic
 
     llm: str = "LLM"
+
+    # Dependency cycle reported by the last run of the feature functions
+    dependency_error: str = ""
+
+    # Features that had to be run on whole columns in out-of-core mode
+    global_statistic_warning: str = ""
     
     async def get_llm(self) -> str: 
         #print("GET_FEATURE_1:", self.features[0]['name'])
@@ -152,12 +162,23 @@ class FeatureListState(rx.State):
 
     async def generate_all_features(self):
         feature_flow_state = await self.get_state(FeatureFlowState) 
-        feature_flow_state.run_code_gen_and_execution_parent()
+        await feature_flow_state.run_code_gen_and_execution_parent()
 
 
     async def run_all_feature_functions_parent(self):
         feature_flow_state = await self.get_state(FeatureFlowState) 
+        # Wait for a lazily loading full table here, the sync run below would block the event loop
+        await feature_flow_state._await_base_dataset()
         feature_flow_state.run_all_feature_functions_parent()
+        self.dependency_error = feature_flow_state.feature_dependency_error
+        self.global_statistic_warning = "; ".join(
+            f"{name} {reasons}" for name, reasons in feature_flow_state.global_statistic_features.items()
+        )
+
+        for feature in self.features:
+            profile = feature_flow_state.feature_profiles.get(feature.name, {})
+            feature.profile = profile.get("summary", "")
+            feature.slow = profile.get("slow", False)
 
         p1state = await self.get_state(Page1State)
         p1state.set_features_generated(True)
@@ -225,6 +246,21 @@ def render_feature(feature):
                     language="python",
                     show_line_numbers=True,
                 ),
+                rx.hstack(
+                    rx.cond(
+                        feature.slow,
+                        rx.badge(
+                            rx.icon("turtle", size=16),
+                            "Slow",
+                            color_scheme="red",
+                            radius="large",
+                            variant="surface",
+                        ),
+                    ),
+                    rx.text(feature.profile, size="1", color_scheme="gray"),
+                    align="center",
+                    spacing="2",
+                ),
                 rx.grid(
                     rx.button( 
                         rx.icon(tag="refresh-ccw", color="#24292E"),
@@ -310,6 +346,27 @@ def feature_list_v2():
         #     # + get_variant_class("red"),
                     
         # ),
+        rx.cond(
+            FeatureListState.dependency_error != "",
+            rx.callout(
+                FeatureListState.dependency_error,
+                icon="triangle_alert",
+                color_scheme="red",
+                role="alert",
+                width="100%",
+            ),
+        ),
+
+        rx.cond(
+            FeatureListState.global_statistic_warning != "",
+            rx.callout(
+                "Run on whole columns instead of row batches: " + FeatureListState.global_statistic_warning,
+                icon="info",
+                color_scheme="amber",
+                width="100%",
+            ),
+        ),
+
         rx.button(
             "Generate",
             #on_click=FeatureListState.generate_all_features,
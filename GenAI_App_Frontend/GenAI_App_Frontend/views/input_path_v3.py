@@ -44,6 +44,18 @@ lightTheme = {
 }
 
 
+def publish_schema(base_list_state, feature_flow_state, columns: list):
+    """Copies the table's column metadata to BaseListState and resets its imputation choices."""
+    base_list_state.comments_dict = feature_flow_state.db_table_comments_dict
+
+    base_list_state.db_table_data_type_dict = feature_flow_state.db_table_data_type_dict
+    base_list_state.db_table_descriptions_dict = feature_flow_state.db_table_descriptions_dict
+
+    base_list_state.columns = columns
+    # Initialize imputation_choices as a dictionary with column names as keys and empty strings as values
+    base_list_state.imputation_choices = {col: "" for col in columns}
+
+
 class DataEditorState(rx.State):
     path: str = ""
     csv_data: list = []
@@ -84,23 +96,23 @@ class DataEditorState(rx.State):
             print("SELF.chosen_table:", self.chosen_table)
             print("chosen_table type", type(self.chosen_table))
             feature_flow_state = await self.get_state(FeatureFlowState)
-            base_dt_set = await feature_flow_state.set_base_dataset_from_databricks(self.chosen_table)
+            data_future, metadata_future = feature_flow_state.fetch_databricks_table(self.chosen_table)
+
+            # The schema arrives long before the data, publish it so the imputation options render
+            # while the rows are still streaming
+            feature_flow_state.set_databricks_metadata(await metadata_future)
+            base_list_state = await self.get_state(BaseListState)
+            publish_schema(base_list_state, feature_flow_state, list(feature_flow_state.db_table_data_type_dict))
+            yield
+
+            base_dt_set = await feature_flow_state.set_base_dataset_from_future(data_future)
 
             if base_dt_set: 
 
                 feature_flow_state2 = await self.get_state(FeatureFlowState)
                 df = feature_flow_state2.get_base_dataset_head(20)
 
-                base_list_state = await self.get_state(BaseListState)
-                
-                base_list_state.comments_dict = feature_flow_state2.db_table_comments_dict
-                
-                base_list_state.db_table_data_type_dict = feature_flow_state2.db_table_data_type_dict
-                base_list_state.db_table_descriptions_dict = feature_flow_state2.db_table_descriptions_dict
-
-                base_list_state.columns = df.columns.tolist()
-                # Initialize imputation_choices as a dictionary with column names as keys and empty strings as values
-                base_list_state.imputation_choices = {col: "" for col in df.columns.tolist()}
+                publish_schema(base_list_state, feature_flow_state2, df.columns.tolist())
 
                 mlconfigstate = await self.get_state(MLConfigState)
                 mlconfigstate.set_columns(df.columns.tolist())
@@ -168,12 +180,28 @@ def base_datatable_v3():
                     style=button_style,
 
                 ),
+                rx.cond(
+                    DataEditorState.loaded,
+                    rx.button(
+                        "Clear Local Copy",
+                        on_click=FeatureFlowState.invalidate_table_snapshot,
+                        style=button_style,
+                    ),
+                ),
             ),
             rx.cond(
                 DataEditorState.error_message != "",
                 rx.text(DataEditorState.error_message, color="red"),
             ),
-  
+            rx.cond(
+                FeatureFlowState.base_dataset_sampled,
+                rx.text(
+                    "Showing a sample of the table, the full table loads in the background for feature execution and AutoML.",
+                    size="1",
+                    color_scheme="gray",
+                ),
+            ),
+
       
             rx.cond(
                 DataEditorState.loaded,
@@ -0,0 +1,289 @@
+"""
+End-to-end benchmark of the generate -> save -> load -> execute -> merge pipeline.
+
+Drives FeatureFlowState.generate_all_features and run_all_feature_functions over csvs/base_dataset.csv
+and synthetic scale-ups of it, with the LLM replaced by the offline FakeLLMProvider. Every scale
+runs in its own process so the reported peak RSS belongs to that scale only.
+
+Run from the GenAI_App_Frontend directory:
+
+    python benchmarks/bench_codegen_pipeline.py                      # base, 10k, 1m, 10m rows
+    python benchmarks/bench_codegen_pipeline.py --scales base,10k --latency 0.5
+    python benchmarks/bench_codegen_pipeline.py --scales 1m --copy-free       # read-only views instead of copies
+    python benchmarks/bench_codegen_pipeline.py --scales 1m --memoize         # once per distinct value
+    python benchmarks/bench_codegen_pipeline.py --scales 1m --fuse            # one function per source column
+    python benchmarks/bench_codegen_pipeline.py --mode replay --cassette benchmarks/cassettes/codegen.json
+
+Record a cassette of real responses once (needs OPENAI_API_KEY / DATABRICKS_TOKEN):
+
+    python benchmarks/bench_codegen_pipeline.py --scales base --mode record --cassette benchmarks/cassettes/codegen.json
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE_DATASET_PATH = os.path.join(APP_DIR, "csvs", "base_dataset.csv")
+ALL_DOCS_PATH = os.path.join(APP_DIR, "csvs", "all_docs.csv")
+
+SCALES = {
+    "base": None,
+    "10k": 10_000,
+    "1m": 1_000_000,
+    "10m": 10_000_000,
+}
+
+TARGET_VAR = "price"
+TABLE_NAME = "car_sale_regression"
+
+# Same requests as FeatureFlowState.test_code_gen_and_execution
+BENCHMARK_FEATURES = [
+    ("clean_title_bool", "Give me a function that takes the `clean_title` column from my dataframe and transforms it into a boolean"),
+    ("horsepower", "Give me a function that takes the `engine` column and outputs the following new columns: `horsepower`. If you can't identify a value for the column, output a null. The expected values for the column in this example are as follows: `horsepower` = `172`"),
+    ("displacement", "Give me a function that takes the `engine` column and outputs the following new columns: `displacement`. If you can't identify a value for the column, output a null. The expected values for the column in this example are as follows: `displacement` = `1.6`"),
+    ("num_cylinders", "Give me a function that takes the `engine` column and outputs the following new columns: `num_cylinders`. If you can't identify a value for the column, output a null. The expected values for the column in this example are as follows: `num_cylinders` = `4`"),
+    ("mileage_over_10000", "Give me a field that indicates True when the vehicle has more than 10000 miles on it. Use the `milage` field."),
+    ("american_brand", "Create a field to indicate that a vehicle was made by an American company, based on the `brand` column"),
+]
+
+
+def scale_dataset(df: pd.DataFrame, rows: int) -> pd.DataFrame:
+    """Resamples the base dataset (with replacement, fixed seed) to the requested number of rows."""
+    if rows is None:
+        return df
+    rng = np.random.default_rng(0)
+    scaled = df.iloc[rng.integers(0, len(df), size=rows)].reset_index(drop=True)
+    if "id" in scaled.columns:
+        scaled["id"] = np.arange(rows)
+    return scaled
+
+
+def build_documentation(df: pd.DataFrame, format_column_metadata_for_llm) -> str:
+    docs = pd.read_csv(ALL_DOCS_PATH)
+    docs = docs[docs["table_name"] == TABLE_NAME]
+    descriptions = dict(zip(docs["column_name"], docs["description"].fillna("")))
+    column_metadata = [
+        (col, str(df[col].dtype), descriptions.get(col, "No comment provided.")) for col in df.columns
+    ]
+    return format_column_metadata_for_llm(column_metadata)
+
+
+class StageTimer:
+    """Accumulates wall time per pipeline stage by wrapping module-level functions."""
+
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.calls = defaultdict(int)
+
+    def wrap(self, module, function_name: str, stage: str):
+        original = getattr(module, function_name)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.seconds[stage] += time.perf_counter() - start
+                self.calls[stage] += 1
+
+        setattr(module, function_name, timed)
+
+
+def run_scale(scale: str, args) -> dict:
+    """Runs the pipeline once for one scale, in the current process."""
+    workdir = tempfile.mkdtemp(prefix=f"bench_codegen_{scale}_")
+    os.chdir(workdir)  # Generated code, logs and the response cache stay out of the repo
+    os.environ["CODE_GEN_CACHE_DIR"] = os.path.join(workdir, ".code_gen_cache")
+    if args.mode != "record":
+        # The chain modules build their clients at import time, no request is sent with this key
+        os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+    sys.path.insert(0, APP_DIR)
+
+    from GenAI_App_Frontend.backend import feature_flow_state as ffs
+    from GenAI_App_Frontend.backend.fake_llm import (
+        FakeLLMProvider, FAKE_LLM_MODE_RECORD, install_llm_provider,
+    )
+    from GenAI_App_Frontend.backend.readonly_frames import EXECUTION_COPY_TRACKER
+
+    upstream = None
+    if args.mode == FAKE_LLM_MODE_RECORD:
+        from GenAI_App_Frontend.backend.llm_providers import OPENAI_PROVIDER, DATABRICKS_PROVIDER
+        from GenAI_App_Frontend.backend.feature_code_gen_v2 import CODE_GEN_MODEL_NAME
+        upstream = {CODE_GEN_MODEL_NAME: OPENAI_PROVIDER, "*": DATABRICKS_PROVIDER}
+
+    fake_llm = FakeLLMProvider(
+        mode=args.mode,
+        cassette_path=args.cassette,
+        upstream=upstream,
+        latency=args.latency,
+        failure_rate=args.failure_rate,
+    )
+    install_llm_provider(fake_llm)
+
+    timer = StageTimer()
+    timer.wrap(ffs, "save_generated_code", "save")
+    timer.wrap(ffs, "load_single_function", "load")
+    timer.wrap(ffs, "execute_single_function_with_diagnostics", "execute")
+    timer.wrap(ffs.ColumnAccumulator, "build", "merge")
+    for chain in ("CODE_GEN_CHAIN_V2", "CODE_GEN_BATCH_CHAIN_V2", "CODE_REPAIR_CHAIN_V2"):
+        timer.wrap(getattr(ffs, chain), "invoke", "generate")
+
+    start = time.perf_counter()
+    base_df = scale_dataset(pd.read_csv(BASE_DATASET_PATH), SCALES[scale])
+    load_seconds = time.perf_counter() - start
+
+    state = ffs.FeatureFlowState(_reflex_internal_init=True)
+    state.base_dataset = base_df
+    state.target_var = TARGET_VAR
+    state.db_table = TABLE_NAME
+    state.llm_to_use = "gpt-4o-mini"
+    state.bypass_code_gen_cache = True
+    state.copy_free_execution = args.copy_free
+    state.memoized_execution = args.memoize
+    state.fused_codegen = args.fuse
+    state.db_table_comments = build_documentation(base_df.drop(columns=[TARGET_VAR]), ffs.format_column_metadata_for_llm)
+    state.features = [
+        ffs.Feature(id=i, feature_name=name, description=description)
+        for i, (name, description) in enumerate(BENCHMARK_FEATURES)
+    ]
+    state.features_v2 = [
+        ffs.FeatureV2(id=i, name=name, description=description)
+        for i, (name, description) in enumerate(BENCHMARK_FEATURES)
+    ]
+
+    start = time.perf_counter()
+    generated = state.generate_all_features(type="v2")
+    generate_all_seconds = time.perf_counter() - start
+    stages_after_generate = dict(timer.seconds)
+
+    start = time.perf_counter()
+    rerun = state.run_all_feature_functions()
+    run_all_seconds = time.perf_counter() - start
+
+    if args.mode == FAKE_LLM_MODE_RECORD:
+        fake_llm.save_cassette()
+
+    generate_stages = {stage: round(seconds, 4) for stage, seconds in stages_after_generate.items()}
+    generate_stages["other"] = round(generate_all_seconds - sum(stages_after_generate.values()), 4)
+    run_stages = {
+        stage: round(timer.seconds[stage] - stages_after_generate.get(stage, 0.0), 4)
+        for stage in timer.seconds
+        if timer.seconds[stage] - stages_after_generate.get(stage, 0.0) > 0
+    }
+    run_stages["other"] = round(run_all_seconds - sum(run_stages.values()), 4)
+
+    return {
+        "scale": scale,
+        "rows": len(base_df),
+        "dataset_build_seconds": round(load_seconds, 4),
+        "generate_all_features_seconds": round(generate_all_seconds, 4),
+        "generate_all_features_stages": generate_stages,
+        "run_all_feature_functions_seconds": round(run_all_seconds, 4),
+        "run_all_feature_functions_stages": run_stages,
+        "features_generated": int(generated.shape[1] - base_df.shape[1]),
+        "features_rerun": int(rerun.shape[1] - base_df.shape[1]),
+        "llm": fake_llm.snapshot(),
+        "llm_calls": fake_llm.call_count(),
+        "copy_free": args.copy_free,
+        "memoize": args.memoize,
+        "fuse": args.fuse,
+        "copied_mb": round(EXECUTION_COPY_TRACKER.snapshot()["total_bytes_copied"] / 1024 ** 2, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def run_in_subprocess(scale: str, args) -> dict:
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        result_path = f.name
+
+    command = [
+        sys.executable, os.path.abspath(__file__), "--run-one", scale, "--result-file", result_path,
+        "--mode", args.mode, "--latency", str(args.latency), "--failure-rate", str(args.failure_rate),
+    ]
+    if args.cassette:
+        command += ["--cassette", os.path.abspath(args.cassette)]
+    if args.copy_free:
+        command.append("--copy-free")
+    if args.memoize:
+        command.append("--memoize")
+    if args.fuse:
+        command.append("--fuse")
+
+    output = None if args.verbose else subprocess.DEVNULL
+    completed = subprocess.run(command, stdout=output, stderr=output)
+    if completed.returncode != 0:
+        return {"scale": scale, "error": f"exit code {completed.returncode}, rerun with --verbose"}
+
+    with open(result_path, "r") as f:
+        result = json.load(f)
+    os.remove(result_path)
+    return result
+
+
+def print_report(results: list):
+    header = f"{'scale':>6} {'rows':>10} {'gen_all s':>10} {'llm s':>8} {'exec s':>8} {'run_all s':>10} {'llm calls':>9} {'copied MB':>10} {'peak MB':>9}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        if "error" in result:
+            print(f"{result['scale']:>6} {result['error']}")
+            continue
+        stages = result["generate_all_features_stages"]
+        print(
+            f"{result['scale']:>6} {result['rows']:>10} {result['generate_all_features_seconds']:>10.3f} "
+            f"{stages.get('generate', 0.0):>8.3f} {stages.get('execute', 0.0):>8.3f} "
+            f"{result['run_all_feature_functions_seconds']:>10.3f} {result['llm_calls']:>9} {result['copied_mb']:>10.1f} {result['peak_rss_mb']:>9.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Code generation pipeline benchmark.")
+    parser.add_argument("--scales", default=",".join(SCALES), help=f"Comma separated, from {list(SCALES)}.")
+    parser.add_argument("--mode", default="synthetic", choices=["synthetic", "replay", "record"])
+    parser.add_argument("--cassette", default=None, help="Cassette file for replay or record mode.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Injected seconds per LLM call.")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of LLM calls that fail.")
+    parser.add_argument("--copy-free", action="store_true", help="Run functions on read-only views instead of copies.")
+    parser.add_argument("--memoize", action="store_true", help="Run element-wise functions once per distinct value.")
+    parser.add_argument("--fuse", action="store_true", help="Generate one function for features on the same columns.")
+    parser.add_argument("--output", default=None, help="Write the full results as JSON to this file.")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own output.")
+    parser.add_argument("--run-one", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        result = run_scale(args.run_one, args)
+        with open(args.result_file, "w") as f:
+            json.dump(result, f)
+        return
+
+    results = []
+    for scale in args.scales.split(","):
+        scale = scale.strip().lower()
+        if scale not in SCALES:
+            parser.error(f"Unknown scale {scale}")
+        print(f"Running scale {scale}...", flush=True)
+        results.append(run_in_subprocess(scale, args))
+
+    print()
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nFull results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
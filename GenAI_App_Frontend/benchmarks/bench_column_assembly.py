@@ -0,0 +1,96 @@
+"""
+Benchmark of assembling the final dataframe from many feature results.
+
+Compares the previous pattern, pd.concat of the growing combined_results per feature followed by
+remove_duplicate_columns and a three-way concat, with ColumnAccumulator. Results are synthetic
+single-column frames like generated feature functions return, every tenth one a boolean.
+
+Run from the GenAI_App_Frontend directory:
+
+    python benchmarks/bench_column_assembly.py                          # 10, 100, 200, 400 features
+    python benchmarks/bench_column_assembly.py --features 100,500 --rows 1000000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from GenAI_App_Frontend.backend.column_accumulator import ColumnAccumulator  # noqa: E402
+
+
+BASE_COLUMNS = 12
+TARGET_VAR = "price"
+
+
+def remove_duplicate_columns(df, combined_results):
+    # Same as feature_flow_state.remove_duplicate_columns, imported without the app's dependencies
+    duplicate_columns = combined_results.columns.intersection(df.columns)
+    if not duplicate_columns.empty:
+        combined_results = combined_results.drop(columns=duplicate_columns)
+    return combined_results
+
+
+def make_inputs(rows: int, features: int):
+    rng = np.random.default_rng(0)
+    base = pd.DataFrame({f"col_{i}": rng.random(rows) for i in range(BASE_COLUMNS)})
+    target_column = pd.Series(rng.random(rows), name=TARGET_VAR)
+    results = []
+    for i in range(features):
+        values = rng.random(rows) > 0.5 if i % 10 == 0 else rng.random(rows)
+        results.append((f"feature_{i}", pd.DataFrame({f"feature_{i}": values})))
+    return base, target_column, results
+
+
+def assemble_concat(df, target_column, results):
+    combined_results = pd.DataFrame()
+    for _, result in results:
+        combined_results = pd.concat([combined_results, result], axis=1)
+    combined_results = remove_duplicate_columns(df, combined_results)
+    return pd.concat([df, combined_results, target_column], axis=1)
+
+
+def assemble_accumulator(df, target_column, results):
+    results_accumulator = ColumnAccumulator(df, target_column)
+    for feature_name, result in results:
+        results_accumulator.add(feature_name, result)
+    return results_accumulator.build()[0]
+
+
+def measure(assemble, df, target_column, results):
+    tracemalloc.start()
+    start = time.perf_counter()
+    final_df = assemble(df, target_column, results)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return final_df, seconds, peak / 1024 ** 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--features", default="10,100,200,400", help="Comma-separated feature counts")
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{'features':>8} {'rows':>9} | {'concat s':>9} {'peak MB':>8} | {'accum s':>9} {'peak MB':>8} | {'speedup':>7}")
+    for features in [int(count) for count in args.features.split(",")]:
+        df, target_column, results = make_inputs(args.rows, features)
+        concat_df, concat_seconds, concat_peak = measure(assemble_concat, df, target_column, results)
+        accumulator_df, accumulator_seconds, accumulator_peak = measure(assemble_accumulator, df, target_column, results)
+        pd.testing.assert_frame_equal(concat_df, accumulator_df)
+        print(
+            f"{features:>8} {args.rows:>9} | {concat_seconds:>9.3f} {concat_peak:>8.0f} | "
+            f"{accumulator_seconds:>9.3f} {accumulator_peak:>8.0f} | {concat_seconds / accumulator_seconds:>6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
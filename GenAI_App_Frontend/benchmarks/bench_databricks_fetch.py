@@ -0,0 +1,115 @@
+"""
+Benchmark of loading a Databricks table into pandas, against the local stand-in connector.
+
+Compares the previous path, cursor.fetchall() into tuples followed by pd.DataFrame(rows), with
+fetch_dataframe, which fetches Arrow batches and converts them column by column. Each method runs
+in a fresh process, peak memory is the resident memory increase over the process after the
+stand-in table was built.
+
+Run from the GenAI_App_Frontend directory:
+
+    python benchmarks/bench_databricks_fetch.py                  # 100k and 1M rows
+    python benchmarks/bench_databricks_fetch.py --rows 2000000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from GenAI_App_Frontend.backend.databricks_fetch import fetch_dataframe  # noqa: E402
+from GenAI_App_Frontend.backend.feature_profiler import PeakMemorySampler  # noqa: E402
+from databricks_stand_in import StandInConnector, make_table  # noqa: E402
+
+
+TABLE = "main.default.cars"
+QUERY = f"SELECT * FROM {TABLE}"
+
+
+def load_fetchall(cursor):
+    columns = [desc[0] for desc in cursor.description]
+    return pd.DataFrame(cursor.fetchall(), columns=columns)
+
+
+def load_arrow(cursor):
+    return fetch_dataframe(cursor)
+
+
+METHODS = {"fetchall": load_fetchall, "arrow": load_arrow}
+
+
+def load(connector, method):
+    connection = connector.connect()
+    with connection.cursor() as cursor:
+        cursor.execute(QUERY)
+        df = METHODS[method](cursor)
+    connection.close()
+    return df
+
+
+def measure(rows: int, method: str) -> dict:
+    connector = StandInConnector({TABLE: make_table(rows)})
+    sampler = PeakMemorySampler()
+    watch_id = sampler.watch()
+    start = time.perf_counter()
+    df = load(connector, method)
+    seconds = time.perf_counter() - start
+    peak_mb = sampler.stop(watch_id)
+    return {
+        "seconds": seconds,
+        "peak_mb": peak_mb,
+        "frame_mb": df.memory_usage(deep=True).sum() / 1024 ** 2,
+    }
+
+
+def check_equal(rows: int):
+    """Both methods load the same values, string columns differ only in dtype."""
+    connector = StandInConnector({TABLE: make_table(rows)})
+    expected = load(connector, "fetchall")
+    actual = load(connector, "arrow")
+    for column in actual.columns:
+        if isinstance(actual[column].dtype, pd.StringDtype):
+            actual[column] = actual[column].astype(object)
+    pd.testing.assert_frame_equal(expected, actual)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="100000,1000000", help="Comma-separated row counts")
+    parser.add_argument("--measure", help=argparse.SUPPRESS)  # Internal: "rows,method" in a fresh process
+    args = parser.parse_args()
+
+    if args.measure:
+        rows, method = args.measure.split(",")
+        print(json.dumps(measure(int(rows), method)))
+        return
+
+    check_equal(10_000)
+    print(f"{'rows':>9} | {'fetchall s':>10} {'peak MB':>8} {'frame MB':>8} | "
+          f"{'arrow s':>8} {'peak MB':>8} {'frame MB':>8} | {'speedup':>7}")
+    for rows in [int(count) for count in args.rows.split(",")]:
+        results = {}
+        for method in METHODS:
+            output = subprocess.run(
+                [sys.executable, __file__, "--measure", f"{rows},{method}"],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results[method] = json.loads(output.strip().splitlines()[-1])
+        old, new = results["fetchall"], results["arrow"]
+        print(
+            f"{rows:>9} | {old['seconds']:>10.2f} {old['peak_mb']:>8.0f} {old['frame_mb']:>8.0f} | "
+            f"{new['seconds']:>8.2f} {new['peak_mb']:>8.0f} {new['frame_mb']:>8.0f} | "
+            f"{old['seconds'] / new['seconds']:>6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
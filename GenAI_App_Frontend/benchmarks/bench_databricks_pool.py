@@ -0,0 +1,86 @@
+"""
+Benchmark of the Databricks queries behind connecting and loading a table, with and without pooling.
+
+Each user session lists the tables, as DatabaseConnectionForm.connect does, then loads a table and
+its column metadata, as DataEditorState.load_table does. Without pooling (max_idle=0) every call
+opens and closes its own session, with pooling sessions after the first reuse the connection.
+Session setup is simulated by the stand-in connector sleeping for --connect-seconds.
+
+Run from the GenAI_App_Frontend directory:
+
+    python benchmarks/bench_databricks_pool.py
+    python benchmarks/bench_databricks_pool.py --sessions 50 --connect-seconds 0.5
+"""
+import argparse
+import os
+import sys
+import time
+
+import pyarrow as pa
+
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from GenAI_App_Frontend.backend.databricks_fetch import fetch_dataframe  # noqa: E402
+from GenAI_App_Frontend.backend.databricks_pool import DatabricksConnectionPool  # noqa: E402
+from databricks_stand_in import StandInConnector, make_table  # noqa: E402
+
+
+HOSTNAME = "dbc-stand-in.cloud.databricks.com"
+HTTP_PATH = "/sql/1.0/warehouses/stand-in"
+TOKEN = "stand-in-token"
+
+
+def make_tables(rows: int) -> dict:
+    return {
+        "main.default.cars": make_table(rows),
+        "main.information_schema.tables": pa.table({"table_name": ["cars"]}),
+        "main.information_schema.columns": pa.table({
+            "column_name": ["brand", "price"], "data_type": ["string", "double"], "comment": [None, None],
+        }),
+    }
+
+
+def user_session(pool: DatabricksConnectionPool):
+    with pool.checkout(HOSTNAME, HTTP_PATH, TOKEN) as connection:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT table_name FROM main.information_schema.tables WHERE table_schema = 'default'")
+            cursor.fetchall()
+
+    with pool.checkout(HOSTNAME, HTTP_PATH, TOKEN) as connection:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT * FROM main.default.cars")
+            fetch_dataframe(cursor)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT column_name, data_type, comment FROM main.information_schema.columns")
+            cursor.fetchall()
+
+
+def measure(max_idle: int, sessions: int, rows: int, connect_seconds: float):
+    connector = StandInConnector(make_tables(rows), connect_seconds=connect_seconds)
+    pool = DatabricksConnectionPool(connect=connector.connect, max_idle=max_idle)
+    start = time.perf_counter()
+    for _ in range(sessions):
+        user_session(pool)
+    seconds = time.perf_counter() - start
+    pool.close_all()
+    return seconds, pool.snapshot()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--connect-seconds", type=float, default=0.3)
+    args = parser.parse_args()
+
+    print(f"{'mode':>9} | {'seconds':>8} {'per session':>11} | {'opened':>6} {'reused':>6}")
+    for mode, max_idle in (("unpooled", 0), ("pooled", 4)):
+        seconds, stats = measure(max_idle, args.sessions, args.rows, args.connect_seconds)
+        print(f"{mode:>9} | {seconds:>8.2f} {seconds / args.sessions:>11.3f} | {stats['opened']:>6} {stats['reused']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark of reloading a Databricks table with and without the local snapshot cache.
+
+Loads the same table three times against the stand-in connector: a cold load that downloads it and
+writes the snapshot, a reload served from the memory-mapped snapshot, and a reload after the table's
+version was bumped, which downloads it again. The warehouse transfer rate is simulated with
+--rows-per-second.
+
+Run from the GenAI_App_Frontend directory:
+
+    python benchmarks/bench_table_snapshots.py
+    python benchmarks/bench_table_snapshots.py --rows 5000000 --rows-per-second 2000000
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from GenAI_App_Frontend.backend.databricks_fetch import fetch_dataframe  # noqa: E402
+from GenAI_App_Frontend.backend.databricks_pool import DatabricksConnectionPool  # noqa: E402
+from GenAI_App_Frontend.backend.table_snapshots import TableSnapshotCache  # noqa: E402
+from databricks_stand_in import StandInConnector, make_table  # noqa: E402
+
+
+TABLE = "main.default.cars"
+CONNECTION_ARGS = ("dbc-stand-in.cloud.databricks.com", "/sql/1.0/warehouses/stand-in", "stand-in-token")
+
+
+def timed(load):
+    start = time.perf_counter()
+    df = load()
+    return df, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--rows-per-second", type=float, default=1_000_000)
+    args = parser.parse_args()
+
+    connector = StandInConnector({TABLE: make_table(args.rows)}, rows_per_second=args.rows_per_second)
+    pool = DatabricksConnectionPool(connect=connector.connect)
+    directory = tempfile.mkdtemp(prefix="table_snapshots_")
+    snapshots = TableSnapshotCache(directory)
+
+    try:
+        expected, direct_seconds = timed(lambda: pool.query(*CONNECTION_ARGS, f"SELECT * FROM {TABLE}", fetch_dataframe))
+        print(f"{'load':>22} | {'seconds':>8}")
+        print(f"{'without snapshots':>22} | {direct_seconds:>8.2f}")
+
+        for label in ("cold", "unchanged table", "after a write"):
+            if label == "after a write":
+                connector.versions[TABLE] += 1
+            df, seconds = timed(lambda: snapshots.load(pool, CONNECTION_ARGS, TABLE))
+            assert df.equals(expected), label
+            print(f"{label:>22} | {seconds:>8.2f}")
+        print("Snapshot stats:", snapshots.snapshot())
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
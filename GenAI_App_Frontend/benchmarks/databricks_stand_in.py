@@ -0,0 +1,144 @@
+"""
+Local stand-in for the Databricks SQL connector, serving in-memory Arrow tables.
+
+Cursors implement the parts of the connector's cursor the app uses: execute, description,
+fetchall, fetchmany, fetchall_arrow and fetchmany_arrow. Like the real connector, results arrive
+as Arrow data and the row fetches convert them to Python tuples. Every Arrow fetch goes through
+an IPC round trip, so the returned buffers are freshly allocated as if read from the network.
+Opening a connection sleeps for connect_seconds, like a new session on the warehouse, and
+Arrow fetches are throttled to rows_per_second when it is set.
+DESCRIBE HISTORY returns the table's entry in versions, bump it to simulate a write.
+
+    connect = StandInConnector({"main.default.cars": make_table(1_000_000)}).connect
+    with connect().cursor() as cursor:
+        cursor.execute("SELECT * FROM main.default.cars")
+        table = cursor.fetchall_arrow()
+"""
+import re
+import time
+
+import numpy as np
+import pyarrow as pa
+
+
+def make_table(rows: int, seed: int = 0) -> pa.Table:
+    """A car listings table with integer, float, string and nullable columns."""
+    rng = np.random.default_rng(seed)
+    brands = np.array(["Ford", "Audi", "BMW", "Toyota", "Honda", "Kia", "Tesla", "Volvo"], dtype=object)
+    fuel = np.array(["Gasoline", "Diesel", "Hybrid", "Electric"], dtype=object)
+    milage = rng.integers(0, 300_000, rows)
+    accident = pa.array(np.where(rng.random(rows) < 0.1, None, rng.random(rows) < 0.3).tolist(), type=pa.bool_())
+    return pa.table({
+        "id": np.arange(rows, dtype=np.int64),
+        "brand": pa.array(brands[rng.integers(0, len(brands), rows)], type=pa.string()),
+        "model_year": rng.integers(1990, 2025, rows),
+        "milage": milage,
+        "fuel_type": pa.array(fuel[rng.integers(0, len(fuel), rows)], type=pa.string()),
+        "engine_liters": np.round(rng.uniform(1.0, 6.0, rows), 1),
+        "accident": accident,
+        "price": np.round(rng.uniform(2_000, 120_000, rows), 2),
+    })
+
+
+def wire_copy(table: pa.Table) -> pa.Table:
+    """Serializes and reads back a table, the way the connector receives Arrow batches."""
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return pa.ipc.open_stream(sink.getvalue()).read_all()
+
+
+class StandInCursor:
+    def __init__(self, tables: dict, versions: dict = None, rows_per_second: float = None):
+        self.tables = tables
+        self.versions = versions if versions is not None else {}
+        self.rows_per_second = rows_per_second
+        self.table = None
+        self.position = 0
+        self.description = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def execute(self, query: str):
+        """
+        Runs SELECT 1, DESCRIBE HISTORY <table> or SELECT ... FROM <table> [TABLESAMPLE (n ROWS)] [LIMIT n],
+        other clauses are ignored.
+        """
+        history = re.match(r"\s*DESCRIBE\s+HISTORY\s+([\w.]+)", query, re.IGNORECASE)
+        match = re.search(
+            r"FROM\s+([\w.]+)(?:\s+TABLESAMPLE\s*\(\s*(\d+)\s+ROWS\s*\))?(?:\s+LIMIT\s+(\d+))?", query, re.IGNORECASE
+        )
+        if re.fullmatch(r"\s*SELECT\s+1\s*", query, re.IGNORECASE):
+            table = pa.table({"1": [1]})
+        elif history is not None and history.group(1) in self.tables:
+            table = pa.table({"version": [self.versions.get(history.group(1), 0)], "operation": ["WRITE"]})
+        elif match is None or match.group(1) not in self.tables:
+            raise ValueError(f"Unknown table in query: {query}")
+        else:
+            table = self.tables[match.group(1)]
+            for rows in (match.group(2), match.group(3)):
+                if rows is not None:
+                    table = table.slice(0, int(rows))
+        self.table = table
+        self.position = 0
+        self.description = [(field.name, str(field.type), None, None, None, None, None) for field in table.schema]
+
+    def fetchmany_arrow(self, size: int) -> pa.Table:
+        batch = self.table.slice(self.position, size)
+        self.position += batch.num_rows
+        if self.rows_per_second:
+            time.sleep(batch.num_rows / self.rows_per_second)
+        return wire_copy(batch)
+
+    def fetchall_arrow(self) -> pa.Table:
+        return self.fetchmany_arrow(self.table.num_rows - self.position)
+
+    def fetchmany(self, size: int) -> list:
+        batch = self.fetchmany_arrow(size)
+        columns = [column.to_pylist() for column in batch.columns]
+        return list(zip(*columns))
+
+    def fetchall(self) -> list:
+        return self.fetchmany(self.table.num_rows - self.position)
+
+    def close(self):
+        self.table = None
+
+
+class StandInConnection:
+    def __init__(self, tables: dict, versions: dict = None, rows_per_second: float = None):
+        self.tables = tables
+        self.versions = versions
+        self.rows_per_second = rows_per_second
+        self.open = True
+        self.queries = 0
+
+    def cursor(self) -> StandInCursor:
+        if not self.open:
+            raise ConnectionError("Connection is closed")
+        self.queries += 1
+        return StandInCursor(self.tables, self.versions, self.rows_per_second)
+
+    def close(self):
+        self.open = False
+
+
+class StandInConnector:
+    """Replaces databricks.sql: connect() returns connections to the given tables."""
+
+    def __init__(self, tables: dict, connect_seconds: float = 0.0, rows_per_second: float = None):
+        self.tables = tables
+        self.connect_seconds = connect_seconds
+        self.rows_per_second = rows_per_second
+        self.versions = {name: 0 for name in tables}
+        self.connections = []
+
+    def connect(self, server_hostname=None, http_path=None, access_token=None, **kwargs) -> StandInConnection:
+        time.sleep(self.connect_seconds)
+        connection = StandInConnection(self.tables, self.versions, self.rows_per_second)
+        self.connections.append(connection)
+        return connection